@@ -1,4 +1,4 @@
-import os, pandas as pd
+import argparse, logging, os, pandas as pd
 
 # Look in both data locations we’ve been using
 BASE_DIR = os.path.dirname(__file__)
@@ -9,6 +9,10 @@ DATA_DIRS = [
 
 from .services.connectors.flood_qld import qld_get_flood_risk
 from .services.connectors.zoning_vic import vic_get_zone_bpa
+from .services.connectors.geocache import get_cache
+from .services.enrichment import ENRICH_COLUMNS, apply_flood, apply_zone_bpa, enrich_csv, lookup_point
+from .services.snapshot import snapshot_path, source_stamp, write_snapshot
+from .services.store import ListingStore
 
 def _find_input_csv():
     for d in DATA_DIRS:
@@ -19,38 +23,69 @@ def _find_input_csv():
         if os.path.exists(p): return p, d
     raise FileNotFoundError("No sample_listings.csv or enriched_listings.csv found under data dirs")
 
-def main():
-    in_path, base_dir = _find_input_csv()
-    print(f"Loading: {in_path}")
+def enrich_sequential(in_path: str, out_path: str):
     df = pd.read_csv(in_path)
 
-    for col in ["flood_risk","bushfire_risk","zoning_code"]:
+    for col in ENRICH_COLUMNS:
         if col not in df.columns: df[col] = None
 
     rows = df.to_dict(orient="records")
     out = []
     for r in rows:
-        state = str(r.get("state","")).upper()
-        lat, lng = r.get("lat"), r.get("lng")
-        if lat is None or lng is None:
+        point = lookup_point(r)
+        if point is None:
             out.append(r); continue
+        state, lat, lng = point
 
         if state == "QLD":
-            fr = qld_get_flood_risk(lat, lng)
-            if fr: r["flood_risk"] = fr
+            apply_flood(r, qld_get_flood_risk(lat, lng))
 
         if state == "VIC":
             z, bpa = vic_get_zone_bpa(lat, lng)
-            if z: r["zoning_code"] = z
-            if bpa is not None:
-                r["bushfire_risk"] = "high" if bpa else (r.get("bushfire_risk") or "none")
+            apply_zone_bpa(r, z, bpa)
 
         out.append(r)
 
-    out_df = pd.DataFrame(out)
+    out_df = pd.DataFrame(out, columns=df.columns)
+    out_df.to_csv(out_path + ".tmp", index=False)
+    os.replace(out_path + ".tmp", out_path)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Enrich listings with flood/zoning/bushfire overlays.")
+    ap.add_argument("--concurrency", type=int, default=4, help="max in-flight requests per host")
+    ap.add_argument("--rate", type=float, default=8.0, help="max requests per second per host (0 = unlimited)")
+    ap.add_argument("--retries", type=int, default=3, help="retries on timeouts, 429 and 5xx")
+    ap.add_argument("--chunk-size", type=int, default=500, help="rows per ordered output chunk")
+    ap.add_argument("--timeout", type=float, default=15.0, help="per-request timeout in seconds")
+    ap.add_argument("--no-resume", action="store_true", help="ignore a checkpoint from an interrupted run")
+    ap.add_argument("--max-age-days", type=float, default=30.0,
+                    help="reuse ledger results for unmoved rows enriched within this many days (0 = re-enrich all)")
+    ap.add_argument("--sequential", action="store_true", help="old one-row-at-a-time blocking path")
+    ap.add_argument("--no-snapshot", action="store_true", help="skip writing the binary dataset snapshot")
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    in_path, base_dir = _find_input_csv()
     out_path = os.path.join(base_dir, "enriched_listings.csv")
-    out_df.to_csv(out_path, index=False)
+    print(f"Loading: {in_path}")
+    if args.sequential:
+        enrich_sequential(in_path, out_path)
+    else:
+        stats = enrich_csv(in_path, out_path, concurrency=args.concurrency, rate=args.rate,
+                           retries=args.retries, chunk_size=args.chunk_size, timeout=args.timeout,
+                           resume=not args.no_resume, max_age_days=args.max_age_days)
+        print(f"Rows: {stats['rows']}  resumed after: {stats['resumed']}  unchanged (skipped): {stats['skipped']}  "
+              f"incomplete: {stats['incomplete']}")
+        print(f"Requests: {stats['requests']}  retries: {stats['retries']}  failures: {stats['failures']}")
+    cache = get_cache()
+    if cache is not None:
+        c = cache.stats
+        print(f"Geo cache: {c['hits']} hits ({c['negative_hits']} negative), {c['misses']} misses, "
+              f"hit rate {cache.hit_rate():.0%}, {c['evictions']} evicted")
     print(f"Saved enriched CSV -> {out_path}")
+    if not args.no_snapshot:
+        snap = write_snapshot(ListingStore.from_csv(out_path), snapshot_path(out_path), source_stamp(out_path))
+        print(f"Saved dataset snapshot -> {snap}")
 
 if __name__ == "__main__":
     main()
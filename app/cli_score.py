@@ -0,0 +1,201 @@
+import argparse, json, os, time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .cli_enrich import _find_input_csv
+from .services.analytics import (
+    COMPONENTS, DEFAULT_WEIGHTS, METRIC_COLUMNS,
+    compute_components, fill_crime_bands, parse_weights, prepare_inputs, weights_vector,
+)
+from .services.store import read_listings_csv
+
+# Offline rescoring of the whole dataset under one or more weight profiles:
+#
+#   python -m app.cli_score --profile yield:net_yield=0.4,cash_on_cash=0.2 \
+#                           --profile growth:cagr5=0.4 --workers 32
+#
+# The parent parses the CSV once into the scorer's typed input columns and
+# puts them in a shared memory block; workers score row ranges straight out
+# of it and write metrics, components and one score per profile into a
+# second shared block at the same positions, so nothing row-sized is pickled
+# and the output is in input order by construction.
+
+DEFAULT_CHUNK_ROWS = 50_000
+
+Layout = List[Tuple[str, str, Tuple[int, ...], int]]  # (name, dtype, shape, byte offset)
+
+class SharedColumns:
+    """Named arrays packed into one shared memory block."""
+
+    def __init__(self, shm: shared_memory.SharedMemory, layout: Layout, owner: bool):
+        self.shm, self.layout, self.owner = shm, layout, owner
+        self.arrays = {name: np.ndarray(shape, dtype=np.dtype(dt), buffer=shm.buf, offset=off)
+                       for name, dt, shape, off in layout}
+
+    @classmethod
+    def allocate(cls, specs: Dict[str, Tuple[Any, Tuple[int, ...]]]) -> "SharedColumns":
+        layout: Layout = []
+        size = 0
+        for name, (dt, shape) in specs.items():
+            dt = np.dtype(dt)
+            size = -(-size // 64) * 64  # 64-byte aligned columns
+            layout.append((name, dt.str, tuple(shape), size))
+            size += dt.itemsize * int(np.prod(shape))
+        return cls(shared_memory.SharedMemory(create=True, size=max(size, 1)), layout, owner=True)
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "SharedColumns":
+        out = cls.allocate({k: (v.dtype, v.shape) for k, v in arrays.items()})
+        for k, v in arrays.items():
+            out.arrays[k][...] = v
+        return out
+
+    @classmethod
+    def attach(cls, name: str, layout: Layout) -> "SharedColumns":
+        return cls(shared_memory.SharedMemory(name=name), layout, owner=False)
+
+    def close(self) -> None:
+        self.arrays = {}
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+# --- worker side ---------------------------------------------------------------------
+
+_IN: Optional[SharedColumns] = None
+_OUT: Optional[SharedColumns] = None
+_W: Optional[np.ndarray] = None
+
+def _attach(in_name: str, in_layout: Layout, out_name: str, out_layout: Layout, w: np.ndarray) -> None:
+    global _IN, _OUT, _W
+    _IN, _OUT, _W = SharedColumns.attach(in_name, in_layout), SharedColumns.attach(out_name, out_layout), w
+
+def _score_range(start: int, stop: int) -> int:
+    score_into(_IN.arrays, _OUT.arrays, _W, start, stop)
+    return stop - start
+
+def score_into(inputs: Dict[str, np.ndarray], out: Dict[str, np.ndarray], w: np.ndarray, start: int, stop: int) -> None:
+    metrics, components = compute_components({k: v[start:stop] for k, v in inputs.items()})
+    for name in METRIC_COLUMNS:
+        out[name][start:stop] = metrics[name]
+    out["components"][start:stop] = components
+    for p in range(w.shape[0]):
+        score = np.zeros(stop - start)
+        for j in range(len(COMPONENTS)):
+            score = score + w[p, j] * components[:, j]  # same summation order as compute_analytics_frame
+        out["scores"][start:stop, p] = score
+
+# --- parent side ---------------------------------------------------------------------
+
+def score_columns(inputs: Dict[str, np.ndarray], profiles: Dict[str, Dict[str, float]], workers: int = 1,
+                  chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Dict[str, np.ndarray]:
+    """Metrics, the (n, components) matrix and an (n, profiles) score matrix for prepared inputs."""
+    n = len(inputs["price"])
+    w = np.vstack([weights_vector(p) for p in profiles.values()])
+    specs = {name: (np.float64, (n,)) for name in METRIC_COLUMNS}
+    specs["components"] = (np.float64, (n, len(COMPONENTS)))
+    specs["scores"] = (np.float64, (n, len(profiles)))
+    ranges = [(s, min(s + chunk_rows, n)) for s in range(0, n, chunk_rows)]
+
+    if workers <= 1 or len(ranges) <= 1:
+        out = {name: np.empty(shape, dtype=dt) for name, (dt, shape) in specs.items()}
+        for start, stop in ranges:
+            score_into(inputs, out, w, start, stop)
+        return out
+
+    shared_in = SharedColumns.from_arrays(inputs)
+    shared_out = SharedColumns.allocate(specs)
+    try:
+        with ProcessPoolExecutor(max_workers=min(workers, len(ranges)), initializer=_attach,
+                                 initargs=(shared_in.shm.name, shared_in.layout,
+                                           shared_out.shm.name, shared_out.layout, w)) as pool:
+            done = sum(pool.map(_score_range, *zip(*ranges)))
+        if done != n:
+            raise RuntimeError(f"workers scored {done} of {n} rows")
+        return {k: v.copy() for k, v in shared_out.arrays.items()}
+    finally:
+        shared_in.close()
+        shared_out.close()
+
+def _profile_arg(s: str) -> Tuple[str, Dict[str, float]]:
+    """``name:comp=w,comp=w`` or ``name:weights.json`` (unlisted components keep their default)."""
+    name, sep, spec = s.partition(":")
+    if not sep or not name:
+        raise argparse.ArgumentTypeError(f"expected NAME:SPEC, got {s!r}")
+    if name == "default":
+        raise argparse.ArgumentTypeError("profile name 'default' is reserved for DEFAULT_WEIGHTS")
+    try:
+        if spec.endswith(".json"):
+            with open(spec) as f:
+                spec = ",".join(f"{k}={v}" for k, v in json.load(f).items())
+        return name, parse_weights(spec)
+    except (OSError, ValueError) as e:
+        raise argparse.ArgumentTypeError(f"profile {name}: {e}")
+
+def _ranks(score: np.ndarray) -> np.ndarray:
+    r = np.empty(len(score))
+    r[np.argsort(-score, kind="stable")] = np.arange(1, len(score) + 1)
+    return r
+
+def compare_profiles(ids: Sequence[str], scores: np.ndarray, names: List[str], top: int) -> pd.DataFrame:
+    """Per profile: score spread, and agreement with the first profile (rank correlation, top-N overlap)."""
+    ranks = [_ranks(scores[:, p]) for p in range(len(names))]
+    base_top = set(np.asarray(ids)[ranks[0] <= top])
+    out = []
+    for p, name in enumerate(names):
+        s = scores[:, p]
+        out.append({
+            "profile": name,
+            "mean": float(s.mean()) if len(s) else float("nan"),
+            "p90": float(np.percentile(s, 90)) if len(s) else float("nan"),
+            f"rank_corr_vs_{names[0]}": float(np.corrcoef(ranks[0], ranks[p])[0, 1]) if len(s) > 1 else float("nan"),
+            f"top{top}_overlap": len(base_top & set(np.asarray(ids)[ranks[p] <= top])) / max(1, min(top, len(s))),
+        })
+    return pd.DataFrame(out)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Rescore the listings dataset under one or more weight profiles.")
+    ap.add_argument("--input", help="listings CSV (default: enriched_listings.csv, else sample_listings.csv)")
+    ap.add_argument("--out", help="output CSV (default: scores.csv next to the input)")
+    ap.add_argument("--profile", action="append", type=_profile_arg, default=[],
+                    help="NAME:comp=w,... or NAME:weights.json; repeatable. 'default' (DEFAULT_WEIGHTS) is always first")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="scoring processes")
+    ap.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="rows per worker task")
+    ap.add_argument("--components", action="store_true", help="also write the normalized component columns")
+    ap.add_argument("--top", type=int, default=100, help="top-N used for the profile overlap summary")
+    args = ap.parse_args(argv)
+
+    in_path = args.input or _find_input_csv()[0]
+    out_path = args.out or os.path.join(os.path.dirname(in_path), "scores.csv")
+    profiles = {"default": dict(DEFAULT_WEIGHTS), **dict(args.profile)}
+
+    t0 = time.perf_counter()
+    frame = read_listings_csv(in_path)
+    fill_crime_bands(frame)
+    inputs = prepare_inputs(frame)
+    t1 = time.perf_counter()
+    res = score_columns(inputs, profiles, workers=args.workers, chunk_rows=args.chunk_rows)
+    t2 = time.perf_counter()
+    print(f"Loaded {len(frame)} rows from {in_path} in {t1 - t0:.2f}s; "
+          f"scored {len(profiles)} profile(s) with {args.workers} worker(s) in {t2 - t1:.2f}s")
+
+    ids = frame["id"].astype(str).to_numpy() if "id" in frame else np.arange(len(frame)).astype(str)
+    out = pd.DataFrame({"id": ids})
+    for name in METRIC_COLUMNS:
+        out[name] = res[name]
+    if args.components:
+        for j, name in enumerate(COMPONENTS):
+            out[f"component_{name}"] = res["components"][:, j]
+    for p, name in enumerate(profiles):
+        out[f"deal_score_{name}"] = res["scores"][:, p]
+        out[f"rank_{name}"] = _ranks(res["scores"][:, p]).astype(int)
+    out.to_csv(out_path, index=False)
+    print(f"Saved scores -> {out_path}")
+    print(compare_profiles(ids, res["scores"], list(profiles), args.top).to_string(index=False, float_format="%.4f"))
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,74 @@
-from fastapi.encoders import jsonable_encoder
-from fastapi.responses import JSONResponse
-from .services.connectors.nestoria import (
-    search_listings as nestoria_search,
-    normalize as nestoria_normalize,
-)
-from fastapi.encoders import jsonable_encoder
-from fastapi.responses import JSONResponse
-from .services.connectors.nestoria import (
-    search_listings as nestoria_search,
-    normalize as nestoria_normalize,
-)
 from __future__ import annotations
+import os
 from typing import List, Dict, Any, Optional
 
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.encoders import jsonable_encoder
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+from starlette.concurrency import run_in_threadpool
 
-from .services.dataset import DATASET, get_property_by_id
+from .services.connectors.nestoria import (
+    search_listings_async as nestoria_search,
+    normalize as nestoria_normalize,
+    stats as nestoria_stats,
+)
+from .services.connectors.http_pool import aclose_async_client, close_client
+from .services.cursor import CursorError, decode_cursor, encode_cursor, is_start, start_cursor
+from .services.dataset import (
+    current_snapshot,
+    dataset_info,
+    get_property_by_id,
+    get_properties_by_ids,
+    request_reload,
+    start_watcher,
+    stop_watcher,
+)
+from .services.indexes import haversine_km
+from .services.instrument import (
+    InstrumentMiddleware,
+    count_rows,
+    gauges,
+    mark,
+    profiling,
+    render_metrics,
+    stage,
+)
+from .services.serialize import (
+    RowsResponse,
+    csv_columns,
+    csv_header,
+    csv_lines,
+    gzip_chunks,
+    ndjson_lines,
+    parse_fields,
+)
+from .services.response_cache import CACHE_TTL, CachedResponse, ResponseCache, cache_key, etag_matches
 from .services.analytics import (
+    COMPONENTS,
     compute_analytics_for_all,
     filters_apply,
+    parse_weights,
+    reweight_row,
     sort_properties,
 )
 
 app = FastAPI(title="DealRadar AU API", version="0.2.0")
 
+# Unset = open admin endpoints (local dev); set it in any shared deployment.
+ADMIN_TOKEN = os.environ.get("DEALRADAR_ADMIN_TOKEN")
+# ?profile=1 always needs the token; without one it is off unless explicitly opened (local dev).
+PROFILE_OPEN = os.environ.get("DEALRADAR_PROFILE_OPEN", "0") == "1"
+
+# Server-Timing on every response, /metrics, and ?profile=1 for admins. Added before
+# CORS: the last middleware added is outermost, so CORS headers reach its 403s too.
+def _profile_allowed(headers: Dict[str, str]) -> bool:
+    if ADMIN_TOKEN:
+        return headers.get("x-admin-token") == ADMIN_TOKEN
+    return PROFILE_OPEN
+
+app.add_middleware(InstrumentMiddleware, profile_allowed=_profile_allowed)
+
 # Allow local dev & WP/Next front-ends
 app.add_middleware(
     CORSMiddleware,
@@ -34,11 +76,28 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "X-Cache", "X-Live-Listings", "Server-Timing"],
 )
 
+def _admin_denied(token: Optional[str]) -> Optional[JSONResponse]:
+    if ADMIN_TOKEN and token != ADMIN_TOKEN:
+        return JSONResponse(status_code=403, content={"error": "admin token required"})
+    return None
+
+@app.on_event("startup")
+def watch_dataset():
+    start_watcher()
+
+@app.on_event("shutdown")
+async def close_http_pools():
+    stop_watcher()
+    close_client()
+    await aclose_async_client()
+
 @app.get("/")
 def root():
-    return {"status": "ok", "endpoints": ["/health", "/properties", "/property/{id}", "/docs"]}
+    return {"status": "ok", "endpoints": ["/health", "/properties", "/properties/near", "/properties/batch",
+                                          "/properties/export", "/property/{id}", "/metrics", "/docs"]}
 
 @app.head("/health")
 def head_health():
@@ -48,158 +107,393 @@ def head_health():
 def health():
     return {"status": "ok"}
 
-def list_properties(
+RESPONSE_CACHE = ResponseCache()
+CACHE_CONTROL = f"public, max-age={int(CACHE_TTL)}"
+
+gauges(lambda: {**RESPONSE_CACHE.stats, "entries": len(RESPONSE_CACHE)}, "dealradar_response_cache",
+       "Response cache counters.")
+gauges(lambda: {**nestoria_stats(), "breaker_open": int(nestoria_stats()["breaker"] == "open")},
+       "dealradar_nestoria", "Nestoria connector counters.")
+
+@app.get("/metrics")
+def metrics():
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+def _cached_response(entry: CachedResponse, if_none_match: Optional[str], state: str) -> Response:
+    headers = {**entry.headers, "ETag": entry.etag, "Cache-Control": CACHE_CONTROL, "X-Cache": state}
+    if etag_matches(if_none_match, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+# Nestoria answers that mean live rows are missing; such pages aren't cached.
+DEGRADED_LIVE = {"timeout", "error", "circuit_open"}
+
+WEIGHTS_HELP = ("deal_score weights, e.g. net_yield=0.4,cagr5=0.1; unlisted components keep their default. "
+                "Components: " + ", ".join(COMPONENTS))
+
+def _weights_or_error(weights: Optional[str]):
+    """(weights dict or None, error response or None)."""
+    if not weights:
+        return None, None
+    try:
+        return parse_weights(weights), None
+    except ValueError as e:
+        return None, JSONResponse(status_code=400, content={"code": "bad_weights", "message": str(e)})
+
 @app.get("/properties")
-def list_properties(
-    limit: int = Query(12, ge=1, le=100),
+async def list_properties(
+    limit: int = Query(12, ge=1, le=500),
     sort_by: str = Query("deal_score"),
     sort_dir: str = Query("desc"),
     # analytics filters (may be None for Nestoria-only)
-    min_gross_yield: float | None = None,
-    min_net_yield: float | None = None,
-    min_cagr5: float | None = None,
-    max_vacancy: float | None = None,
+    min_gross_yield: Optional[float] = None,
+    min_net_yield: Optional[float] = None,
+    min_cagr5: Optional[float] = None,
+    max_vacancy: Optional[float] = None,
     exclude_flood_high: bool = True,
     exclude_bushfire_high: bool = True,
     # location/price filters
-    suburb: str | None = None,
-    state: str | None = None,
-    min_price: int | None = None,
-    max_price: int | None = None,
+    suburb: Optional[str] = None,
+    state: Optional[str] = None,
+    min_price: Optional[int] = None,
+    max_price: Optional[int] = None,
+    use_nestoria: bool = True,
+    # opaque token from a previous page's X-Next-Cursor header
+    cursor: Optional[str] = None,
+    # comma-separated subset of row fields to return, e.g. "id,address,deal_score"
+    fields: Optional[str] = None,
+    weights: Optional[str] = Query(None, description=WEIGHTS_HELP),
+    if_none_match: Optional[str] = Header(None),
 ):
-    # --- NESTORIA-ONLY ---
-    rows = []
-    place = suburb if suburb else None
-    if state and place:
-        place = f"{place}, {state}"
-    try:
-        listings, _meta = nestoria_search(
-            place=place,
-            min_price=min_price,
-            max_price=max_price,
-            listing_type="buy",
-            page=1,
-            per_page=50,
-        )
-        rows = [nestoria_normalize(li) for li in listings]
-    except Exception as e:
-        print("Nestoria error:", e)
-        rows = []
+    # Dataset rows are scored once at load time and kept columnar (see
+    # dataset.py / store.py); only the rows we return get turned into dicts.
+    store, version = current_snapshot()
+    custom, bad = _weights_or_error(weights)
+    if bad:
+        return bad
 
-    # keep scoring/sorting so frontends relying on deal_score still work
-    rows = compute_analytics_for_all(rows)
-    rows = filters_apply(
-        rows,
+    filters = dict(
         min_gross_yield=min_gross_yield,
         min_net_yield=min_net_yield,
         min_cagr5=min_cagr5,
         max_vacancy=max_vacancy,
         exclude_flood_high=exclude_flood_high,
         exclude_bushfire_high=exclude_bushfire_high,
+        suburb=suburb,
+        state=state,
+        min_price=min_price,
+        max_price=max_price,
     )
-    rows = sort_properties(rows, sort_by=sort_by, sort_dir=sort_dir)
-    return JSONResponse(content=jsonable_encoder(rows[:limit]))
-    limit: int = Query(12, ge=1, le=100),
+    return await _serve_page(store, version, filters, limit, sort_by, sort_dir, use_nestoria, cursor, fields,
+                             custom, if_none_match)
+
+async def _serve_page(store, version, filters: Dict[str, Any], limit: int, sort_by: str, sort_dir: str,
+                      use_nestoria: bool, cursor: Optional[str], fields: Optional[str],
+                      custom: Optional[Dict[str, float]], if_none_match: Optional[str]) -> Response:
+    """Cached /properties page: response cache, then live listings, then the dataset page off the loop."""
+    key = cache_key(version, dict(filters, limit=limit, sort_by=sort_by, sort_dir=sort_dir,
+                                  use_nestoria=use_nestoria, cursor=cursor, fields=fields,
+                                  weights=custom and tuple(custom.values())))
+    # a profiled request always does the work
+    entry = None if profiling() else RESPONSE_CACHE.get(key)
+    if entry is not None:
+        mark("cache", "hit")
+        return _cached_response(entry, if_none_match, "HIT")
+    mark("cache", "miss")
+
+    # Live rows can't be paged stably, so they are only merged into the first page.
+    # The connector never raises and never waits longer than its time budget.
+    listings: List[Dict[str, Any]] = []
+    live_status = None
+    if use_nestoria and not cursor:
+        place = filters["suburb"] or None
+        if filters["state"] and place:
+            place = f"{place}, {filters['state']}"
+        with stage("nestoria"):
+            listings, meta = await nestoria_search(
+                place=place,
+                min_price=filters["min_price"],
+                max_price=filters["max_price"],
+                listing_type="buy",
+                per_page=50,
+            )
+        live_status = meta["status"]
+        mark("nestoria", live_status)
+        count_rows("nestoria", len(listings))
+
+    resp = await run_in_threadpool(_properties_page, store, filters, limit, sort_by, sort_dir,
+                                   listings, cursor, parse_fields(fields), custom)
+    if resp.status_code != 200:
+        return resp
+    next_cursor = resp.headers.get("x-next-cursor")
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    if live_status:
+        headers["X-Live-Listings"] = live_status
+    if live_status in DEGRADED_LIVE:
+        return _cached_response(CachedResponse(resp.body, headers, 0.0), if_none_match, "BYPASS")
+    entry = RESPONSE_CACHE.put(key, resp.body, headers)
+    return _cached_response(entry, if_none_match, "MISS")
+
+def _properties_page(store, filters: Dict[str, Any], limit: int, sort_by: str, sort_dir: str,
+                     listings: List[Dict[str, Any]], cursor: Optional[str], fields: Optional[List[str]],
+                     weights: Optional[Dict[str, float]] = None) -> JSONResponse:
+    if weights:
+        with stage("reweight"):
+            # shares the dataset's columns and indexes; deal_score is one matrix-vector product
+            store = store.reweighted(weights)
+    after = None
+    if cursor:
+        try:
+            anchor = decode_cursor(cursor, sort_by, sort_dir)
+            if not is_start(anchor):
+                after = store.seek(sort_by, anchor["v"], anchor["id"])
+        except (CursorError, TypeError, ValueError) as e:
+            return JSONResponse(status_code=400, content={"code": "bad_cursor", "message": str(e)})
+
+    # Live Nestoria listings were fetched by the caller; score them here, off the event loop.
+    live = []
+    if listings:
+        with stage("analytics"):
+            live = compute_analytics_for_all([
+                nestoria_normalize(li, suburb=filters["suburb"], state=filters["state"]) for li in listings
+            ])
+            if weights:
+                live = [reweight_row(r, weights) for r in live]
+
+    try:
+        with stage("filter"):
+            matched = store.filter(**filters)
+        count_rows("filter", len(matched))
+        with stage("sort"):
+            idx = store.top(matched, sort_by=sort_by, sort_dir=sort_dir, k=limit, after=after)
+        near = filters.get("near")
+        with_distance = near is not None and (fields is None or "distance_km" in fields)
+        with stage("rows"):
+            # the merge and the cursor still need sort_by and id, whatever was asked for
+            extra = [sort_by, "id"] + (["lat", "lng"] if with_distance else [])
+            rows = store.rows(idx, fields=fields and fields + extra)
+            if with_distance:
+                dist = haversine_km(near[0], near[1], store.numeric("lat")[idx], store.numeric("lng")[idx])
+                for r, d in zip(rows, dist.tolist()):
+                    r["distance_km"] = d
+        page_rows = rows
+        if live:
+            with stage("merge"):
+                # the dataset side is already cut to `limit`; merge in the live rows
+                rows = sort_properties(rows + filters_apply(live, **filters), sort_by=sort_by, sort_dir=sort_dir,
+                                       limit=limit)
+                shown = {id(r) for r in rows}
+                page_rows = [r for r in page_rows if id(r) in shown]
+        headers = {}
+        if len(idx) == limit:
+            # resume after the last dataset row shown; live rows don't move the cursor
+            last = page_rows[-1] if page_rows else None
+            headers["X-Next-Cursor"] = (
+                encode_cursor(sort_by, sort_dir, last.get(sort_by), last.get("id")) if last
+                else start_cursor(sort_by, sort_dir)
+            )
+        count_rows("returned", len(rows))
+        with stage("serialize"):
+            return RowsResponse(rows, fields=fields, headers=headers)
+    except Exception as e:
+        # Return error details to the client to avoid blind guessing
+        return JSONResponse(
+            status_code=500,
+            content={
+                "code": "properties_failed",
+                "message": "Failed to compute/serialize properties.",
+                "detail": str(e),
+            },
+        )
+
+MAX_RADIUS_KM = 500
+
+def _parse_bbox(bbox: str):
+    """``"min_lng,min_lat,max_lng,max_lat"`` (GeoJSON order) -> (min_lat, min_lng, max_lat, max_lng)."""
+    try:
+        w, s_, e, n = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise ValueError("bbox must be min_lng,min_lat,max_lng,max_lat")
+    if not (-90 <= s_ <= n <= 90 and -180 <= w <= e <= 180):
+        raise ValueError("bbox must be min_lng,min_lat,max_lng,max_lat with min <= max, within lat/lng bounds")
+    return s_, w, n, e
+
+def _bad_geo(message: str) -> JSONResponse:
+    return JSONResponse(status_code=400, content={"code": "bad_geo", "message": message})
+
+@app.get("/properties/near")
+async def properties_near(
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lng: Optional[float] = Query(None, ge=-180, le=180),
+    radius_km: Optional[float] = Query(None, gt=0, le=MAX_RADIUS_KM),
+    # map viewport instead of a circle: min_lng,min_lat,max_lng,max_lat
+    bbox: Optional[str] = None,
+    limit: int = Query(12, ge=1, le=500),
     sort_by: str = Query("deal_score"),
     sort_dir: str = Query("desc"),
-    min_gross_yield: float | None = None,
-    min_net_yield: float | None = None,
-    min_cagr5: float | None = None,
-    max_vacancy: float | None = None,
+    min_gross_yield: Optional[float] = None,
+    min_net_yield: Optional[float] = None,
+    min_cagr5: Optional[float] = None,
+    max_vacancy: Optional[float] = None,
     exclude_flood_high: bool = True,
     exclude_bushfire_high: bool = True,
-    suburb: str | None = None,
-    state: str | None = None,
-    min_price: int | None = None,
-    max_price: int | None = None,
-    use_nestoria: bool = True,
+    suburb: Optional[str] = None,
+    state: Optional[str] = None,
+    min_price: Optional[int] = None,
+    max_price: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    weights: Optional[str] = Query(None, description=WEIGHTS_HELP),
+    if_none_match: Optional[str] = Header(None),
 ):
-    base = DATASET if isinstance(DATASET, list) else DATASET.to_dict(orient="records")
-    rows = list(base)
-
-    # optionally fetch Nestoria AU listings
-    if use_nestoria:
-        place = suburb if suburb else None
-        if state and place:
-            place = f"{place}, {state}"
+    """/properties restricted to a radius around lat/lng, or to a bounding box.
+
+    Backed by the store's lat/lng grid index, so a query only looks at the
+    listings in the grid cells it covers; the other filters, sort and cursor
+    paging work as on /properties. Radius results carry ``distance_km``.
+    Live Nestoria listings are not included.
+    """
+    circle = (lat, lng, radius_km)
+    if bbox is not None and any(v is not None for v in circle):
+        return _bad_geo("give lat/lng/radius_km or bbox, not both")
+    if bbox is None and any(v is None for v in circle):
+        return _bad_geo("lat, lng and radius_km (or bbox) are required")
+    box = None
+    if bbox is not None:
         try:
-            listings, _meta = nestoria_search(
-                place=place,
-                min_price=min_price,
-                max_price=max_price,
-                listing_type="buy",
-                page=1,
-                per_page=50,
-            )
-            rows += [nestoria_normalize(li) for li in listings]
-        except Exception as e:
-            print("Nestoria error:", e)
-
-    # analytics + filters + sort
-    rows = compute_analytics_for_all(rows)
-    rows = filters_apply(
-        rows,
+            box = _parse_bbox(bbox)
+        except ValueError as e:
+            return _bad_geo(str(e))
+    store, version = current_snapshot()
+    custom, bad = _weights_or_error(weights)
+    if bad:
+        return bad
+    filters = dict(
         min_gross_yield=min_gross_yield,
         min_net_yield=min_net_yield,
         min_cagr5=min_cagr5,
         max_vacancy=max_vacancy,
         exclude_flood_high=exclude_flood_high,
         exclude_bushfire_high=exclude_bushfire_high,
+        suburb=suburb,
+        state=state,
+        min_price=min_price,
+        max_price=max_price,
+        bbox=box,
+        near=None if box else circle,
     )
-    rows = sort_properties(rows, sort_by=sort_by, sort_dir=sort_dir)
-    return JSONResponse(content=jsonable_encoder(rows[:limit]))
-def list_properties(
-    limit: int = Query(50, ge=1, le=500),
+    return await _serve_page(store, version, filters, limit, sort_by, sort_dir, False, cursor, fields,
+                             custom, if_none_match)
+
+EXPORT_CHUNK_ROWS = 1000
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+@app.get("/properties/export")
+def export_properties(
+    fmt: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    sort_by: str = Query("deal_score"),
+    sort_dir: str = Query("desc"),
     min_gross_yield: Optional[float] = None,
     min_net_yield: Optional[float] = None,
     min_cagr5: Optional[float] = None,
     max_vacancy: Optional[float] = None,
     exclude_flood_high: bool = True,
     exclude_bushfire_high: bool = True,
-    sort_by: str = "deal_score",
-    sort_dir: str = "desc",
-    debug: bool = False,
+    suburb: Optional[str] = None,
+    state: Optional[str] = None,
+    min_price: Optional[int] = None,
+    max_price: Optional[int] = None,
+    fields: Optional[str] = None,
+    weights: Optional[str] = Query(None, description=WEIGHTS_HELP),
+    # None: gzip when the client sends Accept-Encoding: gzip
+    gzip: Optional[bool] = None,
+    accept_encoding: Optional[str] = Header(None),
 ):
-    # DATASET is a list of dicts (from dataset.py); keep fallback if someone reverts it
-    rows: List[Dict[str, Any]] = DATASET if isinstance(DATASET, list) else DATASET.to_dict(orient="records")
-
-    # Quick debug: show dataset size and first record without running analytics
-    if debug:
-        summary = {
-            "dataset_len": len(rows),
-            "first_row_keys": list(rows[0].keys()) if rows else [],
-            "first_row_sample": rows[0] if rows else None,
-        }
-        return JSONResponse(content=jsonable_encoder(summary))
+    """Every dataset row matching the /properties filters, streamed in sort order.
 
-    try:
-        rows = compute_analytics_for_all(rows)
-        rows = filters_apply(
-            rows,
+    Only row positions are held up front; rows are built and serialized
+    EXPORT_CHUNK_ROWS at a time as the client reads. Live Nestoria listings
+    are not included.
+    """
+    store, version = current_snapshot()
+    custom, bad = _weights_or_error(weights)
+    if bad:
+        return bad
+    if custom:
+        with stage("reweight"):
+            store = store.reweighted(custom)
+    with stage("filter"):
+        matched = store.filter(
             min_gross_yield=min_gross_yield,
             min_net_yield=min_net_yield,
             min_cagr5=min_cagr5,
             max_vacancy=max_vacancy,
             exclude_flood_high=exclude_flood_high,
             exclude_bushfire_high=exclude_bushfire_high,
+            suburb=suburb,
+            state=state,
+            min_price=min_price,
+            max_price=max_price,
         )
-        rows = sort_properties(rows, sort_by=sort_by, sort_dir=sort_dir)
-        return JSONResponse(content=jsonable_encoder(rows[:limit]))
-    except Exception as e:
-        # Return error details to the client to avoid blind guessing
-        return JSONResponse(
-            status_code=500,
-            content={
-                "code": "properties_failed",
-                "message": "Failed to compute/serialize properties.",
-                "detail": str(e),
-            },
-        )
+    with stage("sort"):
+        idx = store.sort(matched, sort_by=sort_by, sort_dir=sort_dir)
+    count_rows("export", len(idx))
+    fields_list = parse_fields(fields)
+    columns = csv_columns(store.names, fields_list)
+
+    def chunks():
+        if fmt == "csv":
+            yield csv_header(columns)
+        for start in range(0, len(idx), EXPORT_CHUNK_ROWS):
+            rows = store.rows(idx[start:start + EXPORT_CHUNK_ROWS], fields=fields_list)
+            yield csv_lines(rows, columns) if fmt == "csv" else ndjson_lines(rows, fields_list)
+
+    body = chunks()
+    headers = {
+        "Content-Disposition": f'attachment; filename="properties.{fmt}"',
+        "X-Dataset-Version": str(version),
+        "X-Total-Count": str(len(idx)),
+        "Vary": "Accept-Encoding",
+    }
+    if gzip if gzip is not None else "gzip" in (accept_encoding or "").lower():
+        body = gzip_chunks(body)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type=EXPORT_MEDIA_TYPES[fmt], headers=headers)
+
+MAX_BATCH_IDS = 200
+
+@app.get("/properties/batch")
+def properties_batch(ids: List[str] = Query(..., description="Comma-separated and/or repeated ids"),
+                     fields: Optional[str] = None):
+    wanted = [p.strip() for chunk in ids for p in chunk.split(",") if p.strip()]
+    if len(wanted) > MAX_BATCH_IDS:
+        return JSONResponse(status_code=400, content={"error": f"at most {MAX_BATCH_IDS} ids per request"})
+    fields_list = parse_fields(fields)
+    with stage("rows"):
+        rows = get_properties_by_ids(wanted, fields=fields_list)
+    count_rows("returned", len(rows))
+    with stage("serialize"):
+        return RowsResponse(rows, fields=fields_list)
+
+@app.get("/admin/dataset")
+def admin_dataset(x_admin_token: Optional[str] = Header(None)):
+    denied = _admin_denied(x_admin_token)
+    if denied:
+        return denied
+    return dataset_info()
+
+@app.post("/admin/dataset/reload")
+def admin_dataset_reload(x_admin_token: Optional[str] = Header(None)):
+    denied = _admin_denied(x_admin_token)
+    if denied:
+        return denied
+    if not request_reload():
+        return JSONResponse(status_code=409, content={"error": "dataset watcher is not running"})
+    return JSONResponse(status_code=202, content={"status": "reload scheduled", **dataset_info()})
 
 @app.get("/property/{pid}")
-def property_by_id(pid: str):
+def property_by_id(pid: str, fields: Optional[str] = None):
     row = get_property_by_id(pid)
     if not row:
         return JSONResponse(status_code=404, content={"error": "not found"})
-    row = compute_analytics_for_all([row])[0]
-    return JSONResponse(content=jsonable_encoder(row))
+    return RowsResponse(row, fields=parse_fields(fields))
@@ -1,4 +1,10 @@
-from typing import Dict, Any, List
+import heapq
+from typing import Dict, Any, List, Mapping, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .connectors.crime_csv import crime_bands_for, load_crime_band
 
 DEFAULT_WEIGHTS = {
     "net_yield": 0.25,
@@ -13,9 +19,10 @@ DEFAULT_WEIGHTS = {
 
 def _safe_float(v, default=None):
     try:
-        return float(v)
+        f = float(v)
     except Exception:
         return default
+    return default if f != f else f  # pandas hands us NaN for empty cells
 
 def _normalize_0_1(value, min_val, max_val):
     if value is None or max_val == min_val:
@@ -71,13 +78,22 @@ def _net_yield(row: Dict[str, Any]) -> float|None:
     gy = _gross_yield(row)
     return gy * 0.75 if gy is not None else None  # 25% expense assumption
 
+def _blank(v) -> bool:
+    return v is None or v == "" or (isinstance(v, float) and v != v)
+
 def compute_analytics_for_one(row: Dict[str, Any]) -> Dict[str, Any]:
     out = dict(row)
     gy = _gross_yield(row)
     ny = _net_yield(row)
     cagr5 = _safe_float(row.get("cagr5"), None)
     vac = _safe_float(row.get("vacancy"), None)
-    risk = _risk_to_score(row.get("flood_risk"), row.get("bushfire_risk"), row.get("crime_band"))
+    crime = row.get("crime_band")
+    if _blank(crime):
+        # indexed lookup, cheap enough per row; avoids the "medium" fallback
+        crime = load_crime_band(row.get("suburb"), row.get("state"))
+        if crime:
+            out["crime_band"] = crime
+    risk = _risk_to_score(row.get("flood_risk"), row.get("bushfire_risk"), crime)
     vall = _value_add_score(row)
     coc = _cash_on_cash(row)
     aff = _affordability(row)
@@ -120,13 +136,214 @@ def compute_analytics_for_one(row: Dict[str, Any]) -> Dict[str, Any]:
 def compute_analytics_for_all(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     return [compute_analytics_for_one(r) for r in rows]
 
+# ---------------------------------------------------------------------------
+# Vectorized scoring: same maths as compute_analytics_for_one, one pass over
+# whole columns. Missing/unparseable numbers are NaN here and None per-row.
+# ---------------------------------------------------------------------------
+
+COMPONENTS: List[str] = list(DEFAULT_WEIGHTS)
+SCORING_VERSION = 1  # bump when the metric/component maths changes; stored scores are rebuilt
+METRIC_COLUMNS = ["gross_yield", "net_yield", "cagr5", "vacancy", "risk_score",
+                  "value_add_score", "cash_on_cash", "affordability"]
+BREAKDOWN_PREFIX = "contrib_"
+
+_NUMERIC_INPUTS = {
+    "price": "list_price", "rent": "weekly_rent", "cagr5": "cagr5", "vacancy": "vacancy",
+    "land": "land_m2", "frontage": "frontage_m", "beds": "beds", "amenities": "amenities_score",
+}
+_HAZARD_LEVELS = {"none": 0, "low": 0.25, "medium": 0.5, "high": 1.0}
+_CRIME_LEVELS = {"low": 0.1, "medium": 0.5, "high": 1.0}
+
+Columns = Union[pd.DataFrame, Mapping[str, Any]]
+
+def _column(data: Columns, name: str, n: int) -> pd.Series:
+    if name not in data:
+        return pd.Series([None] * n, dtype=object)
+    return data[name] if isinstance(data, pd.DataFrame) else pd.Series(data[name])
+
+def _num_column(data: Columns, name: str, n: int) -> np.ndarray:
+    if name not in data:
+        return np.full(n, np.nan)
+    col = data[name]
+    if isinstance(col, np.ndarray) and col.dtype.kind == "f":
+        return col.astype(float, copy=False)
+    return pd.to_numeric(pd.Series(col), errors="coerce").to_numpy(dtype=float)
+
+def _level_column(values: pd.Series, levels: Dict[str, float], missing: str) -> np.ndarray:
+    # Few distinct labels in practice: map the uniques, then gather by code.
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    table = np.array([levels.get((str(u) if u != "" else missing).lower(), 0.5) for u in uniques] + [levels[missing]])
+    return table[codes]  # code -1 (missing) picks the trailing default
+
+def _risk_column(flood: pd.Series, bushfire: pd.Series, crime: pd.Series) -> np.ndarray:
+    return (_level_column(flood, _HAZARD_LEVELS, "none")
+            + _level_column(bushfire, _HAZARD_LEVELS, "none")
+            + _level_column(crime, _CRIME_LEVELS, "medium")) / 3.0
+
+def prepare_inputs(data: Columns) -> Dict[str, np.ndarray]:
+    """Turn a DataFrame (or a mapping of columns) into the typed arrays the scorer needs."""
+    n = len(data) if isinstance(data, pd.DataFrame) else len(next(iter(data.values()), []))
+    out = {k: _num_column(data, col, n) for k, col in _NUMERIC_INPUTS.items()}
+    # bool(v) semantics, matching _value_add_score
+    out["granny"] = _column(data, "granny_flat_allowed", n).astype(bool).to_numpy()
+    out["dual"] = _column(data, "dual_occ_allowed", n).astype(bool).to_numpy()
+    out["risk"] = _risk_column(_column(data, "flood_risk", n),
+                               _column(data, "bushfire_risk", n),
+                               _column(data, "crime_band", n))
+    return out
+
+def _normalize_arr(values: np.ndarray, min_val: float, max_val: float) -> np.ndarray:
+    scaled = np.clip((values - min_val) / (max_val - min_val), 0.0, 1.0)
+    return np.where(np.isnan(values), 0.0, scaled)
+
+def compute_components(inputs: Mapping[str, np.ndarray]) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """Return (metric columns, normalized component matrix of shape (n, len(COMPONENTS)))."""
+    price, rent = inputs["price"], inputs["rent"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        has_price = ~np.isnan(price) & (price != 0)
+        has_rent = ~np.isnan(rent) & (rent != 0)
+
+        gy = np.where(has_rent & (price > 0), (rent * 52) / price, np.nan)
+        ny = gy * 0.75
+
+        annual_rent = rent * 52
+        noi = annual_rent - 0.25 * annual_rent - 0.065 * (0.80 * price)
+        equity = 0.20 * price
+        coc = np.where(has_price & has_rent & (equity > 0), noi / equity, 0.0)
+
+        beds = np.nan_to_num(inputs["beds"], nan=3.0)
+        beds = np.where(beds == 0, 3.0, beds)
+        price_per_bed = price / np.maximum(beds, 1)
+        aff = np.where(price > 0, 1.0 - _normalize_arr(price_per_bed, 120_000, 350_000), 0.5)
+
+    land = np.nan_to_num(inputs["land"], nan=0.0)
+    frontage = np.nan_to_num(inputs["frontage"], nan=0.0)
+    value_add = np.minimum(
+        np.where(inputs["granny"] & (land >= 450), 0.6, 0.0)
+        + np.where(inputs["dual"] & (frontage >= 12.5) & (land >= 550), 0.4, 0.0),
+        1.0,
+    )
+    amen = np.clip(np.nan_to_num(inputs["amenities"], nan=0.5), 0.0, 1.0)
+    risk = inputs["risk"]
+
+    metrics = {
+        "gross_yield": gy,
+        "net_yield": ny,
+        "cagr5": inputs["cagr5"],
+        "vacancy": inputs["vacancy"],
+        "risk_score": risk,
+        "value_add_score": value_add,
+        "cash_on_cash": coc,
+        "affordability": aff,
+    }
+    normalized = {
+        "net_yield": _normalize_arr(ny, 0.01, 0.08),
+        "cagr5": _normalize_arr(inputs["cagr5"], 0.0, 0.10),
+        "vacancy_inverse": 1.0 - _normalize_arr(inputs["vacancy"], 0.5, 5.0),
+        "cash_on_cash": _normalize_arr(coc, 0.0, 0.15),
+        "value_add": value_add,
+        "amenities": amen,
+        "affordability": aff,
+        "risk_inverse": 1.0 - risk,
+    }
+    return metrics, np.column_stack([normalized[k] for k in COMPONENTS])
+
+def weights_vector(weights: Optional[Mapping[str, float]] = None) -> np.ndarray:
+    w = DEFAULT_WEIGHTS if weights is None else weights
+    return np.array([float(w.get(k, 0.0)) for k in COMPONENTS])
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """``"net_yield=0.4,cagr5=0.1"`` -> DEFAULT_WEIGHTS with those components replaced.
+
+    Raises ValueError on unknown components, non-numeric or negative
+    weights, or when every weight ends up zero.
+    """
+    weights = dict(DEFAULT_WEIGHTS)
+    for part in (p.strip() for p in spec.split(",")):
+        if not part:
+            continue
+        name, sep, value = part.partition("=")
+        name = name.strip()
+        if not sep or name not in weights:
+            raise ValueError(f"expected component=weight with component in {', '.join(COMPONENTS)}, got {part!r}")
+        w = float(value)
+        if not (w >= 0 and np.isfinite(w)):
+            raise ValueError(f"weight for {name} must be a non-negative number")
+        weights[name] = w
+    if not any(weights.values()):
+        raise ValueError("at least one weight must be positive")
+    return weights
+
+def reweight_row(row: Dict[str, Any], weights: Mapping[str, float]) -> Dict[str, Any]:
+    """Rescore a compute_analytics_for_one row under other weights, from its score_breakdown."""
+    breakdown = row.get("score_breakdown") or {}
+    contrib = {k: float(weights.get(k, 0.0)) * (breakdown.get(k, 0.0) / DEFAULT_WEIGHTS[k]) for k in COMPONENTS}
+    row["score_breakdown"] = contrib
+    row["deal_score"] = sum(contrib.values())
+    return row
+
+def fill_crime_bands(frame: pd.DataFrame) -> None:
+    """Fill blank crime_band cells in place from the BOCSAR suburb index."""
+    n = len(frame)
+    crime = frame["crime_band"] if "crime_band" in frame else pd.Series([None] * n, index=frame.index, dtype=object)
+    blank = crime.isna() | (crime.astype(str) == "")
+    if not blank.any():
+        return
+    suburbs = _column(frame, "suburb", n)[blank.to_numpy()]
+    states = _column(frame, "state", n)[blank.to_numpy()]
+    pairs = list(zip(suburbs.tolist(), states.tolist()))
+    unique = list(dict.fromkeys(pairs))
+    found = dict(zip(unique, crime_bands_for(unique)))
+    filled = pd.Series([found[p] for p in pairs], index=suburbs.index, dtype=object)
+    if filled.notna().any():
+        crime = crime.astype(object).copy()
+        crime[filled.index[filled.notna()]] = filled[filled.notna()]
+        frame["crime_band"] = crime
+
+def compute_analytics_frame(data: Columns, weights: Optional[Mapping[str, float]] = None) -> pd.DataFrame:
+    """Vectorized compute_analytics_for_all.
+
+    Returns the input columns plus the metric columns, ``deal_score`` and one
+    ``contrib_<component>`` column per weight (the score_breakdown values).
+    Blank crime bands are filled from the BOCSAR index first.
+    """
+    frame = data.copy() if isinstance(data, pd.DataFrame) else pd.DataFrame(dict(data))
+    fill_crime_bands(frame)
+    metrics, components = compute_components(prepare_inputs(frame))
+    w = weights_vector(weights)
+    deal_score = np.zeros(len(frame))
+    for j, name in enumerate(COMPONENTS):
+        contrib = w[j] * components[:, j]
+        frame[BREAKDOWN_PREFIX + name] = contrib
+        deal_score = deal_score + contrib  # same summation order as the per-row path
+    for name in METRIC_COLUMNS:
+        frame[name] = metrics[name]
+    frame["deal_score"] = deal_score
+    return frame
+
+def frame_to_records(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Rows shaped like compute_analytics_for_one output (None for missing metrics)."""
+    contrib_cols = [BREAKDOWN_PREFIX + k for k in COMPONENTS]
+    base = frame.drop(columns=contrib_cols)
+    base[METRIC_COLUMNS] = base[METRIC_COLUMNS].astype(object).where(base[METRIC_COLUMNS].notna(), None)
+    records = base.to_dict(orient="records")
+    for rec, vals in zip(records, frame[contrib_cols].to_numpy().tolist()):
+        rec["score_breakdown"] = dict(zip(COMPONENTS, vals))
+    return records
+
 def filters_apply(rows: List[Dict[str, Any]],
                   min_gross_yield: float | None = None,
                   min_net_yield: float | None = None,
                   min_cagr5: float | None = None,
                   max_vacancy: float | None = None,
                   exclude_flood_high: bool = True,
-                  exclude_bushfire_high: bool = True) -> List[Dict[str, Any]]:
+                  exclude_bushfire_high: bool = True,
+                  suburb: str | None = None,
+                  state: str | None = None,
+                  min_price: float | None = None,
+                  max_price: float | None = None) -> List[Dict[str, Any]]:
+    suburb_n = suburb.strip().lower() if suburb else None
+    state_n = state.strip().lower() if state else None
     def ok(r):
         if min_gross_yield is not None and (r.get("gross_yield") or 0) < min_gross_yield: return False
         if min_net_yield  is not None and (r.get("net_yield")  or 0) < min_net_yield:  return False
@@ -134,9 +351,28 @@ def filters_apply(rows: List[Dict[str, Any]],
         if max_vacancy    is not None and (r.get("vacancy")    or 0) > max_vacancy:    return False
         if exclude_flood_high and str(r.get("flood_risk","")).lower() == "high":       return False
         if exclude_bushfire_high and str(r.get("bushfire_risk","")).lower() == "high": return False
+        if suburb_n and str(r.get("suburb","")).strip().lower() != suburb_n:           return False
+        if state_n and str(r.get("state","")).strip().lower() != state_n:              return False
+        if min_price is not None or max_price is not None:
+            price = _safe_float(r.get("list_price"))
+            if price is None: return False
+            if min_price is not None and price < min_price: return False
+            if max_price is not None and price > max_price: return False
         return True
     return [r for r in rows if ok(r)]
 
-def sort_properties(rows: List[Dict[str, Any]], sort_by: str = "deal_score", sort_dir: str = "desc") -> List[Dict[str, Any]]:
+def _missing(v) -> bool:
+    return v is None or (isinstance(v, float) and v != v)
+
+def sort_properties(rows: List[Dict[str, Any]], sort_by: str = "deal_score", sort_dir: str = "desc",
+                    limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    # Missing values (None/NaN) go last in both directions, same as ListingStore.sort.
+    # With a limit only the top rows are selected (heap), equal to sorting then slicing.
     reverse = sort_dir.lower() == "desc"
-    return sorted(rows, key=lambda r: (r.get(sort_by) is None, r.get(sort_by, 0)), reverse=reverse)
+    present = [r for r in rows if not _missing(r.get(sort_by))]
+    missing = [r for r in rows if _missing(r.get(sort_by))]
+    key = lambda r: r[sort_by]
+    if limit is None:
+        return sorted(present, key=key, reverse=reverse) + missing
+    pick = heapq.nlargest if reverse else heapq.nsmallest
+    return (pick(limit, present, key=key) + missing)[:limit]
@@ -1,11 +1,18 @@
-import httpx
 from typing import Optional
+from .geocache import cached_lookup
+from .http_pool import get_json
+from .overlay_index import local_query
 BFPL_MAPSERVER = "https://mapprod3.environment.nsw.gov.au/arcgis/rest/services/Fire/BFPL/MapServer"
 def get_bushfire_category(lat: float, lng: float, timeout: float = 8.0) -> Optional[str]:
     layer_ids = ["0", "1", "2", "229"]
     for lid in layer_ids:
         try:
-            val = _query_layer(BFPL_MAPSERVER, lid, lat, lng, timeout)
+            local = local_query(f"nsw_bfpl_{lid}", lat, lng)
+            if local is not None:
+                val = _category_from(local)
+            else:
+                val = cached_lookup("bushfire_nsw", f"bfpl/{lid}", lat, lng,
+                                    lambda: _query_layer(BFPL_MAPSERVER, lid, lat, lng, timeout))
             if val:
                 return val
         except Exception:
@@ -22,20 +29,18 @@ def _query_layer(base, layer_id, lat, lng, timeout):
         "returnGeometry": "false",
     }
     url = f"{base}/{layer_id}/query"
-    with httpx.Client(timeout=timeout) as client:
-        r = client.get(url, params=params)
-        r.raise_for_status()
-        data = r.json()
-        feats = data.get("features", [])
-        if not feats:
-            return None
-        attrs = feats[0].get("attributes", {}) or {}
-        for k in ("CATEGORY", "Category", "VEG_CATEGORY", "BFPL_CATEGORY", "BUSHFIREPRONE"):
-            if k in attrs and attrs[k]:
-                return str(attrs[k])
-        for k, v in attrs.items():
-            if isinstance(v, str) and ("Category" in k or "BF" in k.upper()):
-                return v
+    return _category_from(get_json(url, params=params, timeout=timeout))
+def _category_from(data) -> Optional[str]:
+    feats = data.get("features", [])
+    if not feats:
+        return None
+    attrs = feats[0].get("attributes", {}) or {}
+    for k in ("CATEGORY", "Category", "VEG_CATEGORY", "BFPL_CATEGORY", "BUSHFIREPRONE"):
+        if k in attrs and attrs[k]:
+            return str(attrs[k])
+    for k, v in attrs.items():
+        if isinstance(v, str) and ("Category" in k or "BF" in k.upper()):
+            return v
     return None
 def json_dumps(o):
     import json
@@ -1,14 +1,41 @@
-import csv, os
-from typing import Dict, Optional
+import csv, os, threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 CRIME_CSV = os.path.join(os.path.dirname(__file__), "..", "data", "bocsar_suburb_crime.csv")
+
+# (SUBURB, STATE) -> band, parsed once and re-read only when the file's mtime changes.
+_INDEX: Dict[str, object] = {"path": None, "mtime": None, "bands": {}}
+_LOCK = threading.Lock()
+
+def _norm(v: Any) -> str:
+    # None and NaN (a missing cell in a pandas frame) both mean "no value"
+    return "" if v is None or v != v else str(v).upper().strip()
+
+def _key(suburb: Optional[str], state: Optional[str]) -> Tuple[str, str]:
+    return (_norm(suburb), _norm(state))
+
+def _bands() -> Dict[Tuple[str, str], Optional[str]]:
+    try:
+        mtime = os.stat(CRIME_CSV).st_mtime
+    except OSError:
+        return {}
+    if _INDEX["path"] == CRIME_CSV and _INDEX["mtime"] == mtime:
+        return _INDEX["bands"]
+    with _LOCK:
+        if _INDEX["path"] == CRIME_CSV and _INDEX["mtime"] == mtime:
+            return _INDEX["bands"]
+        bands: Dict[Tuple[str, str], Optional[str]] = {}
+        with open(CRIME_CSV, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                # first row for a suburb wins, as with the old top-to-bottom scan
+                bands.setdefault(_key(row.get("suburb"), row.get("state")),
+                                 (row.get("crime_band") or "").lower() or None)
+        _INDEX.update(path=CRIME_CSV, mtime=mtime, bands=bands)
+        return bands
+
 def load_crime_band(suburb: str, state: str) -> Optional[str]:
-    if not os.path.exists(CRIME_CSV):
-        return None
-    ss = suburb.upper().strip()
-    st = state.upper().strip()
-    with open(CRIME_CSV, newline="", encoding="utf-8") as f:
-        for row in csv.DictReader(f):
-            if (row.get("suburb","").upper().strip() == ss and
-                row.get("state","").upper().strip() == st):
-                return (row.get("crime_band") or "").lower() or None
-    return None
\ No newline at end of file
+    return _bands().get(_key(suburb, state))
+
+def crime_bands_for(pairs: Iterable[Tuple[str, str]]) -> List[Optional[str]]:
+    """Bands for many (suburb, state) pairs, in order; None where unknown."""
+    bands = _bands()
+    return [bands.get(_key(s, st)) for s, st in pairs]
@@ -1,10 +1,14 @@
-import httpx
 from typing import Optional
 
+from .geocache import cached_fetch_async, cached_lookup
+from .http_pool import get_json
+from .overlay_index import local_query
+
 TIMEOUT = 15.0
 
 # Sunshine Coast FeatureServer: Flood Hazard Overlay polygons
 SUNSHINE_FLOOD_FS = "https://services-ap1.arcgis.com/YQyt7djuXN7rQyg4/ArcGIS/rest/services/Flood_Hazard_Overlay_i_Flood_Risk_Area/FeatureServer/0"
+LOCAL_OVERLAYS = ("sunshine_flood",)  # overlay_index exports consulted before the remote layers
 
 # Gold Coast MapServer: V8 Overlays
 GCCC_OVERLAYS_MS = "https://maps1.goldcoast.qld.gov.au/arcgis/rest/services/V8_Overlays/MapServer"
@@ -14,8 +18,8 @@ GCCC_FLOOD_ASSESS_LAYER = 80          # Flood assessment required
 # QLD FloodCheck MapServer fallback (state)
 FLOODCHECK_MS = "https://spatial-gis.information.qld.gov.au/arcgis/rest/services/FloodCheck/RapidHazardAssessmentMapSeries/MapServer"
 
-def _arcgis_point_query(url: str, x: float, y: float, wkid: int = 4326, out_fields: str = "*"):
-    params = {
+def _point_query_params(x: float, y: float, wkid: int = 4326, out_fields: str = "*") -> dict:
+    return {
         "f": "json",
         "geometry": f"{x},{y}",
         "geometryType": "esriGeometryPoint",
@@ -24,13 +28,9 @@ def _arcgis_point_query(url: str, x: float, y: float, wkid: int = 4326, out_fiel
         "returnGeometry": "false",
         "outFields": out_fields,
     }
-    with httpx.Client(timeout=TIMEOUT) as client:
-        r = client.get(url + "/query", params=params)
-        r.raise_for_status()
-        return r.json()
 
-def _arcgis_identify_ms(url: str, layer_ids: list[int], x: float, y: float, wkid: int = 4326, tolerance: int = 3):
-    params = {
+def _identify_params(layer_ids: list[int], x: float, y: float, wkid: int = 4326, tolerance: int = 3) -> dict:
+    return {
         "f": "json",
         "geometry": f'{{"x":{x},"y":{y},"spatialReference":{{"wkid":{wkid}}}}}',
         "geometryType": "esriGeometryPoint",
@@ -41,44 +41,93 @@ def _arcgis_identify_ms(url: str, layer_ids: list[int], x: float, y: float, wkid
         "layers": "all:" + ",".join(str(i) for i in layer_ids),
         "returnGeometry": "false",
     }
-    with httpx.Client(timeout=TIMEOUT) as client:
-        r = client.get(url + "/identify", params=params)
-        r.raise_for_status()
-        return r.json()
+
+def _arcgis_point_query(url: str, x: float, y: float, wkid: int = 4326, out_fields: str = "*"):
+    return get_json(url + "/query", params=_point_query_params(x, y, wkid, out_fields), timeout=TIMEOUT)
+
+def _arcgis_identify_ms(url: str, layer_ids: list[int], x: float, y: float, wkid: int = 4326, tolerance: int = 3):
+    return get_json(url + "/identify", params=_identify_params(layer_ids, x, y, wkid, tolerance), timeout=TIMEOUT)
+
+def _sunshine_risk(js: dict) -> Optional[str]:
+    feats = js.get("features") or []
+    if not feats:
+        return None
+    attrs = feats[0].get("attributes") or {}
+    val = (attrs.get("RISK") or attrs.get("FLOOD_RISK") or attrs.get("FLOOD_RISK_AREA") or "").strip().lower()
+    if "high" in val: return "high"
+    if "moderate" in val or "medium" in val: return "medium"
+    if "low" in val: return "low"
+    return "medium"
+
+def _gccc_risk(js: dict) -> Optional[str]:
+    results = js.get("results") or []
+    if not results:
+        return None
+    names = " ".join((r.get("layerName","") or "").lower() for r in results)
+    if "flood assessment required" in names: return "medium"
+    if "flood" in names: return "medium"
+    return None
+
+def _floodcheck_risk(js: dict) -> str:
+    return "medium" if (js.get("results") or []) else "none"
 
 def qld_get_flood_risk(lat: float, lng: float) -> Optional[str]:
     """Return 'high'|'medium'|'low'|'none'|'unknown' for a QLD coordinate."""
     x, y = (lng, lat)
 
-    # 1) Sunshine Coast
+    # 1) Sunshine Coast (local overlay export if present)
     try:
-        js = _arcgis_point_query(SUNSHINE_FLOOD_FS, x, y)
-        feats = js.get("features") or []
-        if feats:
-            attrs = feats[0].get("attributes") or {}
-            val = (attrs.get("RISK") or attrs.get("FLOOD_RISK") or attrs.get("FLOOD_RISK_AREA") or "").strip().lower()
-            if "high" in val: return "high"
-            if "moderate" in val or "medium" in val: return "medium"
-            if "low" in val: return "low"
-            return "medium"
+        local = local_query("sunshine_flood", lat, lng)
+        if local is not None:
+            risk = _sunshine_risk(local)
+        else:
+            risk = cached_lookup("flood_qld", "sunshine", lat, lng,
+                                 lambda: _sunshine_risk(_arcgis_point_query(SUNSHINE_FLOOD_FS, x, y)))
+        if risk: return risk
     except Exception:
         pass
 
     # 2) Gold Coast overlays
     try:
-        js = _arcgis_identify_ms(GCCC_OVERLAYS_MS, [GCCC_FLOOD_LAYER, GCCC_FLOOD_ASSESS_LAYER], x, y)
-        results = js.get("results") or []
-        if results:
-            names = " ".join((r.get("layerName","") or "").lower() for r in results)
-            if "flood assessment required" in names: return "medium"
-            if "flood" in names: return "medium"
+        layers = [GCCC_FLOOD_LAYER, GCCC_FLOOD_ASSESS_LAYER]
+        risk = cached_lookup("flood_qld", "gccc_flood", lat, lng,
+                             lambda: _gccc_risk(_arcgis_identify_ms(GCCC_OVERLAYS_MS, layers, x, y)))
+        if risk: return risk
     except Exception:
         pass
 
     # 3) State fallback
     try:
-        js = _arcgis_identify_ms(FLOODCHECK_MS, [0], x, y)
-        results = js.get("results") or []
-        return "medium" if results else "none"
+        return cached_lookup("flood_qld", "floodcheck", lat, lng,
+                             lambda: _floodcheck_risk(_arcgis_identify_ms(FLOODCHECK_MS, [0], x, y)))
+    except Exception:
+        return "unknown"
+
+async def qld_get_flood_risk_async(fetch, lat: float, lng: float, local_query=local_query) -> Optional[str]:
+    """Async twin of qld_get_flood_risk; ``fetch(url, params)`` returns decoded JSON.
+
+    ``local_query`` can be swapped for one that serves answers looked up in a batch.
+    """
+    x, y = (lng, lat)
+    try:
+        local = local_query("sunshine_flood", lat, lng)
+        if local is not None:
+            risk = _sunshine_risk(local)
+        else:
+            risk = await cached_fetch_async("flood_qld", "sunshine", lat, lng, fetch,
+                                            SUNSHINE_FLOOD_FS + "/query", _point_query_params(x, y), _sunshine_risk)
+        if risk: return risk
+    except Exception:
+        pass
+    try:
+        params = _identify_params([GCCC_FLOOD_LAYER, GCCC_FLOOD_ASSESS_LAYER], x, y)
+        risk = await cached_fetch_async("flood_qld", "gccc_flood", lat, lng, fetch,
+                                        GCCC_OVERLAYS_MS + "/identify", params, _gccc_risk)
+        if risk: return risk
+    except Exception:
+        pass
+    try:
+        return await cached_fetch_async("flood_qld", "floodcheck", lat, lng, fetch,
+                                        FLOODCHECK_MS + "/identify", _identify_params([0], x, y), _floodcheck_risk)
     except Exception:
         return "unknown"
@@ -0,0 +1,168 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+# On-disk cache of per-layer overlay answers, shared by every ArcGIS connector.
+# Keys are (connector, layer, lat, lng) with coordinates rounded to PRECISION
+# decimals (4 dp is ~11 m, so a block of listings shares one entry).
+
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "geocache.sqlite")
+PRECISION = 4
+DEFAULT_TTL = 30 * 86400
+NEGATIVE_TTL = 7 * 86400       # "no feature here" answers are re-checked sooner
+MAX_ENTRIES = 1_000_000
+EVICT_EVERY = 1000             # puts between LRU size checks
+
+# Overlays change rarely; planning zones more often than flood/bushfire maps.
+LAYER_TTLS: Dict[Tuple[str, str], int] = {
+    ("flood_qld", "sunshine"): 90 * 86400,
+    ("flood_qld", "gccc_flood"): 90 * 86400,
+    ("flood_qld", "floodcheck"): 90 * 86400,
+    ("bushfire_nsw", "*"): 90 * 86400,
+    ("zoning_vic", "bpa"): 90 * 86400,
+    ("zoning_vic", "plan_zone"): 30 * 86400,
+    ("zoning_nsw", "zone"): 30 * 86400,
+}
+
+def _is_negative(value: Any) -> bool:
+    return value is None or value is False or value == ""
+
+class GeoCache:
+    def __init__(self, path: str, max_entries: int = MAX_ENTRIES, precision: int = PRECISION):
+        self.path = path
+        self.max_entries = max_entries
+        self.precision = precision
+        self._lock = threading.Lock()
+        self._puts = 0
+        self.stats = {"hits": 0, "misses": 0, "negative_hits": 0, "stores": 0,
+                      "negative_stores": 0, "expired": 0, "evictions": 0}
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS geo ("
+            " connector TEXT, layer TEXT, qlat INTEGER, qlng INTEGER,"
+            " value TEXT, stored_at REAL, expires_at REAL, used_at REAL,"
+            " PRIMARY KEY (connector, layer, qlat, qlng))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS geo_used ON geo(used_at)")
+
+    def _key(self, connector: str, layer: str, lat: float, lng: float) -> Tuple[str, str, int, int]:
+        scale = 10 ** self.precision
+        return connector, layer, int(round(float(lat) * scale)), int(round(float(lng) * scale))
+
+    def ttl_for(self, connector: str, layer: str, value: Any) -> int:
+        ttl = LAYER_TTLS.get((connector, layer), LAYER_TTLS.get((connector, "*"), DEFAULT_TTL))
+        return min(ttl, NEGATIVE_TTL) if _is_negative(value) else ttl
+
+    def get(self, connector: str, layer: str, lat: float, lng: float) -> Tuple[bool, Any]:
+        key = self._key(connector, layer, lat, lng)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM geo WHERE connector=? AND layer=? AND qlat=? AND qlng=?", key
+            ).fetchone()
+            if row is None or row[1] < now:
+                self.stats["misses"] += 1
+                if row is not None:
+                    self.stats["expired"] += 1
+                return False, None
+            self._db.execute(
+                "UPDATE geo SET used_at=? WHERE connector=? AND layer=? AND qlat=? AND qlng=?", (now, *key)
+            )
+        value = json.loads(row[0])
+        self.stats["hits"] += 1
+        if _is_negative(value):
+            self.stats["negative_hits"] += 1
+        return True, value
+
+    def put(self, connector: str, layer: str, lat: float, lng: float, value: Any) -> None:
+        key = self._key(connector, layer, lat, lng)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO geo VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (*key, json.dumps(value), now, now + self.ttl_for(connector, layer, value), now),
+            )
+            self.stats["stores"] += 1
+            if _is_negative(value):
+                self.stats["negative_stores"] += 1
+            self._puts += 1
+            if self._puts % EVICT_EVERY == 0:
+                self._evict()
+
+    def _evict(self) -> None:
+        (count,) = self._db.execute("SELECT COUNT(*) FROM geo").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM geo WHERE rowid IN (SELECT rowid FROM geo ORDER BY used_at LIMIT ?)", (excess,)
+            )
+            self.stats["evictions"] += excess
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            cur = self._db.execute("DELETE FROM geo WHERE expires_at < ?", (time.time(),))
+            return cur.rowcount
+
+    def hit_rate(self) -> float:
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+_CACHE: Optional[GeoCache] = None
+_CACHE_LOCK = threading.Lock()
+
+def get_cache() -> Optional[GeoCache]:
+    """Process-wide cache; DEALRADAR_GEOCACHE=off disables it, any other value is the file path."""
+    global _CACHE
+    setting = os.environ.get("DEALRADAR_GEOCACHE", DEFAULT_PATH)
+    if setting.lower() in ("off", "0", "false", ""):
+        return None
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = GeoCache(setting)
+    return _CACHE
+
+def cached_lookup(connector: str, layer: str, lat: float, lng: float, compute: Callable[[], Any]) -> Any:
+    """Return the cached answer for this layer/point, or ``compute()`` and store it.
+
+    Exceptions from ``compute`` propagate and are not cached.
+    """
+    cache = get_cache()
+    if cache is None:
+        return compute()
+    hit, value = cache.get(connector, layer, lat, lng)
+    if hit:
+        return value
+    value = compute()
+    cache.put(connector, layer, lat, lng, value)
+    return value
+
+async def cached_lookup_async(connector: str, layer: str, lat: float, lng: float,
+                              compute: Callable[[], Awaitable[Any]]) -> Any:
+    cache = get_cache()
+    if cache is None:
+        return await compute()
+    hit, value = cache.get(connector, layer, lat, lng)
+    if hit:
+        return value
+    value = await compute()
+    cache.put(connector, layer, lat, lng, value)
+    return value
+
+async def cached_fetch_async(connector: str, layer: str, lat: float, lng: float,
+                             fetch: Callable[[str, Dict[str, Any]], Awaitable[Any]],
+                             url: str, params: Dict[str, Any], parse: Callable[[Any], Any]) -> Any:
+    """cached_lookup_async for the common "fetch one ArcGIS URL and parse it" case."""
+    async def compute():
+        return parse(await fetch(url, params))
+    return await cached_lookup_async(connector, layer, lat, lng, compute)
@@ -0,0 +1,81 @@
+import asyncio
+import atexit
+import importlib.util
+import os
+import threading
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+# One keep-alive connection pool per process for every connector, instead of
+# a fresh TCP+TLS handshake per request.
+
+DEFAULT_TIMEOUT = 15.0
+MAX_CONNECTIONS = 64
+MAX_KEEPALIVE = 32
+KEEPALIVE_EXPIRY = 30.0
+MAX_PER_HOST = int(os.environ.get("DEALRADAR_HTTP_MAX_PER_HOST", "8"))
+
+# HTTP/2 needs `h2`, which requirements.txt pulls in via httpx[http2];
+# without it (or with DEALRADAR_HTTP2=0) the pools speak HTTP/1.1.
+HTTP2 = os.environ.get("DEALRADAR_HTTP2", "1") != "0" and importlib.util.find_spec("h2") is not None
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(max_connections=MAX_CONNECTIONS,
+                        max_keepalive_connections=MAX_KEEPALIVE,
+                        keepalive_expiry=KEEPALIVE_EXPIRY)
+
+_LOCK = threading.Lock()
+_CLIENT: Optional[httpx.Client] = None
+_HOST_SLOTS: Dict[str, threading.BoundedSemaphore] = {}
+_ASYNC_CLIENTS: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+
+def get_client() -> httpx.Client:
+    global _CLIENT
+    if _CLIENT is None or _CLIENT.is_closed:
+        with _LOCK:
+            if _CLIENT is None or _CLIENT.is_closed:
+                _CLIENT = httpx.Client(timeout=DEFAULT_TIMEOUT, limits=_limits(), http2=HTTP2)
+    return _CLIENT
+
+def get_async_client() -> httpx.AsyncClient:
+    """Pooled async client for the running event loop (async clients can't cross loops)."""
+    loop = asyncio.get_running_loop()
+    client = _ASYNC_CLIENTS.get(loop)
+    if client is None or client.is_closed:
+        with _LOCK:
+            # clients of loops that have since closed (each asyncio.run) can't be used again
+            for old in [l for l in _ASYNC_CLIENTS if l.is_closed()]:
+                del _ASYNC_CLIENTS[old]
+            client = _ASYNC_CLIENTS[loop] = httpx.AsyncClient(timeout=DEFAULT_TIMEOUT, limits=_limits(), http2=HTTP2)
+    return client
+
+def _host_slot(url: str) -> threading.BoundedSemaphore:
+    host = urlsplit(url).netloc
+    slot = _HOST_SLOTS.get(host)
+    if slot is None:
+        with _LOCK:
+            slot = _HOST_SLOTS.setdefault(host, threading.BoundedSemaphore(MAX_PER_HOST))
+    return slot
+
+def get_json(url: str, params: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None) -> Any:
+    """GET through the shared pool, at most MAX_PER_HOST requests in flight per host."""
+    with _host_slot(url):
+        r = get_client().get(url, params=params, timeout=timeout if timeout is not None else DEFAULT_TIMEOUT)
+    r.raise_for_status()
+    return r.json()
+
+def close_client() -> None:
+    global _CLIENT
+    with _LOCK:
+        if _CLIENT is not None:
+            _CLIENT.close()
+            _CLIENT = None
+
+async def aclose_async_client() -> None:
+    client = _ASYNC_CLIENTS.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+atexit.register(close_client)
@@ -0,0 +1,253 @@
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .http_pool import get_async_client, get_json
+
+# Live "buy" listings from the Nestoria AU API.
+#
+# /properties awaits search_listings_async with a time budget. Answers are
+# cached per (place, listing type, price band): fresh entries are served as
+# is, stale ones are served immediately while one background task refreshes
+# them, and a fetch that overruns the budget keeps running to fill the cache
+# for the next caller. A circuit breaker stops calling an upstream that keeps
+# failing. NESTORIA_URL can point the connector at a local stub.
+
+log = logging.getLogger(__name__)
+
+NESTORIA_URL = os.environ.get("NESTORIA_URL", "https://api.nestoria.com.au/api")
+FETCH_TIMEOUT = float(os.environ.get("NESTORIA_TIMEOUT", "5"))
+DEFAULT_BUDGET = float(os.environ.get("NESTORIA_BUDGET", "0.8"))  # seconds a request may wait
+FRESH_TTL = 300.0
+STALE_TTL = 3600.0
+CACHE_ENTRIES = 256
+PRICE_BAND = 50_000
+BREAKER_FAILURES = 5
+BREAKER_RESET = 30.0
+
+# --- circuit breaker -----------------------------------------------------------------
+
+class CircuitBreaker:
+    """closed -> open after ``failures`` consecutive errors; one trial call after ``reset_after`` s."""
+
+    def __init__(self, failures: int = BREAKER_FAILURES, reset_after: float = BREAKER_RESET):
+        self.failures = failures
+        self.reset_after = reset_after
+        self.consecutive = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset_after else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def success(self) -> None:
+        with self._lock:
+            self.consecutive = 0
+            self.opened_at = None
+            self._trial = False
+
+    def failure(self) -> None:
+        with self._lock:
+            self.consecutive += 1
+            self._trial = False
+            if self.consecutive >= self.failures or self.opened_at is not None:
+                self.opened_at = time.monotonic()
+
+BREAKER = CircuitBreaker()
+
+# --- request / response shape --------------------------------------------------------
+
+def price_band(min_price: Optional[float], max_price: Optional[float]) -> Tuple[Optional[int], Optional[int]]:
+    """Widen a price range to PRICE_BAND steps so nearby ranges share one cache entry."""
+    lo = None if min_price is None else int(math.floor(min_price / PRICE_BAND) * PRICE_BAND)
+    hi = None if max_price is None else int(math.ceil(max_price / PRICE_BAND) * PRICE_BAND)
+    return lo, hi
+
+def _params(place: str, listing_type: str, band: Tuple[Optional[int], Optional[int]],
+            page: int, per_page: int) -> Dict[str, Any]:
+    params: Dict[str, Any] = {
+        "action": "search_listings",
+        "encoding": "json",
+        "country": "au",
+        "place_name": place,
+        "listing_type": listing_type,
+        "page": page,
+        "number_of_results": per_page,
+    }
+    if band[0] is not None:
+        params["price_min"] = band[0]
+    if band[1] is not None:
+        params["price_max"] = band[1]
+    return params
+
+def _parse(js: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    resp = js.get("response") or {}
+    code = str(resp.get("application_response_code", "100"))
+    if not code.startswith(("1", "2")):  # 1xx/2xx are successful searches
+        raise RuntimeError(f"nestoria: {code} {resp.get('application_response_text', '')}".strip())
+    meta = {"total_results": resp.get("total_results"), "page": resp.get("page"), "total_pages": resp.get("total_pages")}
+    return list(resp.get("listings") or []), meta
+
+def _in_range(li: Dict[str, Any], min_price: Optional[float], max_price: Optional[float]) -> bool:
+    price = _num(li.get("price"))
+    if price is None:
+        return min_price is None and max_price is None
+    return (min_price is None or price >= min_price) and (max_price is None or price <= max_price)
+
+def _num(v: Any) -> Optional[float]:
+    try:
+        f = float(v)
+    except (TypeError, ValueError):
+        return None
+    return f if math.isfinite(f) else None
+
+def normalize(li: Dict[str, Any], suburb: Optional[str] = None, state: Optional[str] = None) -> Dict[str, Any]:
+    """A Nestoria listing in the dataset's row schema (unknown fields left out).
+
+    Nestoria doesn't return suburb/state; pass the searched place so the
+    listing passes the same location filters that found it.
+    """
+    url = li.get("lister_url") or li.get("title") or ""
+    return {
+        "id": "nestoria-" + hashlib.sha1(url.encode("utf-8")).hexdigest()[:12],
+        "address": li.get("title") or "",
+        "suburb": suburb or "",
+        "state": (state or "").upper(),
+        "lat": _num(li.get("latitude")),
+        "lng": _num(li.get("longitude")),
+        "beds": _num(li.get("bedroom_number")),
+        "baths": _num(li.get("bathroom_number")),
+        "cars": _num(li.get("car_spaces")),
+        "dwelling_type": (li.get("property_type") or "").title(),
+        "list_price": _num(li.get("price")),
+        "source": "nestoria",
+        "url": li.get("lister_url"),
+        "thumb_url": li.get("thumb_url"),
+    }
+
+# --- sync (scripts) --------------------------------------------------------------------
+
+def search_listings(place: Optional[str] = None, min_price: Optional[float] = None, max_price: Optional[float] = None,
+                    listing_type: str = "buy", page: int = 1, per_page: int = 50,
+                    timeout: float = FETCH_TIMEOUT) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Blocking, uncached search. Raises on upstream errors."""
+    if not place:
+        return [], {"status": "no_place"}
+    js = get_json(NESTORIA_URL, params=_params(place, listing_type, (min_price, max_price), page, per_page),
+                  timeout=timeout)
+    listings, meta = _parse(js)
+    return listings, {"status": "live", **meta}
+
+# --- async with cache --------------------------------------------------------------------
+
+class _Entry:
+    __slots__ = ("listings", "meta", "fetched_at")
+
+    def __init__(self, listings: List[Dict[str, Any]], meta: Dict[str, Any]):
+        self.listings = listings
+        self.meta = meta
+        self.fetched_at = time.monotonic()
+
+_CACHE: "OrderedDict[Tuple, _Entry]" = OrderedDict()
+_INFLIGHT: Dict[Tuple, "asyncio.Future"] = {}
+STATS = {"fresh": 0, "stale": 0, "fetched": 0, "timeouts": 0, "errors": 0, "short_circuited": 0}
+
+def _cache_put(key: Tuple, entry: _Entry) -> None:
+    _CACHE[key] = entry
+    _CACHE.move_to_end(key)
+    while len(_CACHE) > CACHE_ENTRIES:
+        _CACHE.popitem(last=False)
+
+async def _fetch(key: Tuple, per_page: int) -> _Entry:
+    place, listing_type, lo, hi = key
+    if not BREAKER.allow():
+        STATS["short_circuited"] += 1
+        raise RuntimeError("nestoria circuit open")
+    try:
+        r = await get_async_client().get(NESTORIA_URL, params=_params(place, listing_type, (lo, hi), 1, per_page),
+                                         timeout=FETCH_TIMEOUT)
+        r.raise_for_status()
+        listings, meta = _parse(r.json())
+    except Exception:
+        BREAKER.failure()
+        raise
+    BREAKER.success()
+    STATS["fetched"] += 1
+    entry = _Entry(listings, meta)
+    _cache_put(key, entry)
+    return entry
+
+def _refresh(key: Tuple, per_page: int) -> "asyncio.Future":
+    """One in-flight fetch per key; callers share it."""
+    task = _INFLIGHT.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_fetch(key, per_page))
+        _INFLIGHT[key] = task
+
+        def done(t: "asyncio.Future") -> None:
+            _INFLIGHT.pop(key, None)
+            if not t.cancelled() and t.exception() is not None:
+                STATS["errors"] += 1
+                log.warning("Nestoria fetch for %s failed: %s", key[0], t.exception())
+        task.add_done_callback(done)
+    return task
+
+async def search_listings_async(place: Optional[str] = None, min_price: Optional[float] = None,
+                                max_price: Optional[float] = None, listing_type: str = "buy",
+                                per_page: int = 50, budget: float = DEFAULT_BUDGET) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Listings for the first results page, never raising and never waiting longer than ``budget``.
+
+    ``meta["status"]`` says where the answer came from: fresh, stale, live,
+    or (with no listings) timeout, error, circuit_open, no_place.
+    """
+    if not place:
+        return [], {"status": "no_place"}
+    key = (place.strip().lower(), listing_type, *price_band(min_price, max_price))
+    entry = _CACHE.get(key)
+    age = time.monotonic() - entry.fetched_at if entry is not None else None
+    status = None
+    if entry is not None and age < FRESH_TTL:
+        STATS["fresh"] += 1
+        status = "fresh"
+    elif entry is not None and age < STALE_TTL:
+        STATS["stale"] += 1
+        status = "stale"
+        if BREAKER.state != "open":
+            _refresh(key, per_page)  # revalidate in the background
+    else:
+        if BREAKER.state == "open":
+            STATS["short_circuited"] += 1
+            return [], {"status": "circuit_open"}
+        try:
+            entry = await asyncio.wait_for(asyncio.shield(_refresh(key, per_page)), budget)
+            status = "live"
+        except asyncio.TimeoutError:
+            STATS["timeouts"] += 1
+            return [], {"status": "timeout"}
+        except Exception as e:
+            return [], {"status": "error", "error": str(e)}
+    listings = [li for li in entry.listings if _in_range(li, min_price, max_price)]
+    return listings, {"status": status, **entry.meta}
+
+def stats() -> Dict[str, Any]:
+    return {**STATS, "breaker": BREAKER.state, "cached": len(_CACHE)}
@@ -0,0 +1,251 @@
+import argparse
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .http_pool import get_json
+
+# Offline point-in-polygon lookups for the ArcGIS overlay layers.
+#
+# `export` pages a whole layer (attributes + polygon rings in WGS84) into
+# data/overlays/<name>.json once. Lookups then run against a uniform grid of
+# polygon bounding boxes plus an exact even-odd ray-casting test, so a point
+# costs a handful of small NumPy ops instead of a remote round trip.
+
+OVERLAY_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "overlays")
+
+def layer_urls() -> Dict[str, str]:
+    """Exportable overlay name -> ArcGIS layer URL, from the connectors that query them."""
+    # imported here: the connectors import this module for local_query
+    from .bushfire_nsw import BFPL_MAPSERVER
+    from .flood_qld import SUNSHINE_FLOOD_FS
+    from .zoning_nsw import ZONING_FEATURESERVER
+    from .zoning_vic import BPA_LAYER, PLAN_ZONE_LAYER, VICMAP_FS
+    return {
+        "sunshine_flood": SUNSHINE_FLOOD_FS,
+        "vic_zone": f"{VICMAP_FS}/{PLAN_ZONE_LAYER}",
+        "vic_bpa": f"{VICMAP_FS}/{BPA_LAYER}",
+        "nsw_zoning": ZONING_FEATURESERVER,
+        **{f"nsw_bfpl_{lid}": f"{BFPL_MAPSERVER}/{lid}" for lid in (0, 1, 2, 229)},
+    }
+
+PAGE_SIZE = 1000
+MAX_PAGES = 10_000  # 10M features at the default page size; no overlay is near that
+CELL_DEG = 0.02            # ~2 km grid cells
+MAX_CELLS_PER_FEATURE = 4096  # bigger boxes go on a short "always check" list
+
+def overlay_path(name: str) -> str:
+    return os.path.join(OVERLAY_DIR, f"{name}.json")
+
+# --- export ----------------------------------------------------------------------
+
+def export_layer(name: str, layer_url: Optional[str] = None, page_size: int = PAGE_SIZE) -> int:
+    """Download every polygon of a layer into data/overlays/<name>.json. Returns the feature count."""
+    layer_url = layer_url or layer_urls()[name]
+    url = layer_url + "/query"
+    features: List[Dict[str, Any]] = []
+    seen = set()
+    offset = 0
+    for _ in range(MAX_PAGES):
+        js = get_json(url, params={
+            "f": "json",
+            "where": "1=1",
+            "outFields": "*",
+            "returnGeometry": "true",
+            "outSR": 4326,
+            "resultOffset": offset,
+            "resultRecordCount": page_size,
+        }, timeout=120.0)
+        if "error" in js:
+            raise RuntimeError(f"{name}: {js['error']}")
+        page = js.get("features") or []
+        oid_field = js.get("objectIdFieldName")
+        added = 0
+        for f in page:
+            attrs = f.get("attributes") or {}
+            key = attrs.get(oid_field) if oid_field in attrs else json.dumps(f, sort_keys=True)
+            if key in seen:
+                continue
+            seen.add(key)
+            added += 1
+            rings = (f.get("geometry") or {}).get("rings") or []
+            if rings:
+                features.append({"attributes": attrs, "rings": rings})
+        offset += len(page)
+        if not page or not js.get("exceededTransferLimit"):
+            break
+        if not added:
+            # the server isn't honouring resultOffset; paging on would loop forever
+            raise RuntimeError(f"{name}: page at offset {offset - len(page)} repeats earlier features")
+    else:
+        raise RuntimeError(f"{name}: more than {MAX_PAGES} pages")
+    os.makedirs(OVERLAY_DIR, exist_ok=True)
+    path = overlay_path(name)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"name": name, "source": layer_url, "exported_at": time.time(),
+                   "features": features}, f, separators=(",", ":"))
+    os.replace(path + ".tmp", path)
+    return len(features)
+
+# --- index -----------------------------------------------------------------------
+
+def _crossings(xs: np.ndarray, ys: np.ndarray, px: np.ndarray, py: np.ndarray) -> np.ndarray:
+    """Per point, how many ring edges a ray to +x crosses (points as column vectors)."""
+    x1, y1 = xs, ys
+    x2, y2 = np.roll(xs, -1), np.roll(ys, -1)
+    straddles = (y1 > py) != (y2 > py)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_at = x1 + (py - y1) * (x2 - x1) / (y2 - y1)
+    return np.count_nonzero(straddles & (px < x_at), axis=-1)
+
+class OverlayIndex:
+    def __init__(self, features: List[Dict[str, Any]], cell: float = CELL_DEG):
+        self.cell = cell
+        self.attributes: List[Dict[str, Any]] = []
+        self.rings: List[List[Tuple[np.ndarray, np.ndarray]]] = []
+        boxes = []
+        for f in features:
+            rings = []
+            for ring in f["rings"]:
+                arr = np.asarray(ring, dtype=float)
+                if len(arr) >= 3:
+                    rings.append((arr[:, 0].copy(), arr[:, 1].copy()))
+            if not rings:
+                continue
+            xs = np.concatenate([r[0] for r in rings])
+            ys = np.concatenate([r[1] for r in rings])
+            boxes.append((xs.min(), ys.min(), xs.max(), ys.max()))
+            self.attributes.append(f.get("attributes") or {})
+            self.rings.append(rings)
+        self.bbox = np.array(boxes, dtype=float).reshape(-1, 4)
+        self.grid: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        self.large: List[int] = []
+        for i, (x0, y0, x1, y1) in enumerate(self.bbox):
+            cx0, cy0, cx1, cy1 = self._cell(x0, y0) + self._cell(x1, y1)
+            if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > MAX_CELLS_PER_FEATURE:
+                self.large.append(i)
+                continue
+            for cx in range(cx0, cx1 + 1):
+                for cy in range(cy0, cy1 + 1):
+                    self.grid[(cx, cy)].append(i)
+
+    def __len__(self) -> int:
+        return len(self.attributes)
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return int(np.floor(x / self.cell)), int(np.floor(y / self.cell))
+
+    def _contains(self, i: int, px: np.ndarray, py: np.ndarray) -> np.ndarray:
+        total = sum(_crossings(xs, ys, px, py) for xs, ys in self.rings[i])
+        return (total % 2) == 1
+
+    def lookup_index(self, lat: float, lng: float) -> int:
+        """Index of the first feature containing the point (export order, like ArcGIS), or -1."""
+        x, y = float(lng), float(lat)
+        cands = sorted(self.grid.get(self._cell(x, y), []) + self.large)
+        px, py = np.array([[x]]), np.array([[y]])
+        for i in cands:
+            x0, y0, x1, y1 = self.bbox[i]
+            if x0 <= x <= x1 and y0 <= y <= y1 and self._contains(i, px, py)[0]:
+                return i
+        return -1
+
+    def lookup(self, lat: float, lng: float) -> Optional[Dict[str, Any]]:
+        i = self.lookup_index(lat, lng)
+        return self.attributes[i] if i >= 0 else None
+
+    def lookup_many(self, lats: Sequence[float], lngs: Sequence[float]) -> np.ndarray:
+        """Vectorized lookup_index for a batch of points.
+
+        Points are grouped by grid cell; a cell's candidate features get one
+        bounding-box test against all its points, and each feature that boxes
+        any is ray-cast against those still unmatched at once.
+        """
+        x = np.asarray(lngs, dtype=float)
+        y = np.asarray(lats, dtype=float)
+        out = np.full(len(x), -1, dtype=np.int64)
+        ok = np.flatnonzero(np.isfinite(x) & np.isfinite(y))
+        if not len(self) or not len(ok):
+            return out
+        cx = np.floor(x[ok] / self.cell).astype(np.int64)
+        cy = np.floor(y[ok] / self.cell).astype(np.int64)
+        order = np.lexsort((cy, cx))
+        brk = np.flatnonzero((np.diff(cx[order]) != 0) | (np.diff(cy[order]) != 0)) + 1
+        for group in np.split(order, brk):
+            cands = sorted(self.grid.get((int(cx[group[0]]), int(cy[group[0]])), []) + self.large)
+            if not cands:
+                continue
+            pts = ok[group]
+            px, py, b = x[pts], y[pts], self.bbox[cands]
+            in_box = (px >= b[:, :1]) & (px <= b[:, 2:3]) & (py >= b[:, 1:2]) & (py <= b[:, 3:])
+            for c in np.flatnonzero(in_box.any(axis=1)):
+                sel = pts[in_box[c] & (out[pts] < 0)]
+                if len(sel):
+                    out[sel[self._contains(cands[c], x[sel, None], y[sel, None])]] = cands[c]
+        return out
+
+# --- process-wide access ---------------------------------------------------------
+
+_INDEXES: Dict[str, Tuple[Optional[float], Optional[OverlayIndex]]] = {}
+_LOCK = threading.Lock()
+
+def get_index(name: str) -> Optional[OverlayIndex]:
+    """The local index for an overlay, rebuilt if its file changed; None when not exported."""
+    if os.environ.get("DEALRADAR_LOCAL_OVERLAYS", "1") == "0":
+        return None
+    path = overlay_path(name)
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return None
+    cached = _INDEXES.get(name)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with _LOCK:
+        cached = _INDEXES.get(name)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        with open(path, encoding="utf-8") as f:
+            index = OverlayIndex(json.load(f)["features"])
+        _INDEXES[name] = (mtime, index)
+        return index
+
+def local_query(name: str, lat: float, lng: float) -> Optional[Dict[str, Any]]:
+    """ArcGIS-shaped ``{"features": [...]}`` answer from the local index, or None if unavailable."""
+    index = get_index(name)
+    if index is None:
+        return None
+    attrs = index.lookup(lat, lng)
+    return {"features": [{"attributes": attrs}] if attrs is not None else []}
+
+def local_query_many(name: str, lats: Sequence[float], lngs: Sequence[float]) -> Optional[List[Dict[str, Any]]]:
+    """local_query for a batch of points (one lookup_many), or None if unavailable."""
+    index = get_index(name)
+    if index is None:
+        return None
+    return [{"features": [{"attributes": index.attributes[i]}] if i >= 0 else []}
+            for i in index.lookup_many(lats, lngs).tolist()]
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Export ArcGIS overlay layers for offline lookups.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    ex = sub.add_parser("export", help="download layers into data/overlays/")
+    ex.add_argument("names", nargs="*", help=f"default: all of {', '.join(layer_urls())}")
+    lk = sub.add_parser("lookup", help="query a local layer")
+    lk.add_argument("name")
+    lk.add_argument("lat", type=float)
+    lk.add_argument("lng", type=float)
+    args = ap.parse_args(argv)
+    if args.cmd == "export":
+        for name in args.names or list(layer_urls()):
+            print(f"{name}: {export_layer(name)} features -> {overlay_path(name)}")
+    else:
+        print(json.dumps(local_query(args.name, args.lat, args.lng)))
+
+if __name__ == "__main__":
+    main()
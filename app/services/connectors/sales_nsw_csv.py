@@ -1,10 +1,27 @@
-import csv, os
-from typing import Dict, List, Optional, Tuple
+import argparse, csv, glob, json, os, threading
+from typing import Dict, Iterable, List, Optional, Tuple
 from collections import defaultdict
 from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
 SALES_CSV = os.path.join(os.path.dirname(__file__), "..", "data", "nsw_sales.csv")
+# weekly Valuer-General extracts dropped here are appended on the next query
+SALES_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "nsw_sales")
+STORE_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "nsw_sales_store.npz")
+CHUNK_ROWS = 250_000
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y")
+
+_SUBURB_COLS = ("suburb", "SUBURB")
+_POSTCODE_COLS = ("postcode", "POSTCODE")
+_PRICE_COLS = ("price", "PRICE")
+_DATE_COLS = ("contract_date", "CONTRACT_DATE", "SETTLEMENT_DATE")
+_YEAR_SPAN = 100_000  # (key, year) -> key * _YEAR_SPAN + year for window searches
+_WANTED = set(_SUBURB_COLS + _POSTCODE_COLS + _PRICE_COLS + _DATE_COLS)
+
 def parse_date(s: str) -> Optional[datetime]:
-    for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y"):
+    for fmt in DATE_FORMATS:
         try:
             return datetime.strptime(s.strip(), fmt)
         except Exception:
@@ -19,27 +36,309 @@ def load_sales_by_suburb() -> List[dict]:
         for row in r:
             rows.append({k.strip(): (v.strip() if isinstance(v, str) else v) for k, v in row.items()})
     return rows
-def compute_median_price_by_suburb_years(years: int = 5) -> Dict[Tuple[str, str], float]:
-    from statistics import median
-    sales = load_sales_by_suburb()
-    if not sales:
-        return {}
-    cutoff = datetime.utcnow().year - years
-    bucket: Dict[Tuple[str, str], List[float]] = defaultdict(list)
-    for s in sales:
-        suburb = (s.get("suburb") or s.get("SUBURB") or "").upper()
-        pc = (s.get("postcode") or s.get("POSTCODE") or "")
-        price_raw = s.get("price") or s.get("PRICE")
-        date_raw = s.get("contract_date") or s.get("CONTRACT_DATE") or s.get("SETTLEMENT_DATE") or ""
-        dt = parse_date(date_raw)
+
+# --- streaming ingest --------------------------------------------------------------
+
+def _coalesce(chunk: pd.DataFrame, names: Tuple[str, ...]) -> pd.Series:
+    """First non-empty value across ``names``, like ``row.get(a) or row.get(b)``."""
+    out = pd.Series("", index=chunk.index, dtype=object)
+    for name in reversed(names):
+        if name in chunk:
+            v = chunk[name].fillna("").astype(str).str.strip()
+            out = v.where(v != "", out)
+    return out
+
+def parse_years(dates: pd.Series) -> np.ndarray:
+    """Vectorized parse_date(...).year; -1 where no format matches. Each distinct string is parsed once."""
+    uniq = pd.Series(pd.unique(dates.astype(str).str.strip()))
+    parsed = pd.Series(pd.NaT, index=uniq.index, dtype="datetime64[ns]")
+    for fmt in DATE_FORMATS:
+        todo = parsed.isna()
+        if not todo.any():
+            break
+        parsed[todo] = pd.to_datetime(uniq[todo], format=fmt, errors="coerce")
+    years = pd.Series(parsed.dt.year.fillna(-1).astype(np.int32).to_numpy(), index=uniq.to_numpy())
+    return years.reindex(dates.astype(str).str.strip().to_numpy()).to_numpy(np.int32)
+
+def _parse_chunk(chunk: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    chunk = chunk.rename(columns=lambda c: str(c).strip())
+    suburb = _coalesce(chunk, _SUBURB_COLS).str.upper()
+    postcode = _coalesce(chunk, _POSTCODE_COLS)
+    price_raw = _coalesce(chunk, _PRICE_COLS).str.replace(",", "", regex=False).str.replace("$", "", regex=False)
+    price = pd.to_numeric(price_raw, errors="coerce").to_numpy(float)
+    year = parse_years(_coalesce(chunk, _DATE_COLS))
+    ok = np.isfinite(price) & (year >= 0)
+    keys = (suburb + "|" + postcode).to_numpy(object)
+    return keys[ok], year[ok], price[ok]
+
+def read_sales_file(path: str, chunk_rows: int = CHUNK_ROWS) -> Iterable[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """(key, year, price) arrays per chunk of a sales CSV; rows without a usable price or date are dropped."""
+    reader = pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunk_rows,
+                         usecols=lambda c: str(c).strip() in _WANTED, encoding="utf-8")
+    for chunk in reader:
+        yield _parse_chunk(chunk)
+
+# --- aggregate store ---------------------------------------------------------------
+
+def _file_stamp(path: str) -> List[float]:
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime]
+
+class SalesStore:
+    """Every sale price, grouped by (suburb|postcode, year) and sorted within each group.
+
+    Groups are laid out in (key, year) order, so any year window for a suburb
+    is one contiguous slice of ``prices``; medians and percentiles never touch
+    the source CSVs again.
+    """
+
+    def __init__(self, keys: np.ndarray, years: np.ndarray, offsets: np.ndarray, prices: np.ndarray,
+                 files: Optional[Dict[str, List[float]]] = None):
+        self.keys = keys            # per group, "SUBURB|POSTCODE"
+        self.years = years          # per group
+        self.offsets = offsets      # group g is prices[offsets[g]:offsets[g + 1]]
+        self.prices = prices
+        self.files = dict(files or {})
+        # groups are key-sorted, so each key owns the group range [key_start, key_end)
+        brk = np.flatnonzero(keys[1:] != keys[:-1]) + 1
+        self.key_start = np.concatenate(([0], brk)).astype(np.int64) if len(keys) else np.array([], dtype=np.int64)
+        self.key_end = np.append(self.key_start[1:], len(keys)).astype(np.int64)
+        self.key_names = keys[self.key_start]
+        self._key_pos = {k: i for i, k in enumerate(self.key_names.tolist())}
+        self._group_rank = np.repeat(np.arange(len(self.key_start), dtype=np.int64) * _YEAR_SPAN,
+                                     self.key_end - self.key_start) + self.years
+
+    @classmethod
+    def empty(cls) -> "SalesStore":
+        return cls(np.array([], dtype=object), np.array([], dtype=np.int32), np.zeros(1, dtype=np.int64), np.array([], dtype=float))
+
+    @classmethod
+    def from_arrays(cls, keys: np.ndarray, years: np.ndarray, prices: np.ndarray,
+                    files: Optional[Dict[str, List[float]]] = None) -> "SalesStore":
+        codes, names = pd.factorize(pd.Series(keys, dtype=object), sort=True)
+        order = np.lexsort((prices, years, codes))
+        codes, years, prices = codes[order], years[order], prices[order]
+        brk = np.flatnonzero((np.diff(codes) != 0) | (np.diff(years) != 0)) + 1
+        starts = np.concatenate(([0], brk)) if len(prices) else np.array([], dtype=np.int64)
+        offsets = np.append(starts, len(prices)).astype(np.int64)
+        return cls(np.asarray(names, dtype=object)[codes[starts]], years[starts].astype(np.int32), offsets, prices, files)
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def rows(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        counts = np.diff(self.offsets)
+        return np.repeat(self.keys, counts), np.repeat(self.years, counts), self.prices
+
+    def _row_ranks(self, names: np.ndarray) -> np.ndarray:
+        """Per sale, its group's (key, year) rank with keys coded by position in the sorted ``names``."""
+        codes = np.searchsorted(names, self.keys).astype(np.int64)
+        return np.repeat(codes * _YEAR_SPAN + self.years, np.diff(self.offsets))
+
+    def append(self, parts: List[Tuple[np.ndarray, np.ndarray, np.ndarray]],
+               files: Optional[Dict[str, List[float]]] = None) -> "SalesStore":
+        """New store with ``parts`` merged in; history comes from the store, not the CSVs.
+
+        Only the new rows are sorted, then merged into the already sorted history.
+        """
+        files = {**self.files, **(files or {})}
+        new = SalesStore.from_arrays(*(np.concatenate([part[i] for part in parts]) for i in range(3))) if parts else None
+        if new is None or not len(new) or not len(self):
+            base = new if new is not None and len(new) else self
+            return SalesStore(base.keys, base.years, base.offsets, base.prices, files)
+        names = np.union1d(self.key_names, new.key_names)
+        old_rank, new_rank = self._row_ranks(names), new._row_ranks(names)
+        # each new sale goes after the old sales of its group priced <= it: a binary
+        # search per sale, run for all of them at once within their group's range
+        lo = np.searchsorted(old_rank, new_rank, "left")
+        hi = np.searchsorted(old_rank, new_rank, "right")
+        last = len(self) - 1
+        while True:
+            active = lo < hi
+            if not active.any():
+                break
+            mid = (lo + hi) // 2
+            le = self.prices[np.minimum(mid, last)] <= new.prices
+            lo = np.where(active & le, mid + 1, lo)
+            hi = np.where(active & ~le, mid, hi)
+        pos = lo + np.arange(len(new))
+        is_new = np.zeros(len(self) + len(new), dtype=bool)
+        is_new[pos] = True
+        rank = np.empty(len(is_new), dtype=np.int64)
+        prices = np.empty(len(is_new), dtype=float)
+        rank[pos], rank[~is_new] = new_rank, old_rank
+        prices[pos], prices[~is_new] = new.prices, self.prices
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(rank)) + 1))
+        group = rank[starts]
+        return SalesStore(names[group // _YEAR_SPAN], (group % _YEAR_SPAN).astype(np.int32),
+                          np.append(starts, len(prices)).astype(np.int64), prices, files)
+
+    # --- persistence ---
+
+    def save(self, path: Optional[str] = None) -> None:
+        path = path or STORE_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path + ".tmp", "wb") as f:
+            np.savez(f, keys=self.keys.astype(str), years=self.years, offsets=self.offsets, prices=self.prices,
+                     meta=np.array(json.dumps({"version": 1, "files": self.files})))
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> Optional["SalesStore"]:
         try:
-            price = float(str(price_raw).replace(",", "").replace("$", ""))
-        except Exception:
+            with np.load(path or STORE_PATH, allow_pickle=False) as z:
+                meta = json.loads(str(z["meta"]))
+                if meta.get("version") != 1:
+                    return None
+                return cls(z["keys"].astype(object), z["years"], z["offsets"], z["prices"], meta.get("files"))
+        except (OSError, KeyError, ValueError):
+            return None
+
+    # --- queries ---
+
+    def _groups(self, key_idx: np.ndarray, year_from: Optional[int], year_to: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Group range [g0, g1) per key for the year window."""
+        g0, g1 = self.key_start[key_idx], self.key_end[key_idx]
+        if year_from is not None:
+            g0 = np.searchsorted(self._group_rank, key_idx * _YEAR_SPAN + year_from, "left")
+        if year_to is not None:
+            g1 = np.searchsorted(self._group_rank, key_idx * _YEAR_SPAN + year_to, "right")
+        return g0, np.maximum(g0, g1)
+
+    def window(self, suburb: str, postcode: str, year_from: Optional[int] = None, year_to: Optional[int] = None) -> np.ndarray:
+        """Sorted prices for one suburb/postcode within [year_from, year_to]."""
+        i = self._key_pos.get(f"{str(suburb or '').upper().strip()}|{str(postcode or '').strip()}")
+        if i is None:
+            return self.prices[:0]
+        (g0,), (g1,) = self._groups(np.array([i]), year_from, year_to)
+        vals = self.prices[self.offsets[g0]:self.offsets[g1]]
+        return vals if g1 - g0 <= 1 else np.sort(vals)
+
+    def count(self, suburb: str, postcode: str, year_from: Optional[int] = None, year_to: Optional[int] = None) -> int:
+        return len(self.window(suburb, postcode, year_from, year_to))
+
+    def percentile(self, q: float, suburb: str, postcode: str, year_from: Optional[int] = None,
+                   year_to: Optional[int] = None) -> Optional[float]:
+        vals = self.window(suburb, postcode, year_from, year_to)
+        return float(np.percentile(vals, q)) if len(vals) else None
+
+    def median(self, suburb: str, postcode: str, year_from: Optional[int] = None, year_to: Optional[int] = None) -> Optional[float]:
+        return self.percentile(50, suburb, postcode, year_from, year_to)
+
+    def percentiles_by_suburb(self, q: float, year_from: Optional[int] = None,
+                              year_to: Optional[int] = None) -> Dict[Tuple[str, str], float]:
+        """{(SUBURB, postcode): q-th percentile} for every suburb with sales in the window."""
+        if not len(self.key_names):
+            return {}
+        g0, g1 = self._groups(np.arange(len(self.key_names)), year_from, year_to)
+        lo, hi = self.offsets[g0], self.offsets[g1]
+        has = np.flatnonzero(hi > lo)
+        if not len(has):
+            return {}
+        lo, counts = lo[has], (hi - lo)[has]
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        # one segmented sort instead of a sort per suburb
+        idx = np.repeat(lo - starts, counts) + np.arange(counts.sum())
+        seg = np.repeat(np.arange(len(has)), counts)
+        vals = self.prices[idx][np.lexsort((self.prices[idx], seg))]
+        pos = (counts - 1) * (q / 100.0)
+        below = np.floor(pos).astype(np.int64)
+        frac = pos - below
+        a = vals[starts + below]
+        b = vals[starts + np.minimum(below + 1, counts - 1)]
+        out = a + (b - a) * frac
+        names = self.key_names[has]
+        return {tuple(k.split("|", 1)): float(v) for k, v in zip(names.tolist(), out.tolist())}
+
+    def medians_by_suburb(self, year_from: Optional[int] = None, year_to: Optional[int] = None) -> Dict[Tuple[str, str], float]:
+        return self.percentiles_by_suburb(50, year_from, year_to)
+
+# --- process-wide store ------------------------------------------------------------
+
+_STORE: Dict[str, Optional[SalesStore]] = {"store": None}
+_LOCK = threading.Lock()
+
+def sales_sources() -> List[str]:
+    paths = [SALES_CSV] if os.path.exists(SALES_CSV) else []
+    return [os.path.abspath(p) for p in paths + sorted(glob.glob(os.path.join(SALES_DIR, "*.csv")))]
+
+def ingest(paths: Iterable[str], store: Optional[SalesStore] = None, chunk_rows: int = CHUNK_ROWS) -> SalesStore:
+    """Stream ``paths`` into ``store`` (or a new one) and return the merged store.
+
+    Paths the store already tracks with the same stamp are skipped. If one of
+    them has changed, the store is rebuilt from its tracked files still on
+    disk plus ``paths``, the same way sync_store does.
+    """
+    store = store or SalesStore.empty()
+    stamps = {p: _file_stamp(p) for p in dict.fromkeys(os.path.abspath(p) for p in paths)}
+    if any(p in store.files and list(store.files[p]) != s for p, s in stamps.items()):
+        tracked = [p for p in store.files if os.path.exists(p)]
+        return ingest(list(dict.fromkeys(tracked + list(stamps))), SalesStore.empty(), chunk_rows)
+    parts, files = [], {}
+    for path, stamp in stamps.items():
+        if path in store.files:
             continue
-        if dt and dt.year >= cutoff:
-            bucket[(suburb, pc)].append(price)
-    out = {}
-    for k, vals in bucket.items():
-        if vals:
-            out[k] = median(vals)
-    return out
\ No newline at end of file
+        parts.extend(read_sales_file(path, chunk_rows))
+        files[path] = stamp
+    return store.append(parts, files) if files else store
+
+def sync_store(sources: Optional[List[str]] = None, path: Optional[str] = None) -> SalesStore:
+    """Bring the persisted store up to date with ``sources`` (default: sales_sources()).
+
+    Files already in the store stay tracked, including ones ingested by path
+    outside ``sources``. New files are appended. If a tracked file has
+    changed, the store is rebuilt from every tracked file still on disk plus
+    ``sources``; a tracked file that has gone keeps its sales until then.
+    """
+    sources = sales_sources() if sources is None else [os.path.abspath(p) for p in sources]
+    with _LOCK:
+        store = _STORE["store"] or SalesStore.load(path) or SalesStore.empty()
+        tracked = {p: _file_stamp(p) for p in store.files if os.path.exists(p)}
+        stamps = {p: _file_stamp(p) for p in sources if os.path.exists(p)}
+        if any(list(store.files[p]) != s for p, s in tracked.items()):
+            store = ingest(list({**tracked, **stamps}), SalesStore.empty())
+        else:
+            new = [p for p in stamps if p not in store.files]
+            if not new:
+                _STORE["store"] = store
+                return store
+            store = ingest(new, store)
+        store.save(path)
+        _STORE["store"] = store
+        return store
+
+def compute_median_price_by_suburb_years(years: int = 5) -> Dict[Tuple[str, str], float]:
+    store = sync_store()
+    if not len(store):
+        return {}
+    return store.medians_by_suburb(year_from=datetime.utcnow().year - years)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="NSW sales aggregate store.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    ing = sub.add_parser("ingest", help="append sales CSVs to the store (default: sync data/ sources)")
+    ing.add_argument("paths", nargs="*")
+    q = sub.add_parser("query", help="median / percentile / count for one suburb")
+    q.add_argument("suburb")
+    q.add_argument("postcode")
+    q.add_argument("--from", dest="year_from", type=int)
+    q.add_argument("--to", dest="year_to", type=int)
+    q.add_argument("--percentile", type=float, default=50.0)
+    args = ap.parse_args(argv)
+    if args.cmd == "ingest":
+        if args.paths:
+            with _LOCK:
+                store = ingest(args.paths, SalesStore.load() or SalesStore.empty())
+                store.save()
+                _STORE["store"] = store
+        else:
+            store = sync_store()
+        print(f"{len(store)} sales in {len(store.key_names)} suburbs from {len(store.files)} files -> {STORE_PATH}")
+    else:
+        store = sync_store()
+        window = (args.suburb, args.postcode, args.year_from, args.year_to)
+        print(json.dumps({"count": store.count(*window), "percentile": args.percentile,
+                          "value": store.percentile(args.percentile, *window)}))
+
+if __name__ == "__main__":
+    main()
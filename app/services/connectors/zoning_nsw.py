@@ -1,7 +1,17 @@
-import httpx
 from typing import Optional
+from .geocache import cached_lookup
+from .http_pool import get_json
+from .overlay_index import local_query
 ZONING_FEATURESERVER = "https://mapprod3.environment.nsw.gov.au/arcgis/rest/services/Planning/EPI_Primary_Planning_Layers/FeatureServer/2"
 def get_zoning(lat: float, lng: float, timeout: float = 8.0) -> Optional[str]:
+    try:
+        local = local_query("nsw_zoning", lat, lng)
+        if local is not None:
+            return _zone_from(local)
+        return cached_lookup("zoning_nsw", "zone", lat, lng, lambda: _query_zone(lat, lng, timeout))
+    except Exception:
+        return None
+def _query_zone(lat: float, lng: float, timeout: float) -> Optional[str]:
     params = {
         "f": "json",
         "geometry": json_dumps({"x": lng, "y": lat, "spatialReference": {"wkid": 4326}}),
@@ -11,18 +21,13 @@ def get_zoning(lat: float, lng: float, timeout: float = 8.0) -> Optional[str]:
         "outFields": "ZONE",
         "returnGeometry": "false",
     }
-    try:
-        with httpx.Client(timeout=timeout) as client:
-            r = client.get(f"{ZONING_FEATURESERVER}/query", params=params)
-            r.raise_for_status()
-            data = r.json()
-            feats = data.get("features", [])
-            if not feats:
-                return None
-            attrs = feats[0].get("attributes", {}) or {}
-            return attrs.get("ZONE") or attrs.get("Zone") or attrs.get("LAND_ZONE") or None
-    except Exception:
+    return _zone_from(get_json(f"{ZONING_FEATURESERVER}/query", params=params, timeout=timeout))
+def _zone_from(data) -> Optional[str]:
+    feats = data.get("features", [])
+    if not feats:
         return None
+    attrs = feats[0].get("attributes", {}) or {}
+    return attrs.get("ZONE") or attrs.get("Zone") or attrs.get("LAND_ZONE") or None
 def json_dumps(o):
     import json
     return json.dumps(o, separators=(",", ":"))
\ No newline at end of file
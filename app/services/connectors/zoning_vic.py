@@ -1,13 +1,18 @@
-import httpx
+import asyncio
 from typing import Optional, Tuple
 
+from .geocache import cached_fetch_async, cached_lookup
+from .http_pool import get_json
+from .overlay_index import local_query
+
 TIMEOUT = 15.0
 VICMAP_FS = "https://services6.arcgis.com/GB33F62SbDxJjwEL/arcgis/rest/services/Vicmap_Planning/FeatureServer"
 PLAN_ZONE_LAYER = 3
 BPA_LAYER = 9
+LOCAL_OVERLAYS = ("vic_zone", "vic_bpa")  # overlay_index exports consulted before the remote layers
 
-def _query_point(layer_url: str, x: float, y: float, wkid: int = 4326):
-    params = {
+def _query_params(x: float, y: float, wkid: int = 4326) -> dict:
+    return {
         "f": "json",
         "geometry": f"{x},{y}",
         "geometryType": "esriGeometryPoint",
@@ -16,27 +21,54 @@ def _query_point(layer_url: str, x: float, y: float, wkid: int = 4326):
         "returnGeometry": "false",
         "outFields": "*",
     }
-    with httpx.Client(timeout=TIMEOUT) as client:
-        r = client.get(layer_url + "/query", params=params)
-        r.raise_for_status()
-        return r.json()
+
+def _query_point(layer_url: str, x: float, y: float, wkid: int = 4326):
+    return get_json(layer_url + "/query", params=_query_params(x, y, wkid), timeout=TIMEOUT)
+
+def _zone_code(js: dict) -> Optional[str]:
+    feats = js.get("features") or []
+    if not feats:
+        return None
+    attrs = feats[0].get("attributes") or {}
+    return (attrs.get("ZONE_CODE") or attrs.get("ZONE") or attrs.get("ZONING") or attrs.get("MAINZONE") or "").strip() or None
+
+def _is_bpa(js: dict) -> bool:
+    return bool(js.get("features") or [])
 
 def vic_get_zone_bpa(lat: float, lng: float) -> Tuple[Optional[str], Optional[bool]]:
     x, y = (lng, lat)
     zone_code = None
     is_bpa = None
     try:
-        js = _query_point(f"{VICMAP_FS}/{PLAN_ZONE_LAYER}", x, y)
-        feats = js.get("features") or []
-        if feats:
-            attrs = feats[0].get("attributes") or {}
-            zone_code = (attrs.get("ZONE_CODE") or attrs.get("ZONE") or attrs.get("ZONING") or attrs.get("MAINZONE") or "").strip() or None
+        local = local_query("vic_zone", lat, lng)
+        zone_code = _zone_code(local) if local is not None else cached_lookup(
+            "zoning_vic", "plan_zone", lat, lng,
+            lambda: _zone_code(_query_point(f"{VICMAP_FS}/{PLAN_ZONE_LAYER}", x, y)))
     except Exception:
         pass
     try:
-        js = _query_point(f"{VICMAP_FS}/{BPA_LAYER}", x, y)
-        feats = js.get("features") or []
-        is_bpa = bool(feats)
+        local = local_query("vic_bpa", lat, lng)
+        is_bpa = _is_bpa(local) if local is not None else cached_lookup(
+            "zoning_vic", "bpa", lat, lng,
+            lambda: _is_bpa(_query_point(f"{VICMAP_FS}/{BPA_LAYER}", x, y)))
     except Exception:
         pass
     return zone_code, is_bpa
+
+async def _layer_async(fetch, overlay: str, layer: str, layer_id: int, parse, lat: float, lng: float, local_query):
+    local = local_query(overlay, lat, lng)
+    if local is not None:
+        return parse(local)
+    return await cached_fetch_async("zoning_vic", layer, lat, lng, fetch,
+                                    f"{VICMAP_FS}/{layer_id}/query", _query_params(lng, lat), parse)
+
+async def vic_get_zone_bpa_async(fetch, lat: float, lng: float,
+                                 local_query=local_query) -> Tuple[Optional[str], Optional[bool]]:
+    """Async twin of vic_get_zone_bpa; both layers are queried concurrently."""
+    zone_code, is_bpa = await asyncio.gather(
+        _layer_async(fetch, "vic_zone", "plan_zone", PLAN_ZONE_LAYER, _zone_code, lat, lng, local_query),
+        _layer_async(fetch, "vic_bpa", "bpa", BPA_LAYER, _is_bpa, lat, lng, local_query),
+        return_exceptions=True,
+    )
+    return (None if isinstance(zone_code, BaseException) else zone_code,
+            None if isinstance(is_bpa, BaseException) else is_bpa)
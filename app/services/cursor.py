@@ -0,0 +1,33 @@
+import base64
+import json
+from typing import Any, Dict
+
+class CursorError(ValueError):
+    pass
+
+def encode_cursor(sort_by: str, sort_dir: str, value: Any, prop_id: Any) -> str:
+    """Opaque pagination token: the sort the page used plus the last row's sort value and id."""
+    if isinstance(value, float) and value != value:
+        value = None
+    payload = {"s": sort_by, "d": sort_dir.lower(), "v": value, "id": None if prop_id is None else str(prop_id)}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(token: str, sort_by: str, sort_dir: str) -> Dict[str, Any]:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, dict) or "v" not in payload or "id" not in payload:
+            raise ValueError("missing fields")
+    except Exception:
+        raise CursorError("malformed cursor")
+    if payload.get("s") != sort_by or payload.get("d") != sort_dir.lower():
+        raise CursorError("cursor was issued for a different sort_by/sort_dir")
+    return payload
+
+def start_cursor(sort_by: str, sort_dir: str) -> str:
+    """Cursor for 'from the beginning of the dataset' (used when a page had no dataset rows)."""
+    return encode_cursor(sort_by, sort_dir, None, None)
+
+def is_start(payload: Dict[str, Any]) -> bool:
+    return payload.get("id") is None
@@ -1,26 +1,168 @@
-import pandas as pd
 import os
-from typing import Dict, Any, List, Optional
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+from .connectors import crime_csv
+from .snapshot import read_snapshot, snapshot_path, source_stamp, write_snapshot
+from .store import ListingStore
+
 BASE_DIR = os.path.dirname(__file__)
 DATA_CSV = os.path.join(BASE_DIR, "data", "sample_listings.csv")
 ENRICHED_CSV = os.path.join(BASE_DIR, "data", "enriched_listings.csv")
-def _load_csv(path: str) -> List[Dict[str, Any]]:
-    df = pd.read_csv(path)
-    df["id"] = df["id"].astype(str)
-    bool_cols = ["granny_flat_allowed","dual_occ_allowed","heritage_flag"]
-    for c in bool_cols:
-        if c in df.columns:
-            df[c] = df[c].astype(bool)
-    for c in ["zoning_code","dwelling_type","address","suburb","state","postcode"]:
-        if c in df.columns:
-            df[c] = df[c].fillna("")
-    return df.to_dict(orient="records")
-def _load() -> List[Dict[str, Any]]:
-    path = ENRICHED_CSV if os.path.exists(ENRICHED_CSV) else DATA_CSV
-    return _load_csv(path)
+def _source_path() -> str:
+    return ENRICHED_CSV if os.path.exists(ENRICHED_CSV) else DATA_CSV
+
+def _stamp(path: str) -> Optional[tuple]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+def _sources_stamp(path: str) -> tuple:
+    """Stamps of every file the scored store is built from: the listings CSV and the crime bands."""
+    return (_stamp(path), _stamp(crime_csv.CRIME_CSV))
+
+# The listings never change while a given CSV is on disk, so analytics and
+# indexes are built once per load and the scored store is shared by every
+# request. A snapshot is only ever replaced as a whole, never mutated in
+# place: a request that grabbed one keeps a consistent view even if a
+# reload lands halfway through it.
+_SNAPSHOT: Dict[str, Any] = {}
+_REBUILD_LOCK = threading.Lock()
+_WATCHER: Dict[str, Any] = {"thread": None, "stop": None, "wake": None}
+_FAILED: Dict[str, Any] = {"source": None}
+_STATUS: Dict[str, Any] = {"last_checked": None, "last_error": None, "reloads": 0, "failures": 0}
+
+RELOAD_INTERVAL = float(os.environ.get("DEALRADAR_RELOAD_INTERVAL", "5"))
+# Load from (and write) <csv>.snap next to the CSV; DEALRADAR_SNAPSHOT=0 reads CSV only.
+USE_SNAPSHOT = os.environ.get("DEALRADAR_SNAPSHOT", "1") != "0"
+
+def load_store(path: str) -> Tuple[ListingStore, str]:
+    """(store, "snapshot" | "csv") for a listings CSV, preferring its up-to-date binary snapshot.
+
+    After a CSV load the snapshot is written for the next worker; failing to
+    write it (read-only disk, say) is not an error.
+    """
+    if not USE_SNAPSHOT:
+        return ListingStore.from_csv(path), "csv"
+    source = source_stamp(path)
+    store = read_snapshot(snapshot_path(path), source)
+    if store is not None:
+        return store, "snapshot"
+    store = ListingStore.from_csv(path)
+    try:
+        write_snapshot(store, snapshot_path(path), source)
+    except OSError:
+        pass
+    return store, "csv"
+
+def _build(path: str, version: int) -> Dict[str, Any]:
+    stamp = _sources_stamp(path)
+    t0 = time.perf_counter()
+    store, origin = load_store(path)
+    return {"path": path, "stamp": stamp, "store": store, "version": version, "format": origin,
+            "loaded_at": time.time(), "build_seconds": time.perf_counter() - t0}
+
+def _swap(snapshot: Dict[str, Any]) -> None:
+    global _SNAPSHOT, DATASET
+    _SNAPSHOT = snapshot
+    DATASET = snapshot["store"]
+
+def _load() -> ListingStore:
+    _swap(_build(_source_path(), 1))
+    return _SNAPSHOT["store"]
+
+def reload_if_changed(force: bool = False) -> bool:
+    """Rebuild and swap in a new snapshot if the source or crime CSV changed. Returns True on a swap.
+
+    Called from the watcher thread; requests never wait on it. If the new file
+    can't be loaded (e.g. half written) the previous snapshot stays live.
+    """
+    path = _source_path()
+    stamp = _sources_stamp(path)
+    _STATUS["last_checked"] = time.time()
+    if not force and (path, stamp) in ((_SNAPSHOT.get("path"), _SNAPSHOT.get("stamp")), _FAILED.get("source")):
+        return False
+    if not _REBUILD_LOCK.acquire(blocking=False):
+        return False
+    try:
+        _swap(_build(path, _SNAPSHOT.get("version", 0) + 1))
+        _STATUS["reloads"] += 1
+        _STATUS["last_error"] = None
+        return True
+    except Exception as e:
+        _STATUS["failures"] += 1
+        _STATUS["last_error"] = f"{type(e).__name__}: {e}"
+        _FAILED["source"] = (path, stamp)  # don't retry the same broken file every poll
+        return False
+    finally:
+        _REBUILD_LOCK.release()
+
+def _watch(stop: threading.Event, wake: threading.Event, interval: float) -> None:
+    while not stop.is_set():
+        force = wake.is_set()
+        wake.clear()
+        reload_if_changed(force=force)
+        wake.wait(interval)
+
+def start_watcher(interval: Optional[float] = None) -> bool:
+    """Poll the dataset CSV in a daemon thread. DEALRADAR_RELOAD_INTERVAL=0 disables it."""
+    interval = RELOAD_INTERVAL if interval is None else interval
+    if interval <= 0 or (_WATCHER["thread"] is not None and _WATCHER["thread"].is_alive()):
+        return False
+    stop, wake = threading.Event(), threading.Event()
+    thread = threading.Thread(target=_watch, args=(stop, wake, interval), name="dataset-watcher", daemon=True)
+    _WATCHER.update(thread=thread, stop=stop, wake=wake)
+    thread.start()
+    return True
+
+def stop_watcher(timeout: float = 5.0) -> None:
+    thread, stop, wake = _WATCHER["thread"], _WATCHER["stop"], _WATCHER["wake"]
+    if thread is None:
+        return
+    stop.set()
+    wake.set()
+    thread.join(timeout)
+    _WATCHER.update(thread=None, stop=None, wake=None)
+
+def request_reload() -> bool:
+    """Ask the watcher to rebuild now, even if the file looks unchanged. False if it isn't running."""
+    if _WATCHER["wake"] is None:
+        return False
+    _WATCHER["wake"].set()
+    return True
+
+def dataset_info() -> Dict[str, Any]:
+    snap = _SNAPSHOT
+    thread = _WATCHER["thread"]
+    return {
+        "version": snap["version"],
+        "loaded_at": snap["loaded_at"],
+        "rows": len(snap["store"]),
+        "source": os.path.basename(snap["path"]),
+        "format": snap["format"],
+        "build_seconds": round(snap["build_seconds"], 3),
+        "watcher": {"running": bool(thread and thread.is_alive()), "interval": RELOAD_INTERVAL, **_STATUS},
+    }
+
+def current_store() -> ListingStore:
+    """The scored listing store of the live snapshot. Read-only; grab it once per request."""
+    return _SNAPSHOT["store"]
+
+def current_snapshot() -> Tuple[ListingStore, int]:
+    """(store, version) read together, so a concurrent reload can't pair them up wrongly."""
+    snap = _SNAPSHOT
+    return snap["store"], snap["version"]
+
 DATASET = _load()
 def get_property_by_id(prop_id: str) -> Optional[Dict[str, Any]]:
-    for row in DATASET:
-        if str(row.get("id")) == str(prop_id):
-            return dict(row)
-    return None
\ No newline at end of file
+    store = current_store()
+    i = store.position(prop_id)
+    return store.row(i) if i is not None else None
+
+def get_properties_by_ids(prop_ids: List[str], fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Rows for the ids that exist, in request order. Unknown ids are skipped."""
+    store = current_store()
+    return store.rows(store.positions(prop_ids), fields=fields)
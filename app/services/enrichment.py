@@ -0,0 +1,430 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import deque
+from itertools import islice
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+import pandas as pd
+
+from .connectors.flood_qld import LOCAL_OVERLAYS as QLD_OVERLAYS, qld_get_flood_risk_async
+from .connectors.http_pool import DEFAULT_TIMEOUT, aclose_async_client, get_async_client
+from .connectors.overlay_index import local_query, local_query_many
+from .connectors.zoning_vic import LOCAL_OVERLAYS as VIC_OVERLAYS, vic_get_zone_bpa_async
+
+ENRICH_COLUMNS = ["flood_risk", "bushfire_risk", "zoning_code"]
+RETRY_STATUS = {429, 500, 502, 503, 504}
+LOOKUP_STATES = ("QLD", "VIC")  # states enrich_row_async has overlay lookups for
+STATE_OVERLAYS = {"QLD": QLD_OVERLAYS, "VIC": VIC_OVERLAYS}  # local overlays each state's lookups consult
+LEDGER_BATCH = 500  # fingerprints per ledger query, under SQLite's bound-parameter limit
+
+log = logging.getLogger(__name__)
+
+# --- row logic (shared by the sequential and async paths) -------------------
+
+def lookup_point(row: Dict[str, Any]) -> Optional[Tuple[str, float, float]]:
+    """(STATE, lat, lng) when the row has usable coordinates, else None."""
+    lat, lng = row.get("lat"), row.get("lng")
+    if lat is None or lng is None or lat != lat or lng != lng:
+        return None
+    return str(row.get("state", "")).upper(), lat, lng
+
+def apply_flood(row: Dict[str, Any], flood_risk: Optional[str]) -> None:
+    if flood_risk:
+        row["flood_risk"] = flood_risk
+
+def apply_zone_bpa(row: Dict[str, Any], zone: Optional[str], bpa: Optional[bool]) -> None:
+    if zone:
+        row["zoning_code"] = zone
+    if bpa is not None:
+        row["bushfire_risk"] = "high" if bpa else (row.get("bushfire_risk") or "none")
+
+# --- per-host limits -----------------------------------------------------------
+
+class _TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            if self.updated is not None:
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self.tokens = 1.0
+                self.updated = loop.time()
+            self.tokens -= 1
+
+class AsyncFetcher:
+    """``await fetcher(url, params)`` -> JSON, with per-host concurrency, rate limit and retries.
+
+    Retries cover transport errors and 429/5xx answers, with exponential
+    backoff plus jitter (or the server's Retry-After when it sends one).
+    """
+
+    def __init__(self, client: httpx.AsyncClient, concurrency: int = 4, rate: float = 8.0,
+                 retries: int = 3, backoff: float = 0.5, timeout: float = DEFAULT_TIMEOUT):
+        self.client = client
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.rate = rate
+        self.retries = retries
+        self.backoff = backoff
+        self._hosts: Dict[str, Tuple[asyncio.Semaphore, _TokenBucket]] = {}
+        self.stats = {"requests": 0, "retries": 0, "failures": 0}
+
+    def _limits(self, url: str) -> Tuple[asyncio.Semaphore, _TokenBucket]:
+        host = urlsplit(url).netloc
+        if host not in self._hosts:
+            self._hosts[host] = (asyncio.Semaphore(self.concurrency), _TokenBucket(self.rate, self.concurrency))
+        return self._hosts[host]
+
+    def _delay(self, attempt: int, resp: Optional[httpx.Response]) -> float:
+        retry_after = resp.headers.get("Retry-After") if resp is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), 60.0)
+            except ValueError:
+                pass
+        return self.backoff * (2 ** attempt) * (0.5 + random.random())
+
+    async def __call__(self, url: str, params: Dict[str, Any]) -> Any:
+        sem, bucket = self._limits(url)
+        for attempt in range(self.retries + 1):
+            resp = None
+            try:
+                async with sem:
+                    await bucket.acquire()
+                    self.stats["requests"] += 1
+                    resp = await self.client.get(url, params=params, timeout=self.timeout)
+                if resp.status_code not in RETRY_STATUS:
+                    resp.raise_for_status()
+                    return resp.json()
+            except httpx.TransportError:
+                if attempt == self.retries:
+                    self.stats["failures"] += 1
+                    raise
+            except Exception:
+                self.stats["failures"] += 1
+                raise
+            if attempt == self.retries:
+                self.stats["failures"] += 1
+                resp.raise_for_status()
+            self.stats["retries"] += 1
+            await asyncio.sleep(self._delay(attempt, resp))
+
+# --- pipeline ----------------------------------------------------------------------
+
+Fetch = Callable[[str, Dict[str, Any]], Awaitable[Any]]
+
+async def enrich_row_async(fetch: Fetch, row: Dict[str, Any], local: Callable = local_query) -> Dict[str, Any]:
+    point = lookup_point(row)
+    if point is None:
+        return row
+    state, lat, lng = point
+    if state == "QLD":
+        apply_flood(row, await qld_get_flood_risk_async(fetch, lat, lng, local))
+    if state == "VIC":
+        zone, bpa = await vic_get_zone_bpa_async(fetch, lat, lng, local)
+        apply_zone_bpa(row, zone, bpa)
+    return row
+
+async def enrich_row_checked(fetch: Fetch, row: Dict[str, Any],
+                             local: Callable = local_query) -> Tuple[Dict[str, Any], bool]:
+    """enrich_row_async, plus whether every lookup it made succeeded.
+
+    The connectors turn a failed lookup into "unknown" or None instead of
+    raising, so failures are noticed on their way through ``fetch``.
+    """
+    failed: List[str] = []
+
+    async def tracked(url: str, params: Dict[str, Any]) -> Any:
+        try:
+            return await fetch(url, params)
+        except Exception:
+            failed.append(url)
+            raise
+
+    row = await enrich_row_async(tracked, row, local)
+    return row, not failed
+
+class ChunkOverlays:
+    """Local overlay answers for the chunks in flight: one vectorized
+    OverlayIndex.lookup_many per overlay and chunk instead of a lookup per row.
+
+    ``query`` stands in for local_query and falls back to it for other points.
+    """
+
+    def __init__(self):
+        self._answers: Dict[Tuple[str, float, float], Dict[str, Any]] = {}
+        self._chunks: Dict[int, List[Tuple[str, float, float]]] = {}
+
+    def add(self, n: int, rows: List[Dict[str, Any]]) -> None:
+        points = [p for p in map(lookup_point, rows) if p is not None]
+        keys = self._chunks.setdefault(n, [])
+        for state, names in STATE_OVERLAYS.items():
+            coords = [(lat, lng) for s, lat, lng in points if s == state]
+            if not coords:
+                continue
+            lats, lngs = zip(*coords)
+            for name in names:
+                answers = local_query_many(name, lats, lngs)
+                for lat, lng, answer in zip(lats, lngs, answers or ()):
+                    self._answers[(name, lat, lng)] = answer
+                    keys.append((name, lat, lng))
+
+    def drop(self, n: int) -> None:
+        for key in self._chunks.pop(n, ()):
+            self._answers.pop(key, None)
+
+    def query(self, name: str, lat: float, lng: float) -> Optional[Dict[str, Any]]:
+        answer = self._answers.get((name, lat, lng))
+        return answer if answer is not None else local_query(name, lat, lng)
+
+async def enrich_chunks(chunks: Iterable[List[Dict[str, Any]]], enrich: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+                        on_chunk: Callable[[int, List[Dict[str, Any]]], None],
+                        max_chunks_in_flight: int = 4, first: int = 0) -> None:
+    """Run ``enrich`` over each chunk's rows; ``on_chunk(n, rows)`` is called in input order.
+
+    Chunks are pulled lazily, so at most ``max_chunks_in_flight`` are held at
+    once. Several run together so slow rows at the end of one chunk don't idle
+    the connection pool, but output is only ever handed over in order.
+    """
+    pending: deque = deque()
+    try:
+        for n, chunk in enumerate(chunks, start=first):
+            pending.append((n, asyncio.ensure_future(asyncio.gather(*(enrich(r) for r in chunk)))))
+            if len(pending) >= max_chunks_in_flight:
+                done_n, task = pending.popleft()
+                on_chunk(done_n, await task)
+        while pending:
+            done_n, task = pending.popleft()
+            on_chunk(done_n, await task)
+    finally:
+        # on failure, don't leave later chunks running against closed resources
+        for _, task in pending:
+            task.cancel()
+        await asyncio.gather(*(task for _, task in pending), return_exceptions=True)
+
+# --- incremental re-enrichment ---------------------------------------------------
+
+def fingerprint(row: Dict[str, Any]) -> Optional[str]:
+    """Rows with the same state and coordinates (to ~0.1 m) get the same overlay answers.
+
+    None for rows that aren't looked up at all.
+    """
+    point = lookup_point(row)
+    if point is None or point[0] not in LOOKUP_STATES:
+        return None
+    state, lat, lng = point
+    return f"{state}|{float(lat):.6f}|{float(lng):.6f}"
+
+def _result(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {c: (None if (v := row.get(c)) is None or v != v else v) for c in ENRICH_COLUMNS}
+
+class EnrichmentLedger:
+    """Last enrichment result per row fingerprint, so re-runs skip rows that haven't moved.
+
+    Safe to call from worker threads; the async pipeline never touches it on
+    the event loop (see LedgerReads and enrich_csv_async).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS results (fp TEXT PRIMARY KEY, value TEXT, enriched_at REAL)")
+
+    def get(self, fp: str, max_age: float) -> Optional[Dict[str, Any]]:
+        return self.get_many([fp], max_age).get(fp)
+
+    def get_many(self, fps: List[str], max_age: float) -> Dict[str, Dict[str, Any]]:
+        """Recorded results for those of ``fps`` enriched within ``max_age`` seconds."""
+        since, found = time.time() - max_age, {}
+        with self._lock:
+            for start in range(0, len(fps), LEDGER_BATCH):
+                batch = fps[start:start + LEDGER_BATCH]
+                found.update(self._db.execute(
+                    f"SELECT fp, value FROM results WHERE enriched_at>=? AND fp IN ({','.join('?' * len(batch))})",
+                    (since, *batch)).fetchall())
+        return {fp: json.loads(v) for fp, v in found.items()}
+
+    def put_many(self, items: List[Tuple[str, Dict[str, Any]]]) -> None:
+        if not items:
+            return
+        now = time.time()
+        with self._lock, self._db:
+            self._db.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+                                 [(fp, json.dumps(v), now) for fp, v in items])
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+class LedgerReads:
+    """``await reads.get(fp)`` -> the ledger's recorded result, or None.
+
+    Lookups started in the same pass of the event loop (the rows of the chunks
+    enrich_chunks starts together) share one get_many on a worker thread.
+    """
+
+    def __init__(self, ledger: EnrichmentLedger, max_age: float):
+        self.ledger = ledger
+        self.max_age = max_age
+        self._fps: List[str] = []
+        self._batch: Optional[asyncio.Future] = None
+        self.tasks: List[asyncio.Future] = []  # awaited before the ledger is closed
+
+    async def get(self, fp: str) -> Optional[Dict[str, Any]]:
+        if self._batch is None:
+            self._fps = []
+            self._batch = asyncio.ensure_future(self._run(self._fps))
+            self.tasks = [t for t in self.tasks if not t.done()] + [self._batch]
+        self._fps.append(fp)
+        return (await asyncio.shield(self._batch)).get(fp)
+
+    async def _run(self, fps: List[str]) -> Dict[str, Dict[str, Any]]:
+        await asyncio.sleep(0)  # let the rest of the rows queue up first
+        self._batch = None
+        return await asyncio.to_thread(self.ledger.get_many, fps, self.max_age)
+
+# --- checkpointed CSV run ---------------------------------------------------------
+
+def _stamp(path: str) -> List[int]:
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+def _load_checkpoint(ckpt_path: str, tmp_path: str, expect: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The saved progress if it belongs to this input/settings and the partial output is intact."""
+    try:
+        with open(ckpt_path) as f:
+            ckpt = json.load(f)
+        if any(ckpt.get(k) != v for k, v in expect.items()) or os.path.getsize(tmp_path) < ckpt["bytes"]:
+            return None
+        return ckpt
+    except (OSError, ValueError, KeyError):
+        return None
+
+def _save_checkpoint(ckpt_path: str, ckpt: Dict[str, Any]) -> None:
+    with open(ckpt_path + ".new", "w") as f:
+        json.dump(ckpt, f)
+    os.replace(ckpt_path + ".new", ckpt_path)
+
+def _append_chunk(path: str, columns: List[str], rows: List[Dict[str, Any]], first: bool) -> int:
+    """Append rows (with the header if ``first``), fsync, and return the file size."""
+    with open(path, "w" if first else "a", newline="") as f:
+        pd.DataFrame(rows, columns=columns).to_csv(f, header=first, index=False)
+        f.flush()
+        os.fsync(f.fileno())
+        return f.tell()
+
+async def enrich_csv_async(in_path: str, out_path: str, concurrency: int = 4, rate: float = 8.0,
+                           retries: int = 3, chunk_size: int = 500, timeout: float = 15.0,
+                           resume: bool = True, max_age_days: float = 30.0,
+                           ledger_path: Optional[str] = None) -> Dict[str, int]:
+    """Stream ``in_path`` through enrichment into ``out_path`` chunk by chunk.
+
+    Each finished chunk is appended to ``out_path + ".tmp"`` and recorded in
+    ``out_path + ".ckpt"``; a later run over the same input resumes after the
+    last recorded chunk. Rows whose fingerprint was enriched within
+    ``max_age_days`` (0 = never skip) reuse the ledger's answer instead of
+    being looked up again; rows with a failed lookup are never recorded
+    there. The output file is swapped in only when complete.
+    """
+    tmp_path, ckpt_path = out_path + ".tmp", out_path + ".ckpt"
+    header = list(pd.read_csv(in_path, nrows=0).columns)
+    columns = header + [c for c in ENRICH_COLUMNS if c not in header]
+    expect = {"input": _stamp(in_path), "chunk_size": chunk_size, "columns": columns}
+    ckpt = _load_checkpoint(ckpt_path, tmp_path, expect) if resume else None
+    if ckpt is not None:
+        with open(tmp_path, "r+b") as f:
+            f.truncate(ckpt["bytes"])  # drop anything written after the last checkpoint
+        log.info("  resuming after chunk %d (%d rows)", ckpt["chunks"], ckpt["rows"])
+    else:
+        ckpt = dict(expect, chunks=0, rows=0, bytes=0)
+    resumed = ckpt["rows"]
+
+    ledger = EnrichmentLedger(ledger_path or os.path.join(os.path.dirname(os.path.abspath(out_path)),
+                                                          "enrichment_ledger.sqlite"))
+    max_age = max_age_days * 86400
+    reads = LedgerReads(ledger, max_age)
+    fresh: List[Tuple[str, Dict[str, Any]]] = []
+    writes: List[asyncio.Future] = []
+    counts = {"skipped": 0, "incomplete": 0}
+    overlays = ChunkOverlays()
+
+    def chunks() -> Iterator[List[Dict[str, Any]]]:
+        # skip finished chunks through the same reader: blank lines and quoted
+        # fields that span lines mean a line count can miss a record boundary
+        reader = pd.read_csv(in_path, chunksize=chunk_size)
+        for n, frame in enumerate(islice(reader, ckpt["chunks"], None), start=ckpt["chunks"]):
+            for col in ENRICH_COLUMNS:
+                if col not in frame.columns: frame[col] = None
+            rows = frame.to_dict(orient="records")
+            overlays.add(n, rows)
+            yield rows
+
+    client = get_async_client()
+    try:
+        fetch = AsyncFetcher(client, concurrency=concurrency, rate=rate, retries=retries, timeout=timeout)
+
+        async def enrich(row: Dict[str, Any]) -> Dict[str, Any]:
+            fp = fingerprint(row)
+            if fp is None:
+                return row
+            if max_age > 0:
+                hit = await reads.get(fp)
+                if hit is not None:
+                    counts["skipped"] += 1
+                    row.update(hit)
+                    return row
+            row, ok = await enrich_row_checked(fetch, row, overlays.query)
+            if ok:
+                fresh.append((fp, _result(row)))
+            else:
+                counts["incomplete"] += 1  # looked up again next run, not replayed from the ledger
+            return row
+
+        def on_chunk(n: int, done: List[Dict[str, Any]]) -> None:
+            ckpt["bytes"] = _append_chunk(tmp_path, columns, done, first=(n == 0))
+            ckpt["chunks"], ckpt["rows"] = n + 1, ckpt["rows"] + len(done)
+            overlays.drop(n)
+            if fresh:
+                writes.append(asyncio.ensure_future(asyncio.to_thread(ledger.put_many, list(fresh))))
+                fresh.clear()
+            _save_checkpoint(ckpt_path, ckpt)
+            log.info("  chunk %d: %d rows", n + 1, ckpt["rows"])
+
+        await enrich_chunks(chunks(), enrich, on_chunk, first=ckpt["chunks"])
+        await asyncio.gather(*writes)
+        if ckpt["chunks"] == 0:
+            _append_chunk(tmp_path, columns, [], first=True)
+    finally:
+        await asyncio.gather(*writes, *reads.tasks, return_exceptions=True)
+        ledger.close()
+        await aclose_async_client()
+    os.replace(tmp_path, out_path)
+    if os.path.exists(ckpt_path):
+        os.remove(ckpt_path)
+    return {"rows": ckpt["rows"], "resumed": resumed, **counts, **fetch.stats}
+
+def enrich_csv(in_path: str, out_path: str, **kwargs) -> Dict[str, int]:
+    return asyncio.run(enrich_csv_async(in_path, out_path, **kwargs))
@@ -0,0 +1,258 @@
+import math
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Fields /properties filters on. Range fields map to the value a missing cell
+# counts as (filters_apply treats a missing yield/vacancy as 0); None means
+# rows with a missing value never match a bound on that field.
+RANGE_FIELDS: Dict[str, Optional[float]] = {
+    "gross_yield": 0.0,
+    "net_yield": 0.0,
+    "cagr5": 0.0,
+    "vacancy": 0.0,
+    "list_price": None,
+}
+LABEL_FIELDS = ["flood_risk", "bushfire_risk", "suburb", "state"]
+GEO_INDEX = "geo"
+GRID_CELL_DEG = 0.02  # ~2.2 km of latitude per grid cell
+EARTH_RADIUS_KM = 6371.0088
+
+BBox = Tuple[float, float, float, float]  # (min_lat, min_lng, max_lat, max_lng)
+
+def _norm_label(v: Any) -> str:
+    return str(v).strip().lower()
+
+class SortedIndex:
+    """Row positions ordered by value, for range predicates via binary search."""
+
+    def __init__(self, values: np.ndarray, fill: Optional[float], order: Optional[np.ndarray] = None):
+        v = np.asarray(values, dtype=float)
+        if fill is not None:
+            v = np.where(np.isnan(v), fill, v)
+        if order is None:
+            present = np.flatnonzero(~np.isnan(v))
+            order = present[np.argsort(v[present], kind="stable")]
+        self.order = order
+        self.sorted = v[self.order]
+        self.values = v
+
+    def _slice(self, lo: Optional[float], hi: Optional[float]) -> slice:
+        start = 0 if lo is None else int(np.searchsorted(self.sorted, lo, side="left"))
+        stop = len(self.sorted) if hi is None else int(np.searchsorted(self.sorted, hi, side="right"))
+        return slice(start, max(start, stop))
+
+    def count(self, lo: Optional[float], hi: Optional[float]) -> int:
+        s = self._slice(lo, hi)
+        return s.stop - s.start
+
+    def positions(self, lo: Optional[float], hi: Optional[float]) -> np.ndarray:
+        return np.sort(self.order[self._slice(lo, hi)])
+
+    def test(self, idx: np.ndarray, lo: Optional[float], hi: Optional[float]) -> np.ndarray:
+        v = self.values[idx]
+        mask = ~np.isnan(v)
+        if lo is not None:
+            mask &= v >= lo
+        if hi is not None:
+            mask &= v <= hi
+        return mask
+
+class LabelIndex:
+    """Row positions grouped by (case-insensitive) label, i.e. a compressed bitmap per value."""
+
+    def __init__(self, column: Any, order: Optional[np.ndarray] = None):
+        cat = column if isinstance(column, pd.Categorical) else pd.Categorical(np.asarray(column, dtype=object))
+        self.codes = cat.codes
+        self.order = np.argsort(self.codes, kind="stable") if order is None else order
+        self.offsets = np.searchsorted(self.codes[self.order], np.arange(len(cat.categories) + 1))
+        self._labels: Dict[str, List[int]] = {}
+        for code, label in enumerate(cat.categories):
+            self._labels.setdefault(_norm_label(label), []).append(code)
+
+    def codes_for(self, value: str) -> List[int]:
+        return self._labels.get(_norm_label(value), [])
+
+    def count(self, value: str) -> int:
+        return int(sum(self.offsets[c + 1] - self.offsets[c] for c in self.codes_for(value)))
+
+    def positions(self, value: str) -> np.ndarray:
+        parts = [self.order[self.offsets[c]:self.offsets[c + 1]] for c in self.codes_for(value)]
+        return np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+
+    def test(self, idx: np.ndarray, value: str) -> np.ndarray:
+        return np.isin(self.codes[idx], self.codes_for(value))
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance in km; works elementwise on arrays."""
+    p1, p2 = np.radians(lat1), np.radians(lat2)
+    a = np.sin((p2 - p1) / 2) ** 2 + np.cos(p1) * np.cos(p2) * np.sin(np.radians(lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+def radius_bbox(lat: float, lng: float, radius_km: float) -> BBox:
+    """Smallest lat/lng box containing every point within ``radius_km`` of (lat, lng)."""
+    d = radius_km / EARTH_RADIUS_KM
+    dlat = math.degrees(d)
+    s = math.sin(d) / max(math.cos(math.radians(lat)), 1e-12)
+    dlng = math.degrees(math.asin(s)) if s < 1 else 180.0
+    return lat - dlat, lng - dlng, lat + dlat, lng + dlng
+
+class GridIndex:
+    """Row positions bucketed by lat/lng grid cell, cells numbered row-major.
+
+    A bounding box covers one contiguous run of cell ids per grid row, so its
+    candidates are a binary search per row band; rows without coordinates
+    are left out.
+    """
+
+    def __init__(self, lat: np.ndarray, lng: np.ndarray, order: Optional[np.ndarray] = None,
+                 cell: float = GRID_CELL_DEG):
+        self.lat = np.asarray(lat, dtype=float)
+        self.lng = np.asarray(lng, dtype=float)
+        self.cell = cell
+        present = ~(np.isnan(self.lat) | np.isnan(self.lng))
+        r = np.floor(self.lat[present] / cell).astype(np.int64)
+        c = np.floor(self.lng[present] / cell).astype(np.int64)
+        self.r0, self.c0 = (int(r.min()), int(c.min())) if len(r) else (0, 0)
+        self.nrows = int(r.max()) - self.r0 + 1 if len(r) else 0
+        self.ncols = int(c.max()) - self.c0 + 1 if len(c) else 0
+        ids = np.full(len(self.lat), -1, dtype=np.int64)
+        ids[present] = (r - self.r0) * self.ncols + (c - self.c0)
+        if order is None:
+            pos = np.flatnonzero(present)
+            order = pos[np.argsort(ids[pos], kind="stable")]
+        self.order = order
+        self.sorted = ids[order]
+
+    def candidates(self, bbox: BBox) -> np.ndarray:
+        """Positions (unsorted) in the cells overlapping ``bbox``: a superset of the rows inside it."""
+        min_lat, min_lng, max_lat, max_lng = bbox
+        r_lo = max(math.floor(min_lat / self.cell) - self.r0, 0)
+        r_hi = min(math.floor(max_lat / self.cell) - self.r0, self.nrows - 1)
+        c_lo = max(math.floor(min_lng / self.cell) - self.c0, 0)
+        c_hi = min(math.floor(max_lng / self.cell) - self.c0, self.ncols - 1)
+        if r_lo > r_hi or c_lo > c_hi:
+            return np.empty(0, dtype=np.int64)
+        rows = np.arange(r_lo, r_hi + 1, dtype=np.int64) * self.ncols
+        starts = np.searchsorted(self.sorted, rows + c_lo, side="left")
+        lengths = np.searchsorted(self.sorted, rows + c_hi, side="right") - starts
+        total = int(lengths.sum())
+        # gather the runs order[start:start + length] without a Python loop
+        shift = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        return self.order[shift + np.arange(total)]
+
+    def test(self, idx: np.ndarray, bbox: BBox, center: Optional[Tuple[float, float]] = None,
+             radius_km: Optional[float] = None) -> np.ndarray:
+        lat, lng = self.lat[idx], self.lng[idx]
+        mask = (lat >= bbox[0]) & (lat <= bbox[2]) & (lng >= bbox[1]) & (lng <= bbox[3])
+        if radius_km is not None:
+            mask[mask] = haversine_km(center[0], center[1], lat[mask], lng[mask]) <= radius_km
+        return mask
+
+class Predicate:
+    """One filter clause. ``estimate`` is the match count (sorted and label indexes count
+    exactly in O(log n) or O(1)); ``exact`` is False when it is only an upper bound."""
+
+    exact = True
+
+    def __init__(self, name: str, estimate: int):
+        self.name = name
+        self.estimate = estimate
+
+    def positions(self) -> np.ndarray:
+        raise NotImplementedError
+
+    def test(self, idx: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+class RangePredicate(Predicate):
+    def __init__(self, name: str, index: SortedIndex, lo: Optional[float] = None, hi: Optional[float] = None):
+        super().__init__(name, index.count(lo, hi))
+        self.index, self.lo, self.hi = index, lo, hi
+
+    def positions(self) -> np.ndarray:
+        return self.index.positions(self.lo, self.hi)
+
+    def test(self, idx: np.ndarray) -> np.ndarray:
+        return self.index.test(idx, self.lo, self.hi)
+
+class LabelPredicate(Predicate):
+    def __init__(self, name: str, index: LabelIndex, value: str, negate: bool = False):
+        n = len(index.codes)
+        hits = index.count(value)
+        super().__init__(name, n - hits if negate else hits)
+        self.index, self.value, self.negate = index, value, negate
+
+    def positions(self) -> np.ndarray:
+        if not self.negate:
+            return self.index.positions(self.value)
+        return np.flatnonzero(~self.index.test(np.arange(len(self.index.codes)), self.value))
+
+    def test(self, idx: np.ndarray) -> np.ndarray:
+        mask = self.index.test(idx, self.value)
+        return ~mask if self.negate else mask
+
+class GeoPredicate(Predicate):
+    """Rows inside ``bbox`` and, with ``radius_km``, within that distance of ``center``.
+
+    The estimate counts the grid cells' rows, an upper bound on the matches.
+    """
+
+    exact = False
+
+    def __init__(self, name: str, index: GridIndex, bbox: Optional[BBox] = None,
+                 center: Optional[Tuple[float, float]] = None, radius_km: Optional[float] = None):
+        if bbox is None:
+            bbox = radius_bbox(center[0], center[1], radius_km)
+        self.index, self.bbox, self.center, self.radius_km = index, bbox, center, radius_km
+        self._cand = index.candidates(bbox)
+        super().__init__(name, len(self._cand))
+
+    def positions(self) -> np.ndarray:
+        return np.sort(self._cand[self.test(self._cand)])
+
+    def test(self, idx: np.ndarray) -> np.ndarray:
+        return self.index.test(idx, self.bbox, self.center, self.radius_km)
+
+# When the next predicate matches at most this many times the current
+# candidate count, intersecting its position list is cheaper than gathering.
+INTERSECT_RATIO = 4
+
+def plan(n_rows: int, predicates: Sequence[Predicate]) -> np.ndarray:
+    """Sorted positions matching every predicate.
+
+    The most selective predicate seeds the candidate set; the rest are applied
+    cheapest-first, either by intersecting their (small) position lists or by
+    testing only the surviving candidates.
+    """
+    if not predicates:
+        return np.arange(n_rows)
+    ordered = sorted(predicates, key=lambda p: p.estimate)
+    driver, rest = ordered[0], ordered[1:]
+    cand = driver.positions() if driver.estimate < n_rows or not driver.exact else np.arange(n_rows)
+    for p in rest:
+        if not len(cand):
+            break
+        if p.estimate >= n_rows and p.exact:
+            continue  # matches everything
+        if p.estimate <= len(cand) * INTERSECT_RATIO:
+            cand = np.intersect1d(cand, p.positions(), assume_unique=True)
+        else:
+            cand = cand[p.test(cand)]
+    return cand
+
+def build_indexes(numeric, label_column, orders: Optional[Dict[str, np.ndarray]] = None) -> Dict[str, Any]:
+    """Build every index for a store given column accessors (name -> array).
+
+    ``orders`` holds previously computed ``index.order`` arrays (e.g. from a
+    snapshot) so the sorts can be skipped.
+    """
+    orders = orders or {}
+    out: Dict[str, Any] = {}
+    for name, fill in RANGE_FIELDS.items():
+        out[name] = SortedIndex(numeric(name), fill, orders.get(name))
+    for name in LABEL_FIELDS:
+        out[name] = LabelIndex(label_column(name), orders.get(name))
+    out[GEO_INDEX] = GridIndex(numeric("lat"), numeric("lng"), orders.get(GEO_INDEX))
+    return out
@@ -0,0 +1,262 @@
+import bisect
+import os
+import sys
+import threading
+import time
+from collections import Counter as _Tally
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs
+
+from fastapi.responses import JSONResponse
+
+# Per-request stage timing, Prometheus metrics and an on-demand sampling profiler.
+#
+#   with stage("filter"):            # adds to this request's Server-Timing header
+#       idx = store.filter(...)      # and to dealradar_stage_seconds{stage="filter"}
+#   count_rows("filter", len(idx))   # dealradar_stage_rows_total{stage="filter"}
+#
+# InstrumentMiddleware gives each request its own timings dict (a contextvar,
+# which run_in_threadpool carries into worker threads), writes Server-Timing
+# on the way out and records request latency. With ?profile=1 (admin only)
+# the request runs under a sampling profiler and the response is the folded
+# stacks ("frame;frame;frame count" lines) for flamegraph.pl or speedscope.
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PROFILE_INTERVAL = float(os.environ.get("DEALRADAR_PROFILE_INTERVAL", "0.001"))  # seconds between samples
+PROFILE_MAX_SECONDS = 30.0
+
+# --- metrics ---------------------------------------------------------------------------
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    esc = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, esc)) + "}"
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> List[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            out += [f"{self.name}{_labels(self.labels, k)} {v:g}" for k, v in sorted(self._values.items())]
+        return out
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], List[float]] = {}  # per-bucket counts..., +Inf count, sum
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(label_values)
+            if s is None:
+                s = self._series[label_values] = [0.0] * (len(self.buckets) + 2)
+            s[i] += 1
+            s[-1] += value
+
+    def render(self) -> List[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labels + ("le",)
+        with self._lock:
+            for key, s in sorted(self._series.items()):
+                total = 0.0
+                for bound, n in zip(self.buckets + (float("inf"),), s):
+                    total += n
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    out.append(f"{self.name}_bucket{_labels(names, key + (le,))} {total:g}")
+                out.append(f"{self.name}_sum{_labels(self.labels, key)} {s[-1]:.6f}")
+                out.append(f"{self.name}_count{_labels(self.labels, key)} {total:g}")
+        return out
+
+REQUEST_SECONDS = Histogram("dealradar_request_seconds", "HTTP request latency.", ("method", "route", "status"))
+STAGE_SECONDS = Histogram("dealradar_stage_seconds", "Time spent in a request stage.", ("stage",))
+STAGE_ROWS = Counter("dealradar_stage_rows_total", "Rows produced by a request stage.", ("stage",))
+METRICS: List[Any] = [REQUEST_SECONDS, STAGE_SECONDS, STAGE_ROWS]
+_GAUGES: List[Callable[[], List[str]]] = []
+
+def gauges(fn: Callable[[], Dict[str, float]], prefix: str, help: str) -> None:
+    """Export ``fn()``'s numbers as ``<prefix>_<key>`` gauges, read at scrape time."""
+    def render() -> List[str]:
+        out = []
+        for k, v in fn().items():
+            if isinstance(v, (int, float)) and not isinstance(v, bool):
+                out += [f"# HELP {prefix}_{k} {help}", f"# TYPE {prefix}_{k} gauge", f"{prefix}_{k} {v:g}"]
+        return out
+    _GAUGES.append(render)
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for m in METRICS:
+        lines += m.render()
+    for g in _GAUGES:
+        lines += g()
+    return "\n".join(lines) + "\n"
+
+# --- per-request stages ----------------------------------------------------------------
+
+_TIMINGS: ContextVar[Optional[Dict[str, List]]] = ContextVar("dealradar_timings", default=None)
+_PROFILE: ContextVar[Optional["Sampler"]] = ContextVar("dealradar_profile", default=None)
+
+@contextmanager
+def stage(name: str, desc: Optional[str] = None) -> Iterator[None]:
+    profile = _PROFILE.get()
+    if profile is not None:
+        profile.watch(threading.get_ident())
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - t0, desc)
+
+def record(name: str, seconds: float, desc: Optional[str] = None) -> None:
+    """Add ``seconds`` to stage ``name`` for this request (repeated stages accumulate)."""
+    STAGE_SECONDS.observe(seconds, name)
+    timings = _TIMINGS.get()
+    if timings is not None:
+        t = timings.setdefault(name, [0.0, None])
+        t[0] += seconds
+        if desc:
+            t[1] = desc
+
+def mark(name: str, desc: str) -> None:
+    """A zero-duration Server-Timing entry, e.g. mark("cache", "hit")."""
+    timings = _TIMINGS.get()
+    if timings is not None:
+        timings.setdefault(name, [0.0, None])[1] = desc
+
+def count_rows(name: str, n: int) -> None:
+    STAGE_ROWS.inc(name, amount=n)
+
+def profiling() -> bool:
+    return _PROFILE.get() is not None
+
+def server_timing(timings: Dict[str, List], total: Optional[float] = None) -> str:
+    parts = []
+    for name, (seconds, desc) in timings.items():
+        parts.append(f"{name};dur={seconds * 1000:.2f}" + (f';desc="{desc}"' if desc else ""))
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+# --- sampling profiler -----------------------------------------------------------------
+
+def _frame_label(code) -> str:
+    path = code.co_filename.replace("\\", "/").rsplit("/", 2)
+    return f"{code.co_name} ({'/'.join(path[-2:])}:{code.co_firstlineno})"
+
+class Sampler:
+    """Samples the stacks of the threads a request runs on (its event-loop thread plus
+    any worker thread that enters a stage) every ``interval`` seconds."""
+
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        self.threads = {threading.get_ident()}
+        self.stacks: _Tally = _Tally()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="dealradar-profiler", daemon=True)
+
+    def watch(self, ident: int) -> None:
+        self.threads.add(ident)
+
+    def start(self) -> "Sampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        deadline = time.monotonic() + PROFILE_MAX_SECONDS
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            frames = sys._current_frames()
+            for ident in list(self.threads):
+                f = frames.get(ident)
+                stack = []
+                while f is not None:
+                    stack.append(_frame_label(f.f_code))
+                    f = f.f_back
+                if stack:
+                    self.stacks[";".join(reversed(stack))] += 1
+                    self.samples += 1
+
+    def folded(self) -> str:
+        return "".join(f"{s} {n}\n" for s, n in self.stacks.most_common())
+
+# --- middleware ------------------------------------------------------------------------
+
+def _route(scope: Dict[str, Any]) -> str:
+    endpoint = scope.get("endpoint")
+    app = scope.get("app")
+    for r in getattr(app, "routes", ()):
+        if getattr(r, "endpoint", None) is endpoint and endpoint is not None:
+            return r.path
+    return "unmatched"
+
+class InstrumentMiddleware:
+    """Pure ASGI (streaming bodies pass through untouched)."""
+
+    def __init__(self, app, profile_allowed: Optional[Callable[[Dict[str, str]], bool]] = None):
+        self.app = app
+        self.profile_allowed = profile_allowed or (lambda headers: False)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        timings: Dict[str, List] = {}
+        token = _TIMINGS.set(timings)
+        t0 = time.perf_counter()
+        status = [500]
+        sampler = None
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        if query.get("profile", ["0"])[-1].lower() in ("1", "true", "yes"):
+            headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+            if not self.profile_allowed(headers):
+                _TIMINGS.reset(token)
+                return await JSONResponse(status_code=403, content={"error": "admin token required"})(scope, receive, send)
+            sampler = Sampler()
+            ptoken = _PROFILE.set(sampler)
+            sampler.start()
+
+        async def send_timed(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                if sampler is None:
+                    value = server_timing(timings, time.perf_counter() - t0).encode("latin-1")
+                    message = {**message, "headers": list(message.get("headers", [])) + [(b"server-timing", value)]}
+            if sampler is None:
+                await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            elapsed = time.perf_counter() - t0
+            REQUEST_SECONDS.observe(elapsed, scope.get("method", ""), _route(scope), str(status[0]))
+            _TIMINGS.reset(token)
+            if sampler is not None:
+                sampler.stop()
+                _PROFILE.reset(ptoken)
+        if sampler is not None:
+            body = sampler.folded().encode("utf-8")
+            await send({"type": "http.response.start", "status": 200, "headers": [
+                (b"content-type", b"text/plain; charset=utf-8"),
+                (b"content-length", str(len(body)).encode()),
+                (b"server-timing", server_timing(timings, elapsed).encode("latin-1")),
+                (b"x-profile-samples", str(sampler.samples).encode()),
+                (b"x-profile-status", str(status[0]).encode()),
+            ]})
+            await send({"type": "http.response.body", "body": body})
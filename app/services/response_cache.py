@@ -0,0 +1,97 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import AbstractSet, Any, Dict, Optional, Tuple
+
+# In-process LRU + TTL cache of serialized responses. Entries are keyed by the
+# normalized query plus the dataset version, so a reload makes every older
+# entry unreachable; the cache also drops them eagerly on the first put for a
+# new version.
+
+CACHE_TTL = float(os.environ.get("DEALRADAR_CACHE_TTL", "60"))
+CACHE_MAX_ENTRIES = int(os.environ.get("DEALRADAR_CACHE_ENTRIES", "512"))
+
+# params whose filter matches case-insensitively (LabelIndex); sort_by, fields
+# and cursors are case-sensitive and stay as sent
+CASE_INSENSITIVE = frozenset({"suburb", "state"})
+
+def _norm(v: Any, fold_case: bool = False) -> Any:
+    if isinstance(v, str):
+        return (v.strip().lower() or None) if fold_case else v  # ?state= filters like no state at all
+    if isinstance(v, bool) or v is None:
+        return v
+    if isinstance(v, (int, float)):
+        return float(v)
+    return v
+
+def cache_key(version: Any, params: Dict[str, Any], case_insensitive: AbstractSet[str] = CASE_INSENSITIVE) -> Tuple:
+    """Hashable key: ``min_price=100000`` and ``min_price=100000.0``, or ``state=NSW`` and ``state=nsw ``, collide."""
+    return (version,) + tuple(sorted((k, _norm(v, k in case_insensitive)) for k, v in params.items()))
+
+def etag_for(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    # weak comparison, as RFC 9110 asks for If-None-Match
+    return "*" in tags or etag in (t[2:] if t.startswith("W/") else t for t in tags)
+
+class CachedResponse:
+    __slots__ = ("body", "etag", "headers", "expires")
+
+    def __init__(self, body: bytes, headers: Dict[str, str], expires: float):
+        self.body = body
+        self.etag = etag_for(body)
+        self.headers = headers
+        self.expires = expires
+
+class ResponseCache:
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: float = CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._version: Any = None
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, key: Tuple) -> Optional[CachedResponse]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires < now:
+                if entry is not None:
+                    del self._entries[key]
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry
+
+    def put(self, key: Tuple, body: bytes, headers: Optional[Dict[str, str]] = None) -> CachedResponse:
+        entry = CachedResponse(body, dict(headers or {}), time.monotonic() + self.ttl)
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return entry
+        with self._lock:
+            if key[0] != self._version:
+                # first response for a new dataset version: older entries can't be hit again
+                if self._entries:
+                    self.stats["invalidations"] += 1
+                self._entries.clear()
+                self._version = key[0]
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
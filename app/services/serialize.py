@@ -0,0 +1,124 @@
+import csv
+import io
+import json
+import math
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+from fastapi.responses import JSONResponse
+
+from .analytics import COMPONENTS
+
+try:  # optional: several times faster than json.dumps for big pages
+    import orjson
+except ImportError:
+    orjson = None
+
+# Row serialization for listing responses. Rows only ever hold str/int/bool/
+# float/None plus the score_breakdown dict, so they are cleaned in one flat
+# pass instead of jsonable_encoder's recursive walk: NaN/inf become null and
+# floats are rounded to FLOAT_DIGITS places.
+
+FLOAT_DIGITS = 6
+_PLAIN = (str, int, bool, type(None))
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """``"id,address, deal_score"`` -> ["id", "address", "deal_score"]; None/empty means every field."""
+    if not fields:
+        return None
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    return list(dict.fromkeys(names)) or None
+
+def clean_value(v: Any, ndigits: int = FLOAT_DIGITS) -> Any:
+    if v.__class__ is float:
+        return round(v, ndigits) if math.isfinite(v) else None
+    if isinstance(v, _PLAIN):
+        return v
+    if isinstance(v, dict):
+        return {str(k): clean_value(x, ndigits) for k, x in v.items()}
+    if isinstance(v, (list, tuple)):
+        return [clean_value(x, ndigits) for x in v]
+    if isinstance(v, np.generic):
+        return clean_value(v.item(), ndigits)
+    if isinstance(v, float):
+        return clean_value(float(v), ndigits)
+    return str(v)
+
+def clean_row(row: Dict[str, Any], fields: Optional[Sequence[str]] = None, ndigits: int = FLOAT_DIGITS) -> Dict[str, Any]:
+    """JSON-safe copy of a row, projected to ``fields`` (missing fields are skipped)."""
+    out = {}
+    items = row.items() if fields is None else ((k, row[k]) for k in fields if k in row)
+    for k, v in items:
+        cls = v.__class__
+        if cls is float:
+            out[k] = round(v, ndigits) if math.isfinite(v) else None
+        elif cls is str or cls is int or cls is bool or v is None:
+            out[k] = v
+        else:
+            out[k] = clean_value(v, ndigits)
+    return out
+
+def dumps(content: Any) -> bytes:
+    """Serialize already-clean content."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+def dumps_rows(rows: Iterable[Dict[str, Any]], fields: Optional[Sequence[str]] = None,
+               ndigits: int = FLOAT_DIGITS) -> bytes:
+    return dumps([clean_row(r, fields, ndigits) for r in rows])
+
+class RowsResponse(JSONResponse):
+    """JSONResponse for a list of listing rows (or a single row dict)."""
+
+    def __init__(self, content: Any, fields: Optional[Sequence[str]] = None, ndigits: int = FLOAT_DIGITS, **kwargs):
+        self.fields = fields
+        self.ndigits = ndigits
+        super().__init__(content, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, dict):
+            return dumps(clean_row(content, self.fields, self.ndigits))
+        return dumps_rows(content, self.fields, self.ndigits)
+
+# --- streaming export ---------------------------------------------------------------
+
+def ndjson_lines(rows: Iterable[Dict[str, Any]], fields: Optional[Sequence[str]] = None,
+                 ndigits: int = FLOAT_DIGITS) -> bytes:
+    return b"".join(dumps(clean_row(r, fields, ndigits)) + b"\n" for r in rows)
+
+def csv_columns(names: Sequence[str], fields: Optional[Sequence[str]] = None) -> List[str]:
+    """CSV header: the row fields, with score_breakdown flattened to score_breakdown.<component>."""
+    cols = list(fields) if fields is not None else list(names) + ["score_breakdown"]
+    out: List[str] = []
+    for c in cols:
+        if c == "score_breakdown":
+            out.extend(f"score_breakdown.{k}" for k in COMPONENTS)
+        else:
+            out.append(c)
+    return out
+
+def csv_header(columns: Sequence[str]) -> bytes:
+    buf = io.StringIO()
+    csv.writer(buf, lineterminator="\n").writerow(columns)
+    return buf.getvalue().encode("utf-8")
+
+def csv_lines(rows: Iterable[Dict[str, Any]], columns: Sequence[str], ndigits: int = FLOAT_DIGITS) -> bytes:
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    for r in rows:
+        r = clean_row(r, None, ndigits)
+        breakdown = r.get("score_breakdown") or {}
+        writer.writerow(["" if v is None else v for v in
+                         (breakdown.get(c[16:]) if c.startswith("score_breakdown.") else r.get(c) for c in columns)])
+    return buf.getvalue().encode("utf-8")
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Gzip a byte stream incrementally; each input chunk is flushed so clients see progress."""
+    z = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        out = z.compress(chunk) + z.flush(zlib.Z_SYNC_FLUSH)
+        if out:
+            yield out
+    yield z.flush()
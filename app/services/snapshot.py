@@ -0,0 +1,142 @@
+import json
+import mmap
+import os
+import struct
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .analytics import COMPONENTS, DEFAULT_WEIGHTS, SCORING_VERSION, weights_vector
+from .connectors import crime_csv
+from .store import ListingStore
+
+# Binary snapshot of a scored ListingStore, so workers skip read_csv + scoring.
+#
+#   MAGIC | u64 header length | JSON header | padding | column blobs (64-byte aligned)
+#
+# The header holds the schema (name, kind, dtype, offset, length per column),
+# the stamp of the CSV the snapshot was built from and what the stored scores
+# depend on besides it (scoring_stamp). Numeric columns and the
+# breakdown matrix are read-only views over one shared mmap, so forked workers
+# share the page cache. Categoricals keep their integer codes in the blob and
+# their (few) categories in the header; free-text object columns are a JSON
+# blob, the only part decoded at load. The store's index and ordering
+# permutations are saved too, so loading does no sorting.
+
+MAGIC = b"DRSNAP\x00\x01"
+FORMAT_VERSION = 2
+ALIGN = 64
+
+def snapshot_path(csv_path: str) -> str:
+    return os.path.splitext(csv_path)[0] + ".snap"
+
+def source_stamp(csv_path: str) -> Optional[Dict[str, Any]]:
+    try:
+        st = os.stat(csv_path)
+    except OSError:
+        return None
+    return {"name": os.path.basename(csv_path), "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+def scoring_stamp() -> Dict[str, Any]:
+    """Everything besides the listings CSV that the stored scores and breakdown depend on."""
+    return {"version": SCORING_VERSION, "components": list(COMPONENTS),
+            "weights": weights_vector(DEFAULT_WEIGHTS).tolist(), "crime": source_stamp(crime_csv.CRIME_CSV)}
+
+def _json_default(v: Any) -> Any:
+    if isinstance(v, np.generic):
+        return v.item()
+    raise TypeError(f"unserializable {type(v).__name__}")
+
+def _blobs(store: ListingStore) -> Tuple[List[Dict[str, Any]], List[bytes]]:
+    columns, breakdown = store.parts()
+    schema, blobs = [], []
+    for name, col in columns.items():
+        if isinstance(col, pd.Categorical):
+            cats = col.categories.tolist()
+            schema.append({"name": name, "kind": "categorical", "dtype": col.codes.dtype.str,
+                           "categories": cats, "ordered": bool(col.ordered)})
+            blobs.append(np.ascontiguousarray(col.codes).tobytes())
+        elif col.dtype == object:
+            schema.append({"name": name, "kind": "object"})
+            blobs.append(json.dumps(col.tolist(), default=_json_default).encode("utf-8"))
+        else:
+            schema.append({"name": name, "kind": "array", "dtype": col.dtype.str})
+            blobs.append(np.ascontiguousarray(col).tobytes())
+    schema.append({"name": "__breakdown__", "kind": "array", "dtype": breakdown.dtype.str,
+                   "shape": list(breakdown.shape)})
+    blobs.append(np.ascontiguousarray(breakdown).tobytes())
+    for name, arr in store.derived().items():
+        schema.append({"name": name, "kind": "derived", "dtype": arr.dtype.str})
+        blobs.append(np.ascontiguousarray(arr).tobytes())
+    return schema, blobs
+
+def write_snapshot(store: ListingStore, path: str, source: Optional[Dict[str, Any]] = None) -> str:
+    """Write ``store`` to ``path`` atomically (tmp file + rename)."""
+    schema, blobs = _blobs(store)
+    # offsets are relative to the data section, which starts aligned after the header
+    offset = 0
+    for entry, blob in zip(schema, blobs):
+        entry["offset"], entry["length"] = offset, len(blob)
+        offset += -(-len(blob) // ALIGN) * ALIGN
+    header = json.dumps({"version": FORMAT_VERSION, "rows": len(store), "scoring": scoring_stamp(),
+                         "source": source, "columns": schema}, default=_json_default).encode("utf-8")
+    data_start = -(-(len(MAGIC) + 8 + len(header)) // ALIGN) * ALIGN
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"  # workers may race to write it
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<Q", len(header)) + header)
+        for entry, blob in zip(schema, blobs):
+            f.seek(data_start + entry["offset"])
+            f.write(blob)
+        f.truncate(data_start + offset)
+    os.replace(tmp, path)
+    return path
+
+def read_header(path: str) -> Tuple[Dict[str, Any], int]:
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError("not a listings snapshot")
+        (n,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(n))
+    return header, -(-(len(MAGIC) + 8 + n) // ALIGN) * ALIGN
+
+def read_snapshot(path: str, source: Optional[Dict[str, Any]] = None) -> Optional[ListingStore]:
+    """Memory-map a snapshot into a ListingStore.
+
+    Returns None when the file is missing, from another format version,
+    scored under a different scoring_stamp() (model, default weights or crime
+    data), or (if ``source`` is given) built from a different CSV.
+    """
+    try:
+        header, data_start = read_header(path)
+    except (OSError, ValueError):
+        return None
+    if header.get("version") != FORMAT_VERSION or header.get("scoring") != scoring_stamp():
+        return None
+    if source is not None and header.get("source") != source:
+        return None
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    columns: Dict[str, Any] = {}
+    derived: Dict[str, np.ndarray] = {}
+    breakdown = None
+    for entry in header["columns"]:
+        start = data_start + entry["offset"]
+        if entry["kind"] == "object":
+            columns[entry["name"]] = np.array(json.loads(mm[start:start + entry["length"]]) or [], dtype=object)
+            continue
+        dtype = np.dtype(entry["dtype"])
+        arr = np.frombuffer(mm, dtype=dtype, count=entry["length"] // dtype.itemsize, offset=start)
+        if entry["name"] == "__breakdown__":
+            breakdown = arr.reshape(entry["shape"])
+        elif entry["kind"] == "derived":
+            derived[entry["name"]] = arr
+        elif entry["kind"] == "categorical":
+            columns[entry["name"]] = pd.Categorical.from_codes(arr, categories=entry["categories"],
+                                                               ordered=entry["ordered"], validate=False)
+        else:
+            columns[entry["name"]] = arr
+    if breakdown is None or len(breakdown) != header["rows"]:
+        return None
+    return ListingStore(columns, breakdown, derived)
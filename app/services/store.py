@@ -0,0 +1,395 @@
+import copy
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .analytics import COMPONENTS, METRIC_COLUMNS, BREAKDOWN_PREFIX, DEFAULT_WEIGHTS, compute_analytics_frame, weights_vector
+from .indexes import GEO_INDEX, BBox, GeoPredicate, LabelPredicate, RangePredicate, build_indexes, plan
+
+# Low-cardinality text fields are dictionary-encoded: one small code per row
+# instead of a Python str per row.
+CATEGORICAL_COLUMNS = ["suburb", "state", "postcode", "zoning_code", "dwelling_type",
+                       "flood_risk", "bushfire_risk", "crime_band"]
+
+DEFAULT_ORDER = ("deal_score", "desc")
+ORDERING_AFTER_USES = 3  # dense top() calls on one (field, direction) before it gets a presorted ordering
+REWEIGHTED_VIEWS = 8  # custom-weight rescorings kept per store (paging re-uses them)
+
+def read_listings_csv(path: str) -> pd.DataFrame:
+    df = pd.read_csv(path)
+    df["id"] = df["id"].astype(str)
+    bool_cols = ["granny_flat_allowed","dual_occ_allowed","heritage_flag"]
+    for c in bool_cols:
+        if c in df.columns:
+            df[c] = df[c].astype(bool)
+    for c in ["zoning_code","dwelling_type","address","suburb","state","postcode"]:
+        if c in df.columns:
+            df[c] = df[c].fillna("")
+    return df
+
+def _is_missing(v) -> bool:
+    return v is None or (isinstance(v, float) and v != v)
+
+class ListingStore:
+    """Columnar, read-only listing table.
+
+    Numeric fields live in typed NumPy arrays, text fields with few distinct
+    values are pandas Categoricals, and everything else (id, address) is an
+    object array. Row dicts are only built by ``rows()`` for what a response
+    actually returns.
+    """
+
+    def __init__(self, columns: Dict[str, Any], breakdown: np.ndarray,
+                 derived: Optional[Dict[str, np.ndarray]] = None):
+        derived = derived or {}
+        self._columns = columns
+        self._breakdown = breakdown  # (n, len(COMPONENTS)) score_breakdown values
+        self._components: Optional[np.ndarray] = None  # breakdown / DEFAULT_WEIGHTS, built on first use
+        self._weights: Optional[np.ndarray] = None  # set on reweighted() views
+        self._views: "OrderedDict[Tuple[float, ...], ListingStore]" = OrderedDict()
+        self._views_lock = threading.Lock()
+        self.names: List[str] = [c for c in columns]
+        self._sort_keys: Dict[str, np.ndarray] = {}
+        self._sort_labels: Dict[str, np.ndarray] = {}  # sorted distinct values behind text sort keys
+        self._id_index: Dict[str, int] = {}
+        if "id" in columns:
+            ids = [str(v) for v in np.asarray(columns["id"], dtype=object).tolist()]
+            # first occurrence wins on duplicate ids, like the old linear scan
+            self._id_index = dict(zip(reversed(ids), range(len(ids) - 1, -1, -1)))
+        self.indexes = build_indexes(self.numeric, self._label_source,
+                                     {k[6:]: v for k, v in derived.items() if k.startswith("index/")})
+        self._orders: Dict[Any, np.ndarray] = {}
+        self._ranks: Dict[Any, np.ndarray] = {}  # inverse of each ordering: position -> rank
+        self._sort_uses: Dict[Tuple[str, str], int] = {}
+        for k, order in derived.items():
+            if k.startswith("order/"):
+                _, sort_by, sort_dir = k.split("/", 2)
+                self._set_ordering((sort_by, sort_dir), order)
+        if "deal_score" in columns:
+            self.ordering(DEFAULT_ORDER[0], DEFAULT_ORDER[1])  # the common request: walk, don't sort
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> "ListingStore":
+        contrib_cols = [BREAKDOWN_PREFIX + k for k in COMPONENTS]
+        columns: Dict[str, Any] = {}
+        for name in frame.columns:
+            if name in contrib_cols:
+                continue
+            col = frame[name]
+            if col.dtype == object:
+                if name in CATEGORICAL_COLUMNS or col.nunique() <= len(col) // 2:
+                    columns[name] = pd.Categorical(col)
+                else:
+                    columns[name] = col.to_numpy(dtype=object)
+            elif col.dtype.kind in "iu":
+                columns[name] = pd.to_numeric(col, downcast="integer").to_numpy()
+            else:
+                columns[name] = col.to_numpy()
+        return cls(columns, frame[contrib_cols].to_numpy(dtype=float))
+
+    @classmethod
+    def from_csv(cls, path: str) -> "ListingStore":
+        """Read, coerce and score a listings CSV."""
+        return cls.from_frame(compute_analytics_frame(read_listings_csv(path)))
+
+    def parts(self) -> Tuple[Dict[str, Any], np.ndarray]:
+        """(columns, breakdown) as passed to the constructor; treat as read-only."""
+        return self._columns, self._breakdown
+
+    def derived(self) -> Dict[str, np.ndarray]:
+        """Sort results the constructor would otherwise recompute: index orders and cached orderings."""
+        out = {f"index/{name}": ix.order for name, ix in self.indexes.items()}
+        out.update({f"order/{by}/{d}": order for (by, d), order in self._orders.items()})
+        return out
+
+    def __len__(self) -> int:
+        return len(self._breakdown)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._columns
+
+    def nbytes(self) -> int:
+        total = self._breakdown.nbytes
+        for col in self._columns.values():
+            if isinstance(col, pd.Categorical):
+                total += col.codes.nbytes + int(col.categories.memory_usage(deep=True))
+            elif col.dtype == object:
+                total += int(pd.Series(col).memory_usage(deep=True, index=False))
+            else:
+                total += col.nbytes
+        return total
+
+    # --- custom weights ----------------------------------------------------
+
+    def components(self) -> np.ndarray:
+        """Normalized component scores, (n, len(COMPONENTS)): each score_breakdown term over its weight."""
+        if self._components is None:
+            self._components = np.ascontiguousarray(self._breakdown / weights_vector(DEFAULT_WEIGHTS))
+        return self._components
+
+    def reweighted(self, weights: Optional[Mapping[str, float]]) -> "ListingStore":
+        """This store with deal_score and score_breakdown under ``weights``.
+
+        The view shares every column and index; only the deal_score column
+        (one matrix-vector product) and its sort caches are its own, so
+        filtering, top-k and paging cost the same as with the default weights.
+        """
+        w = weights_vector(weights)
+        key = tuple(w.tolist())
+        if weights is None or self._weights is not None or key == tuple(weights_vector(DEFAULT_WEIGHTS).tolist()):
+            return self
+        with self._views_lock:
+            view = self._views.get(key)
+            if view is not None:
+                self._views.move_to_end(key)
+                return view
+        comps = self.components()
+        view = copy.copy(self)
+        view._columns = {**self._columns, "deal_score": comps @ w}
+        view._weights = w
+        view._sort_keys = {k: v for k, v in self._sort_keys.items() if k != "deal_score"}
+        view._orders = {k: v for k, v in self._orders.items() if k[0] != "deal_score"}
+        view._ranks = {k: v for k, v in self._ranks.items() if k[0] != "deal_score"}
+        view._sort_uses = {}
+        view._views = OrderedDict()
+        with self._views_lock:
+            self._views[key] = view
+            while len(self._views) > REWEIGHTED_VIEWS:
+                self._views.popitem(last=False)
+        return view
+
+    # --- column access -----------------------------------------------------
+
+    def column(self, name: str) -> np.ndarray:
+        col = self._columns[name]
+        return np.asarray(col, dtype=object) if isinstance(col, pd.Categorical) else col
+
+    def position(self, prop_id: Any) -> Optional[int]:
+        return self._id_index.get(str(prop_id))
+
+    def positions(self, prop_ids: Sequence[Any]) -> List[int]:
+        """Positions for the ids that exist, in the order asked for."""
+        get = self._id_index.get
+        return [i for i in (get(str(p)) for p in prop_ids) if i is not None]
+
+    def numeric(self, name: str) -> np.ndarray:
+        """Float view of a column; NaN where missing or non-numeric."""
+        col = self._columns.get(name)
+        if col is None:
+            return np.full(len(self), np.nan)
+        if isinstance(col, pd.Categorical) or col.dtype == object:
+            return pd.to_numeric(pd.Series(np.asarray(col, dtype=object)), errors="coerce").to_numpy(dtype=float)
+        return col.astype(float, copy=False)
+
+    def _label_source(self, name: str) -> Any:
+        col = self._columns.get(name)
+        return np.full(len(self), None, dtype=object) if col is None else col
+
+    def sort_key(self, name: str) -> np.ndarray:
+        """Float rank/value per row usable for ordering; NaN marks missing."""
+        key = self._sort_keys.get(name)
+        if key is not None:
+            return key
+        col = self._columns.get(name)
+        if col is None:
+            key = np.full(len(self), np.nan)
+        elif isinstance(col, pd.Categorical) or col.dtype == object:
+            values = pd.Series(np.asarray(col, dtype=object))
+            present = values.map(lambda v: not _is_missing(v)).to_numpy(dtype=bool)
+            key = np.full(len(self), np.nan)
+            if present.any():
+                try:
+                    labels, ranks = np.unique(values[present].to_numpy(), return_inverse=True)
+                except TypeError:  # mixed types: order by text
+                    labels, ranks = np.unique(values[present].astype(str).to_numpy(), return_inverse=True)
+                key[present] = ranks
+                self._sort_labels[name] = labels
+        else:
+            key = col.astype(float)
+        self._sort_keys[name] = key
+        return key
+
+    # --- querying ----------------------------------------------------------
+
+    def filter(self,
+               min_gross_yield: Optional[float] = None,
+               min_net_yield: Optional[float] = None,
+               min_cagr5: Optional[float] = None,
+               max_vacancy: Optional[float] = None,
+               exclude_flood_high: bool = True,
+               exclude_bushfire_high: bool = True,
+               suburb: Optional[str] = None,
+               state: Optional[str] = None,
+               min_price: Optional[float] = None,
+               max_price: Optional[float] = None,
+               bbox: Optional[BBox] = None,
+               near: Optional[Tuple[float, float, float]] = None) -> np.ndarray:
+        """Positions (ascending) of rows passing the same predicates as analytics.filters_apply.
+
+        ``bbox`` is (min_lat, min_lng, max_lat, max_lng); ``near`` is (lat, lng, radius_km).
+        Rows without coordinates never match either.
+        """
+        ix = self.indexes
+        preds = []
+        for name, bound in (("gross_yield", min_gross_yield), ("net_yield", min_net_yield), ("cagr5", min_cagr5)):
+            if bound is not None:
+                preds.append(RangePredicate(name, ix[name], lo=bound))
+        if max_vacancy is not None:
+            preds.append(RangePredicate("vacancy", ix["vacancy"], hi=max_vacancy))
+        if min_price is not None or max_price is not None:
+            preds.append(RangePredicate("list_price", ix["list_price"], lo=min_price, hi=max_price))
+        if exclude_flood_high:
+            preds.append(LabelPredicate("flood_risk", ix["flood_risk"], "high", negate=True))
+        if exclude_bushfire_high:
+            preds.append(LabelPredicate("bushfire_risk", ix["bushfire_risk"], "high", negate=True))
+        if suburb:
+            preds.append(LabelPredicate("suburb", ix["suburb"], suburb))
+        if state:
+            preds.append(LabelPredicate("state", ix["state"], state))
+        if bbox is not None:
+            preds.append(GeoPredicate("bbox", ix[GEO_INDEX], bbox=bbox))
+        if near is not None:
+            preds.append(GeoPredicate("near", ix[GEO_INDEX], center=near[:2], radius_km=near[2]))
+        return plan(len(self), preds)
+
+    def sort(self, idx: np.ndarray, sort_by: str = "deal_score", sort_dir: str = "desc") -> np.ndarray:
+        """Order ``idx`` like analytics.sort_properties: stable, missing values last."""
+        key = self.sort_key(sort_by)[idx]
+        missing = np.isnan(key)
+        if sort_dir.lower() == "desc":
+            key = -key
+        present = idx[~missing]
+        present = present[np.argsort(key[~missing], kind="stable")]
+        return np.concatenate([present, idx[missing]])
+
+    def ordering(self, sort_by: str, sort_dir: str) -> np.ndarray:
+        """Every row position in sort order, computed once per (field, direction)."""
+        k = (sort_by, sort_dir.lower())
+        order = self._orders.get(k)
+        if order is None:
+            order = self._set_ordering(k, self.sort(np.arange(len(self)), sort_by, sort_dir))
+        return order
+
+    def _set_ordering(self, k: Tuple[str, str], order: np.ndarray) -> np.ndarray:
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        self._ranks[k] = rank
+        self._orders[k] = order
+        return order
+
+    def seek(self, sort_by: str, value: Any, prop_id: Any) -> Tuple[float, Optional[int]]:
+        """Resolve a pagination anchor to (sort key, position).
+
+        The position is None when the id is gone (e.g. after a reload); the key
+        is then rebuilt from the raw value and rows tied with it are skipped.
+        """
+        pos = self.position(prop_id)
+        if pos is not None:
+            return float(self.sort_key(sort_by)[pos]), pos
+        if _is_missing(value):
+            return np.nan, None
+        self.sort_key(sort_by)
+        labels = self._sort_labels.get(sort_by)
+        if labels is None:
+            return float(value), None
+        i = int(np.searchsorted(labels, value))
+        return (float(i) if i < len(labels) and labels[i] == value else i - 0.5), None
+
+    def _after(self, idx: np.ndarray, sort_by: str, sort_dir: str, key: float, pos: Optional[int]) -> np.ndarray:
+        keys = self.sort_key(sort_by)[idx]
+        missing = np.isnan(keys)
+        p = len(self) if pos is None else pos
+        if np.isnan(key):  # anchor is in the missing-values tail
+            return idx[missing & (idx > p)]
+        if sort_dir.lower() == "desc":
+            keys, key = -keys, -key
+        return idx[missing | (keys > key) | ((keys == key) & (idx > p))]
+
+    def top(self, idx: np.ndarray, sort_by: str = "deal_score", sort_dir: str = "desc", k: int = 12,
+            after: Optional[Tuple[float, Optional[int]]] = None) -> np.ndarray:
+        """Same as ``sort(idx, ...)[:k]`` for ascending ``idx``, without sorting everything.
+
+        Dense candidate sets walk a presorted ordering, which is built once a
+        (field, direction) has had ORDERING_AFTER_USES dense requests; otherwise
+        the k best are picked with a partial selection and only those are sorted.
+        ``after`` (from ``seek``) resumes strictly after that row in the order.
+        """
+        n = len(self)
+        if k <= 0 or not len(idx):
+            return idx[:0]
+        ok = (sort_by, sort_dir.lower())
+        # A walk scans about k * n / len(idx) rows of the ordering before it has k hits.
+        if k * n <= len(idx) * len(idx) and (after is None or after[1] is not None):
+            order = self._orders.get(ok)
+            if order is None:
+                uses = self._sort_uses[ok] = self._sort_uses.get(ok, 0) + 1
+                if uses >= ORDERING_AFTER_USES:
+                    order = self.ordering(sort_by, sort_dir)
+            if order is not None:
+                start = 0 if after is None else int(self._ranks[ok][after[1]]) + 1
+                return self._walk(order, idx, k, start)
+        if after is not None:
+            idx = self._after(idx, sort_by, sort_dir, *after)
+
+        key = self.sort_key(sort_by)[idx]
+        missing = np.isnan(key)
+        if sort_dir.lower() == "desc":
+            key = -key
+        present_pos = np.flatnonzero(~missing)
+        present_key = key[present_pos]
+        if k < len(present_key):
+            kth = np.partition(present_key, k - 1)[k - 1]
+            below = np.flatnonzero(present_key < kth)
+            ties = np.flatnonzero(present_key == kth)[:k - len(below)]
+            sel = np.sort(np.concatenate([below, ties]))  # keep input order among ties
+        else:
+            sel = np.arange(len(present_key))
+        sel = sel[np.argsort(present_key[sel], kind="stable")]
+        best = idx[present_pos[sel]]
+        if len(best) < k:
+            best = np.concatenate([best, idx[missing][:k - len(best)]])
+        return best
+
+    def _walk(self, order: np.ndarray, idx: np.ndarray, k: int, start: int) -> np.ndarray:
+        n = len(self)
+        mask = np.zeros(n, dtype=bool)
+        mask[idx] = True
+        out, step, found = [idx[:0]], max(4 * k * n // len(idx), 256), 0
+        while start < n and found < k:
+            chunk = order[start:start + step]
+            hits = chunk[mask[chunk]][:k - found]
+            out.append(hits)
+            found += len(hits)
+            start += step
+            step *= 2
+        return np.concatenate(out)
+
+    # --- materialization ---------------------------------------------------
+
+    def rows(self, idx: Sequence[int], fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """Row dicts for ``idx``; with ``fields``, only those columns (and score_breakdown if listed)."""
+        idx = np.asarray(idx, dtype=np.int64)
+        wanted = None if fields is None else set(fields)
+        names = self.names if wanted is None else [n for n in self.names if n in wanted]
+        values = []
+        for name in names:
+            col = self._columns[name]
+            if isinstance(col, pd.Categorical):
+                values.append(np.asarray(col.take(idx), dtype=object).tolist())
+            elif name in METRIC_COLUMNS:
+                taken = col[idx]
+                values.append([None if v != v else v for v in taken.tolist()])
+            else:
+                values.append(col[idx].tolist())
+        out = [dict(zip(names, vals)) for vals in zip(*values)] if values else [{} for _ in idx]
+        if fields is None or "score_breakdown" in fields:
+            breakdown = self._breakdown[idx] if self._weights is None else self.components()[idx] * self._weights
+            for rec, contrib in zip(out, breakdown.tolist()):
+                rec["score_breakdown"] = dict(zip(COMPONENTS, contrib))
+        return out
+
+    def row(self, i: int) -> Dict[str, Any]:
+        return self.rows([i])[0]
@@ -0,0 +1,220 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .synthetic import listings
+
+# Times the listing hot paths on synthetic datasets and compares against a
+# stored baseline:
+#
+#   python -m benchmarks.run                          # 1k and 100k rows
+#   python -m benchmarks.run --sizes 1k,100k,1m --check
+#   python -m benchmarks.run --save-baseline          # after an intended change
+#
+# Each stage runs once for its peak traced memory (tracemalloc, which sees
+# NumPy buffers too) and then up to --repeat times untraced for timing.
+
+HERE = os.path.dirname(__file__)
+DEFAULT_BASELINE = os.path.join(HERE, "baseline.json")
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+DEFAULT_FILTERS = dict(exclude_flood_high=True, exclude_bushfire_high=True)
+SELECTIVE_FILTERS = dict(DEFAULT_FILTERS, min_gross_yield=0.05, state="QLD", max_price=600_000)
+CUSTOM_WEIGHTS = "net_yield=0.4,cash_on_cash=0.3,cagr5=0.05"
+VIEWPORT = (-33.95, 151.05, -33.80, 151.25)  # (min_lat, min_lng, max_lat, max_lng), inner Sydney
+MAX_REPEAT_SECONDS = 5.0  # stop repeating a stage once it has used this much time
+
+def _parse_size(s: str) -> int:
+    s = s.strip().lower()
+    return SIZES[s] if s in SIZES else int(float(s))
+
+def _label(n: int) -> str:
+    for k, v in SIZES.items():
+        if v == n:
+            return k
+    return str(n)
+
+def measure(fn: Callable[[], Any], repeat: int, memory: bool) -> Dict[str, float]:
+    peak = None
+    if memory:
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    times: List[float] = []
+    spent = 0.0
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        fn()
+        dt = time.perf_counter() - t0
+        times.append(dt)
+        spent += dt
+        if spent > MAX_REPEAT_SECONDS:
+            break
+    out = {"median_ms": statistics.median(times) * 1000, "min_ms": min(times) * 1000, "runs": len(times)}
+    if peak is not None:
+        out["peak_mb"] = peak
+    return out
+
+def run_size(n: int, repeat: int, memory: bool, rowwise_max: int, seed: int, workdir: str,
+             log: Callable[[str], None]) -> Dict[str, Dict[str, float]]:
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.testclient import TestClient
+
+    from app import main
+    from app.services import dataset
+    from app.services.analytics import (compute_analytics_for_all, compute_analytics_frame, filters_apply,
+                                        parse_weights, sort_properties)
+    from app.services.serialize import dumps_rows
+    from app.services.snapshot import read_snapshot, snapshot_path, source_stamp, write_snapshot
+    from app.services.store import ListingStore, read_listings_csv
+
+    results: Dict[str, Dict[str, float]] = {}
+
+    def stage(name: str, fn: Callable[[], Any], reps: int = repeat) -> None:
+        results[name] = measure(fn, reps, memory)
+        r = results[name]
+        log(f"  {name:<24} {r['median_ms']:>10.2f} ms" + (f" {r['peak_mb']:>9.1f} MB" if "peak_mb" in r else ""))
+
+    csv_path = os.path.join(workdir, f"listings_{n}.csv")
+    listings(n, seed=seed).to_csv(csv_path, index=False)
+    log(f"{_label(n)} rows ({os.path.getsize(csv_path) / 2 ** 20:.1f} MB CSV)")
+
+    raw = read_listings_csv(csv_path)
+    stage("read_csv", lambda: read_listings_csv(csv_path), reps=3)
+    frame = compute_analytics_frame(raw)
+    stage("score_vectorized", lambda: compute_analytics_frame(raw), reps=3)
+    records = raw.to_dict(orient="records")
+    if n <= rowwise_max:
+        stage("score_rowwise", lambda: compute_analytics_for_all(records), reps=1 if n > 10_000 else repeat)
+    scored = compute_analytics_for_all(records) if n <= rowwise_max else None
+    store = ListingStore.from_frame(frame)
+    stage("store_build", lambda: ListingStore.from_frame(frame), reps=3)
+    snap = snapshot_path(csv_path)
+    stage("snapshot_write", lambda: write_snapshot(store, snap, source_stamp(csv_path)), reps=3)
+    stage("snapshot_load", lambda: read_snapshot(snap, source_stamp(csv_path)), reps=3)
+
+    if scored is not None:
+        stage("filter_rowwise", lambda: filters_apply(scored, **DEFAULT_FILTERS))
+        kept = filters_apply(scored, **DEFAULT_FILTERS)
+        stage("sort_rowwise_top12", lambda: sort_properties(kept, limit=12))
+        stage("sort_rowwise_full", lambda: sort_properties(kept))
+    stage("filter_store", lambda: store.filter(**DEFAULT_FILTERS))
+    stage("filter_store_selective", lambda: store.filter(**SELECTIVE_FILTERS))
+    stage("filter_store_bbox", lambda: store.filter(bbox=VIEWPORT, **DEFAULT_FILTERS))
+    stage("filter_store_radius", lambda: store.filter(near=(-33.87, 151.21, 10.0), **DEFAULT_FILTERS))
+    idx = store.filter(**DEFAULT_FILTERS)
+    stage("top12_store", lambda: store.top(idx, k=12))
+    stage("top12_store_by_price", lambda: store.top(idx, "list_price", "asc", k=12))
+    stage("sort_store_full", lambda: store.sort(idx))
+    weights = parse_weights(CUSTOM_WEIGHTS)
+    store.components()
+    # a new weight vector each run, so the reweighted view isn't served from the store's cache
+    stage("top12_store_weighted", lambda: store.reweighted(dict(weights, cagr5=np.random.random())).top(idx, k=12))
+    page = store.rows(store.top(idx, k=100))
+    stage("rows_materialize_100", lambda: store.rows(store.top(idx, k=100)))
+    stage("serialize_100_jsonable", lambda: json.dumps(jsonable_encoder(page)))
+    stage("serialize_100_rows", lambda: dumps_rows(page))
+
+    # Full requests against this dataset; the response cache is cleared per run
+    # except for the explicit cache-hit stage.
+    dataset.ENRICHED_CSV = csv_path
+    dataset.reload_if_changed(force=True)
+    client = TestClient(main.app)
+
+    def get(url: str, cached: bool = False) -> None:
+        if not cached:
+            main.RESPONSE_CACHE.clear()
+        r = client.get(url)
+        assert r.status_code == 200, r.text
+
+    stage("request_default", lambda: get("/properties?use_nestoria=false"))
+    stage("request_filtered", lambda: get("/properties?use_nestoria=false&min_gross_yield=0.05&state=QLD&max_price=600000"))
+    stage("request_limit100", lambda: get("/properties?use_nestoria=false&limit=100"))
+    stage("request_sort_price", lambda: get("/properties?use_nestoria=false&sort_by=list_price&sort_dir=asc"))
+    stage("request_weighted", lambda: get(f"/properties?use_nestoria=false&weights={CUSTOM_WEIGHTS}"))
+    s, w, n, e = VIEWPORT
+    stage("request_near_bbox", lambda: get(f"/properties/near?bbox={w},{s},{e},{n}&limit=100"))
+    get("/properties?use_nestoria=false")
+    stage("request_cached", lambda: get("/properties?use_nestoria=false", cached=True))
+    return results
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float, min_ms: float) -> List[str]:
+    """Stages whose median got slower than baseline * (1 + tolerance) by more than ``min_ms``."""
+    regressions = []
+    for size, stages in current["sizes"].items():
+        base_stages = baseline.get("sizes", {}).get(size, {})
+        for name, r in stages.items():
+            b = base_stages.get(name)
+            if not b:
+                continue
+            limit = b["median_ms"] * (1 + tolerance)
+            if r["median_ms"] > limit and r["median_ms"] - b["median_ms"] > min_ms:
+                regressions.append(f"{size}/{name}: {r['median_ms']:.2f} ms vs baseline {b['median_ms']:.2f} ms "
+                                   f"(+{(r['median_ms'] / b['median_ms'] - 1) * 100:.0f}%)")
+    return regressions
+
+def _environment() -> Dict[str, Any]:
+    return {"python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+            "machine": platform.machine(), "cpus": os.cpu_count()}
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark scoring, filtering, sorting and serialization.")
+    ap.add_argument("--sizes", default="1k,100k", help="comma-separated: 1k, 10k, 100k, 1m or a row count")
+    ap.add_argument("--repeat", type=int, default=7, help="timed runs per stage (fewer for slow stages)")
+    ap.add_argument("--rowwise-max", type=int, default=100_000,
+                    help="skip the per-row (list of dicts) stages above this many rows")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    ap.add_argument("--baseline", default=DEFAULT_BASELINE)
+    ap.add_argument("--save-baseline", action="store_true", help="write this run as the new baseline")
+    ap.add_argument("--check", action="store_true", help="exit 1 if any stage regressed past --tolerance")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs baseline (0.25 = 25%%)")
+    ap.add_argument("--min-ms", type=float, default=1.0, help="ignore slowdowns smaller than this")
+    ap.add_argument("--json", help="also write results to this file")
+    args = ap.parse_args(argv)
+
+    os.environ.setdefault("DEALRADAR_RELOAD_INTERVAL", "0")
+    os.environ.setdefault("DEALRADAR_GEOCACHE", "off")
+    log = lambda s: print(s, file=sys.stderr, flush=True)
+    current: Dict[str, Any] = {"created_at": time.time(), "environment": _environment(), "sizes": {}}
+    with tempfile.TemporaryDirectory(prefix="dealradar-bench-") as workdir:
+        for n in (_parse_size(s) for s in args.sizes.split(",") if s.strip()):
+            current["sizes"][_label(n)] = run_size(n, args.repeat, not args.no_memory, args.rowwise_max,
+                                                   args.seed, workdir, log)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(current, f, indent=2)
+    baseline = None
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+        log(f"baseline saved -> {args.baseline}")
+        return 0
+    if baseline is None:
+        log("no baseline to compare against (run with --save-baseline)")
+        return 0
+    regressions = compare(current, baseline, args.tolerance, args.min_ms)
+    if baseline.get("environment") != current["environment"]:
+        log(f"note: baseline was recorded on {baseline.get('environment')}")
+    for line in regressions:
+        log("REGRESSION " + line)
+    if not regressions:
+        log(f"no regressions beyond {args.tolerance:.0%} of baseline")
+    return 1 if regressions and args.check else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
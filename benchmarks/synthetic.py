@@ -0,0 +1,85 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# Synthetic listings in the enriched_listings.csv schema. Distributions are
+# rough fits to what the real feed looks like: prices lognormal around each
+# state's median, rents from a ~4% gross yield with noise, suburbs Zipf-
+# distributed (a few suburbs hold most listings), and a sprinkling of missing
+# values in the fields the scorer treats as optional.
+
+STATES = {
+    # state: (share, median price, capital lat, capital lng, first postcode)
+    "NSW": (0.32, 1_050_000, -33.87, 151.21, 2000),
+    "VIC": (0.26, 800_000, -37.81, 144.96, 3000),
+    "QLD": (0.20, 720_000, -27.47, 153.03, 4000),
+    "WA": (0.10, 620_000, -31.95, 115.86, 6000),
+    "SA": (0.07, 650_000, -34.93, 138.60, 5000),
+    "TAS": (0.02, 560_000, -42.88, 147.33, 7000),
+    "ACT": (0.02, 900_000, -35.28, 149.13, 2600),
+    "NT": (0.01, 480_000, -12.46, 130.84, 800),
+}
+DWELLING_TYPES = (["House", "Unit", "Townhouse", "Villa"], [0.62, 0.26, 0.09, 0.03])
+RISK_LEVELS = ["none", "low", "medium", "high"]
+FLOOD_P = [0.70, 0.15, 0.10, 0.05]
+BUSHFIRE_P = [0.65, 0.18, 0.11, 0.06]
+CRIME_BANDS = (["low", "medium", "high"], [0.35, 0.45, 0.20])
+ZONES = (["R1", "R2", "R3", "R4", "RU1", "LR", "GRZ", "NRZ"], [0.08, 0.42, 0.15, 0.05, 0.03, 0.10, 0.12, 0.05])
+STREETS = ["St", "Ave", "Rd", "Ct", "Cres", "Pde", "Dr", "Pl"]
+MISSING_RATE = 0.03
+
+def listings(n: int, seed: int = 0, suburbs: Optional[int] = None) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    names = list(STATES)
+    share = np.array([STATES[s][0] for s in names])
+    state_i = rng.choice(len(names), n, p=share / share.sum())
+    state = np.array(names)[state_i]
+    med = np.array([STATES[s][1] for s in names])[state_i]
+    lat0 = np.array([STATES[s][2] for s in names])[state_i]
+    lng0 = np.array([STATES[s][3] for s in names])[state_i]
+    pc0 = np.array([STATES[s][4] for s in names])[state_i]
+
+    n_suburbs = suburbs or max(50, min(15_000, n // 40))
+    suburb_i = np.minimum(rng.zipf(1.3, n), n_suburbs) - 1
+    dtype = rng.choice(DWELLING_TYPES[0], n, p=DWELLING_TYPES[1])
+    house = dtype == "House"
+    beds = np.clip(np.where(house, rng.poisson(3.4, n), rng.poisson(2.0, n)), 1, 7)
+    land = np.where(house | (dtype == "Villa"), rng.lognormal(6.4, 0.35, n), 0).round()
+    price = (med * rng.lognormal(0, 0.38, n) * (0.7 + 0.1 * beds) * np.where(house, 1.0, 0.7)).round(-3)
+    rent = (price * rng.normal(0.042, 0.009, n).clip(0.015, 0.09) / 52).round()
+
+    df = pd.DataFrame({
+        "id": np.arange(1, n + 1).astype(str),
+        "address": [f"{a} {s} {t}" for a, s, t in zip(rng.integers(1, 400, n).tolist(),
+                                                      (f"Street{i}" for i in rng.integers(0, 5000, n).tolist()),
+                                                      rng.choice(STREETS, n).tolist())],
+        "suburb": np.char.add("Suburb", suburb_i.astype(str)),
+        "state": state,
+        "postcode": pc0 + suburb_i % 400,
+        "lat": (lat0 + rng.normal(0, 0.25, n)).round(5),
+        "lng": (lng0 + rng.normal(0, 0.25, n)).round(5),
+        "beds": beds,
+        "baths": np.clip(np.rint(beds * 0.55 + rng.normal(0, 0.4, n)), 1, 4).astype(int),
+        "cars": np.clip(rng.poisson(1.4, n), 0, 4),
+        "land_m2": land,
+        "building_m2": (beds * rng.normal(42, 8, n)).round(),
+        "year_built": rng.integers(1900, 2025, n),
+        "dwelling_type": dtype,
+        "list_price": price,
+        "weekly_rent": rent,
+        "cagr5": rng.normal(0.048, 0.018, n).round(4),
+        "vacancy": rng.gamma(2.0, 0.7, n).round(2),
+        "flood_risk": rng.choice(RISK_LEVELS, n, p=FLOOD_P),
+        "bushfire_risk": rng.choice(RISK_LEVELS, n, p=BUSHFIRE_P),
+        "crime_band": rng.choice(CRIME_BANDS[0], n, p=CRIME_BANDS[1]),
+        "zoning_code": rng.choice(ZONES[0], n, p=ZONES[1]),
+        "frontage_m": np.where(land > 0, (np.sqrt(land) * rng.normal(0.65, 0.1, n)).round(1), np.nan),
+        "granny_flat_allowed": house & (land >= 450) & (rng.random(n) < 0.7),
+        "dual_occ_allowed": house & (land >= 600) & (rng.random(n) < 0.5),
+        "heritage_flag": rng.random(n) < 0.04,
+        "amenities_score": rng.beta(4, 2.5, n).round(3),
+    })
+    for col in ("weekly_rent", "cagr5", "vacancy", "amenities_score", "building_m2"):
+        df.loc[rng.random(n) < MISSING_RATE, col] = np.nan
+    return df
@@ -0,0 +1,27 @@
+import argparse
+
+import numpy as np
+import pytest
+
+from app import cli_score
+from app.services.analytics import DEFAULT_WEIGHTS, prepare_inputs
+from benchmarks.synthetic import listings
+
+
+def test_profile_arg_parses_and_rejects_reserved_name():
+    name, weights = cli_score._profile_arg("yield:net_yield=0.9")
+    assert name == "yield" and weights["net_yield"] == 0.9
+    for bad in ("default:net_yield=0.9", "net_yield=0.9", "x:bogus=1"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            cli_score._profile_arg(bad)
+    with pytest.raises(SystemExit):
+        cli_score.main(["--profile", "default:net_yield=0.9"])
+
+
+def test_workers_match_single_process():
+    inputs = prepare_inputs(listings(2_000, seed=3))
+    profiles = {"default": dict(DEFAULT_WEIGHTS), "yield": cli_score._profile_arg("y:net_yield=0.9")[1]}
+    one = cli_score.score_columns(inputs, profiles, workers=1, chunk_rows=300)
+    many = cli_score.score_columns(inputs, profiles, workers=2, chunk_rows=300)
+    for k in one:
+        np.testing.assert_array_equal(one[k], many[k])
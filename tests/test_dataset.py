@@ -0,0 +1,41 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services import dataset
+from app.services.connectors import crime_csv
+
+
+@pytest.fixture
+def sources(tmp_path, monkeypatch):
+    crime = tmp_path / "crime.csv"
+    crime.write_text("suburb,state,crime_band\nBONDI,NSW,low\n")
+    monkeypatch.setattr(crime_csv, "CRIME_CSV", str(crime))
+    src = tmp_path / "listings.csv"
+    pd.DataFrame([{"id": "1", "suburb": "Bondi", "state": "NSW", "list_price": 900_000, "weekly_rent": 800}]
+                 ).to_csv(src, index=False)
+    monkeypatch.setattr(dataset, "DATA_CSV", str(src))
+    monkeypatch.setattr(dataset, "ENRICHED_CSV", str(tmp_path / "missing.csv"))
+    monkeypatch.setattr(dataset, "USE_SNAPSHOT", False)
+    monkeypatch.setattr(dataset, "_SNAPSHOT", {})
+    monkeypatch.setattr(dataset, "DATASET", None)
+    monkeypatch.setattr(dataset, "_FAILED", {"source": None})
+    dataset._load()
+    return crime
+
+
+def test_reload_when_crime_csv_changes(sources):
+    assert dataset.get_property_by_id("1")["crime_band"] == "low"
+    assert not dataset.reload_if_changed()
+    sources.write_text("suburb,state,crime_band\nBONDI,NSW,high\nMANLY,NSW,low\n")
+    os.utime(sources, (1, 1))  # the band index is keyed on mtime, which may not have ticked yet
+    assert dataset.reload_if_changed()
+    assert dataset.get_property_by_id("1")["crime_band"] == "high"
+
+
+def test_nan_suburb_is_treated_as_blank(sources):
+    sources.write_text("suburb,state,crime_band\nNAN,NSW,high\n,NSW,low\n")
+    os.utime(sources, (1, 1))
+    assert crime_csv.crime_bands_for([(np.nan, "NSW"), (None, "NSW"), ("nan", "NSW")]) == ["low", "low", "high"]
@@ -0,0 +1,213 @@
+import asyncio
+
+import httpx
+import pandas as pd
+import pytest
+
+from app.services import enrichment
+from app.services.connectors.flood_qld import SUNSHINE_FLOOD_FS
+
+
+@pytest.fixture(autouse=True)
+def _offline(monkeypatch):
+    monkeypatch.setenv("DEALRADAR_GEOCACHE", "off")
+    monkeypatch.setenv("DEALRADAR_LOCAL_OVERLAYS", "0")
+
+
+def _stub_client(monkeypatch, handler):
+    """Route enrichment's pooled client through ``handler``; returns the list of requests seen."""
+    seen = []
+
+    def record(request):
+        seen.append(request)
+        return handler(request)
+
+    monkeypatch.setattr(enrichment, "get_async_client",
+                        lambda: httpx.AsyncClient(transport=httpx.MockTransport(record)))
+    return seen
+
+
+def _sunshine(risk):
+    return {"features": [{"attributes": {"RISK": risk}}]}
+
+
+def test_failed_lookups_are_not_recorded_in_ledger(tmp_path, monkeypatch):
+    src, out, ledger = tmp_path / "in.csv", tmp_path / "out.csv", tmp_path / "ledger.sqlite"
+    pd.DataFrame([{"id": "q1", "state": "QLD", "lat": -26.65, "lng": 153.09}]).to_csv(src, index=False)
+    run = lambda: enrichment.enrich_csv(str(src), str(out), retries=0, ledger_path=str(ledger))
+
+    seen = _stub_client(monkeypatch, lambda r: httpx.Response(503))
+    stats = run()
+    assert pd.read_csv(out)["flood_risk"].tolist() == ["unknown"]
+    assert stats["incomplete"] == 1 and seen
+
+    healthy = lambda r: httpx.Response(200, json=_sunshine("High") if str(r.url).startswith(SUNSHINE_FLOOD_FS) else {})
+    seen = _stub_client(monkeypatch, healthy)
+    stats = run()
+    assert stats["skipped"] == 0 and len(seen) == 1
+    assert pd.read_csv(out)["flood_risk"].tolist() == ["high"]
+
+    seen = _stub_client(monkeypatch, healthy)
+    stats = run()
+    assert stats["skipped"] == 1 and not seen
+    assert pd.read_csv(out)["flood_risk"].tolist() == ["high"]
+
+
+def test_partial_failure_is_not_recorded(monkeypatch):
+    # the Sunshine layer fails but a later fallback answers: the row still isn't trusted
+    def handler(request):
+        if str(request.url).startswith(SUNSHINE_FLOOD_FS):
+            return httpx.Response(503)
+        return httpx.Response(200, json={"results": [{"layerName": "Flood overlay"}]})
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            fetch = enrichment.AsyncFetcher(client, retries=0)
+            return await enrichment.enrich_row_checked(fetch, {"state": "QLD", "lat": -28.0, "lng": 153.4})
+
+    row, ok = asyncio.run(main())
+    assert row["flood_risk"] == "medium" and not ok
+
+def test_resume_skips_records_not_lines(tmp_path, monkeypatch):
+    # quoted notes span lines and blank lines sit between records, so chunk
+    # boundaries can't be found by counting lines
+    src, out = tmp_path / "in.csv", tmp_path / "out.csv"
+    notes = [f"line one\nline two of {i}" if i % 3 else "plain" for i in range(10)]
+    src.write_text("id,state,note\n" + "".join(f'{i},NSW,"{note}"\n' + "\n" * (i % 2) for i, note in enumerate(notes)))
+    _stub_client(monkeypatch, lambda r: httpx.Response(200, json={}))
+    run = lambda: enrichment.enrich_csv(str(src), str(out), chunk_size=3, ledger_path=str(tmp_path / "l.sqlite"))
+
+    real_append, calls = enrichment._append_chunk, []
+
+    def crash_on_third(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 3:
+            raise RuntimeError("interrupted")
+        return real_append(*args, **kwargs)
+
+    monkeypatch.setattr(enrichment, "_append_chunk", crash_on_third)
+    with pytest.raises(RuntimeError):
+        run()
+    monkeypatch.setattr(enrichment, "_append_chunk", real_append)
+    stats = run()
+    assert stats["resumed"] == 6 and stats["rows"] == 10
+    done = pd.read_csv(out)
+    assert done["id"].tolist() == list(range(10))
+    assert done["note"].tolist() == notes
+
+
+def test_ledger_reads_are_batched_per_chunk(tmp_path, monkeypatch):
+    src, out = tmp_path / "in.csv", tmp_path / "out.csv"
+    pd.DataFrame([{"id": i, "state": "QLD", "lat": -26.6 + i * 1e-3, "lng": 153.1} for i in range(12)]).to_csv(src, index=False)
+    _stub_client(monkeypatch, lambda r: httpx.Response(200, json=_sunshine("Low") if str(r.url).startswith(SUNSHINE_FLOOD_FS) else {}))
+    run = lambda: enrichment.enrich_csv(str(src), str(out), chunk_size=5, ledger_path=str(tmp_path / "l.sqlite"))
+    run()
+
+    batches = []
+    real_get_many = enrichment.EnrichmentLedger.get_many
+
+    def get_many(self, fps, max_age):
+        batches.append(len(fps))
+        return real_get_many(self, fps, max_age)
+
+    monkeypatch.setattr(enrichment.EnrichmentLedger, "get_many", get_many)
+    stats = run()
+    assert stats["skipped"] == 12
+    assert sum(batches) == 12 and len(batches) <= 3  # at most one query per chunk, never one per row
+    assert set(pd.read_csv(out)["flood_risk"]) == {"low"}
+
+
+
+def _fetcher(handler, **kwargs):
+    return enrichment.AsyncFetcher(httpx.AsyncClient(transport=httpx.MockTransport(handler)), **kwargs)
+
+
+def test_enrich_chunks_hands_over_in_input_order():
+    chunks = [[{"n": c * 10 + i} for i in range(5)] for c in range(8)]
+    seen = []
+
+    async def enrich(row):
+        await asyncio.sleep(0.001 * ((100 - row["n"]) % 7))  # later rows/chunks often finish first
+        return dict(row, done=True)
+
+    asyncio.run(enrichment.enrich_chunks(iter(chunks), enrich, lambda n, rows: seen.append((n, rows)),
+                                         max_chunks_in_flight=3, first=2))
+    assert [n for n, _ in seen] == list(range(2, 10))
+    assert [r["n"] for _, rows in seen for r in rows] == [r["n"] for c in chunks for r in c]
+
+
+def test_retries_429_and_503_then_succeeds():
+    answers = [httpx.Response(429, headers={"Retry-After": "0.01"}), httpx.Response(503), httpx.Response(200, json={"ok": 1})]
+
+    async def main():
+        fetch = _fetcher(lambda r: answers.pop(0), retries=3, backoff=0.001)
+        return await fetch("https://a.example/q", {}), fetch.stats
+
+    js, stats = asyncio.run(main())
+    assert js == {"ok": 1}
+    assert stats == {"requests": 3, "retries": 2, "failures": 0}
+
+
+def test_retry_after_is_honoured_over_backoff():
+    answers = [httpx.Response(503, headers={"Retry-After": "0.2"}), httpx.Response(200, json={})]
+
+    async def main():
+        fetch = _fetcher(lambda r: answers.pop(0), retries=1, backoff=0.0)
+        loop = asyncio.get_running_loop()
+        t0 = loop.time()
+        await fetch("https://a.example/q", {})
+        return loop.time() - t0
+
+    assert asyncio.run(main()) >= 0.19
+
+
+def test_failures_are_counted_once_per_call():
+    def handler(request):
+        if request.url.path == "/down":
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(503 if request.url.path == "/busy" else 404)
+
+    async def main():
+        fetch = _fetcher(handler, retries=2, backoff=0.001)
+        for path in ("/down", "/busy", "/missing"):
+            with pytest.raises(httpx.HTTPError):
+                await fetch("https://a.example" + path, {})
+        return fetch.stats
+
+    # /down and /busy retry twice each; a 404 isn't retried
+    assert asyncio.run(main()) == {"requests": 3 + 3 + 1, "retries": 4, "failures": 3}
+
+
+def test_per_host_concurrency_limit():
+    in_flight, peak = {}, {}
+
+    async def handler(request):
+        host = request.url.host
+        in_flight[host] = in_flight.get(host, 0) + 1
+        peak[host] = max(peak.get(host, 0), in_flight[host])
+        await asyncio.sleep(0.01)
+        in_flight[host] -= 1
+        return httpx.Response(200, json={})
+
+    async def main():
+        fetch = _fetcher(handler, concurrency=3, rate=0)
+        await asyncio.gather(*(fetch(f"https://{h}.example/q", {}) for h in "ab" for _ in range(15)))
+
+    asyncio.run(main())
+    assert peak == {"a.example": 3, "b.example": 3}
+
+
+def test_per_host_rate_limit():
+    async def main():
+        fetch = _fetcher(lambda r: httpx.Response(200, json={}), concurrency=2, rate=50.0)
+        loop = asyncio.get_running_loop()
+        t0 = loop.time()
+        await asyncio.gather(*(fetch("https://a.example/q", {}) for _ in range(12)))
+        slow = loop.time() - t0
+        t0 = loop.time()
+        await asyncio.gather(*(fetch(f"https://h{i}.example/q", {}) for i in range(12)))
+        return slow, loop.time() - t0
+
+    slow, spread = asyncio.run(main())
+    assert slow >= (12 - 2) / 50.0 * 0.9  # burst of `concurrency`, then `rate` per second
+    assert spread < slow / 2  # separate hosts have separate buckets
@@ -0,0 +1,27 @@
+import asyncio
+
+from app.services.connectors import http_pool
+
+
+def test_clients_of_closed_loops_are_dropped(monkeypatch):
+    monkeypatch.setattr(http_pool, "_ASYNC_CLIENTS", {})
+
+    async def use():
+        client = http_pool.get_async_client()
+        assert http_pool.get_async_client() is client  # one client per running loop
+        return client
+
+    clients = [asyncio.run(use()) for _ in range(5)]
+    assert len(set(map(id, clients))) == 5
+    assert len(http_pool._ASYNC_CLIENTS) == 1 and clients[-1] in http_pool._ASYNC_CLIENTS.values()
+
+
+def test_aclose_forgets_the_loop_client(monkeypatch):
+    monkeypatch.setattr(http_pool, "_ASYNC_CLIENTS", {})
+
+    async def use():
+        client = http_pool.get_async_client()
+        await http_pool.aclose_async_client()
+        return client
+
+    assert asyncio.run(use()).is_closed and not http_pool._ASYNC_CLIENTS
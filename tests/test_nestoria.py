@@ -0,0 +1,124 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+import httpx
+import pytest
+
+from app.services.connectors import nestoria
+from app.services.connectors.nestoria import CircuitBreaker, search_listings_async
+
+
+def _answer(*titles):
+    return {"response": {"application_response_code": "100", "total_results": len(titles),
+                         "listings": [{"title": t, "price": 500_000} for t in titles]}}
+
+
+class Upstream:
+    """Stub Nestoria: ``answer`` is returned (or raised, or awaited) per request after ``delay`` s."""
+
+    def __init__(self):
+        self.calls = 0
+        self.delay = 0.0
+        self.answer = httpx.Response(200, json=_answer("first"))
+
+    async def __call__(self, request):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return self.answer
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    up = Upstream()
+    clients = {}
+
+    def client():
+        loop = asyncio.get_running_loop()
+        if loop not in clients:
+            clients[loop] = httpx.AsyncClient(transport=httpx.MockTransport(up))
+        return clients[loop]
+
+    monkeypatch.setattr(nestoria, "get_async_client", client)
+    monkeypatch.setattr(nestoria, "_CACHE", OrderedDict())
+    monkeypatch.setattr(nestoria, "_INFLIGHT", {})
+    monkeypatch.setattr(nestoria, "STATS", dict.fromkeys(nestoria.STATS, 0))
+    monkeypatch.setattr(nestoria, "BREAKER", CircuitBreaker(failures=3, reset_after=0.05))
+    return up
+
+
+def _titles(listings):
+    return [li["title"] for li in listings]
+
+
+def test_budget_overrun_degrades_then_fills_cache(upstream):
+    upstream.delay = 0.3
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        t0 = loop.time()
+        first = await search_listings_async("Bondi", budget=0.05)
+        waited = loop.time() - t0
+        await asyncio.sleep(0.35)  # the overrun fetch keeps going in the background
+        return first, waited, await search_listings_async("Bondi", budget=0.05)
+
+    (listings, meta), waited, (later, later_meta) = asyncio.run(main())
+    assert listings == [] and meta["status"] == "timeout" and waited < 0.2
+    assert later_meta["status"] == "fresh" and _titles(later) == ["first"]
+    assert upstream.calls == 1 and nestoria.STATS["timeouts"] == 1
+
+
+def test_stale_entry_is_served_then_refreshed_in_background(upstream):
+    async def main():
+        assert (await search_listings_async("Bondi"))[1]["status"] == "live"
+        for entry in nestoria._CACHE.values():
+            entry.fetched_at -= nestoria.FRESH_TTL + 1
+        upstream.answer = httpx.Response(200, json=_answer("second"))
+        upstream.delay = 0.05
+        stale = await search_listings_async("Bondi", budget=0.01)
+        await asyncio.gather(*nestoria._INFLIGHT.values())
+        return stale, await search_listings_async("Bondi")
+
+    (stale, stale_meta), (fresh, fresh_meta) = asyncio.run(main())
+    assert stale_meta["status"] == "stale" and _titles(stale) == ["first"]
+    assert fresh_meta["status"] == "fresh" and _titles(fresh) == ["second"]
+    assert upstream.calls == 2
+
+
+def test_breaker_opens_probes_half_open_and_closes(upstream):
+    upstream.answer = httpx.Response(503)
+
+    async def main():
+        statuses = [(await search_listings_async("Bondi"))[1]["status"] for _ in range(3)]
+        assert nestoria.BREAKER.state == "open"
+        statuses.append((await search_listings_async("Bondi"))[1]["status"])
+        calls_while_open = upstream.calls
+        await asyncio.sleep(0.06)
+        assert nestoria.BREAKER.state == "half_open"
+        upstream.answer = httpx.Response(200, json=_answer("back"))
+        probe = await search_listings_async("Bondi")
+        return statuses, calls_while_open, probe
+
+    statuses, calls_while_open, (listings, meta) = asyncio.run(main())
+    assert statuses == ["error"] * 3 + ["circuit_open"]
+    assert calls_while_open == 3
+    assert meta["status"] == "live" and _titles(listings) == ["back"]
+    assert nestoria.BREAKER.state == "closed" and upstream.calls == 4
+
+
+def test_half_open_allows_one_trial_and_a_failed_trial_reopens():
+    breaker = CircuitBreaker(failures=2, reset_after=0.05)
+    breaker.failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.failure()
+    assert breaker.state == "open" and not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.state == "half_open"
+    assert breaker.allow() and not breaker.allow()  # one trial at a time
+    breaker.failure()
+    assert breaker.state == "open" and not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.success()
+    assert breaker.state == "closed" and breaker.consecutive == 0
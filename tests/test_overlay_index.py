@@ -0,0 +1,169 @@
+import json
+import os
+
+import httpx
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services import enrichment
+from app.services.connectors import overlay_index
+from app.services.connectors.overlay_index import OverlayIndex, local_query, local_query_many
+
+
+def _square(x0, y0, x1, y1):
+    return [[x0, y0], [x1, y0], [x1, y1], [x0, y1], [x0, y0]]
+
+
+FEATURES = [
+    # a square with a square hole
+    {"attributes": {"id": "holed"}, "rings": [_square(0, 0, 4, 4), _square(1, 1, 3, 3)]},
+    # nested inside the hole, and a feature nested inside another one
+    {"attributes": {"id": "in_hole"}, "rings": [_square(1.5, 1.5, 2.5, 2.5)]},
+    {"attributes": {"id": "outer"}, "rings": [_square(10, 10, 20, 20)]},
+    {"attributes": {"id": "inner"}, "rings": [_square(12, 12, 14, 14)]},
+    # overlapping the holed square, and a concave (L-shaped) one
+    {"attributes": {"id": "overlap"}, "rings": [_square(3, 3, 6, 6)]},
+    {"attributes": {"id": "ell"}, "rings": [[[30, 0], [34, 0], [34, 1], [31, 1], [31, 4], [30, 4]]]},
+    # a triangle with a slanted edge
+    {"attributes": {"id": "tri"}, "rings": [[[40, 0], [44, 0], [40, 3]]]},
+]
+
+
+def _inside(ring, px, py):
+    inside = False
+    for (x1, y1), (x2, y2) in zip(ring, ring[1:] + ring[:1]):
+        if (y1 > py) != (y2 > py) and px < x1 + (py - y1) * (x2 - x1) / (y2 - y1):
+            inside = not inside
+    return inside
+
+
+def brute_force(features, x, y):
+    """First feature (in order) whose rings an even-odd ray cast puts the point inside, or -1."""
+    for i, f in enumerate(features):
+        if sum(_inside(r, x, y) for r in f["rings"]) % 2:
+            return i
+    return -1
+
+
+def _points():
+    rng = np.random.default_rng(7)
+    pts = [(rng.uniform(-2, 46), rng.uniform(-2, 22)) for _ in range(3000)]
+    # vertices, edges, hole boundaries, the slanted edge and cell boundaries
+    pts += [(0, 0), (4, 4), (1, 2), (3, 2), (2, 1), (4, 2), (2, 4), (1.5, 2), (2.5, 2.5),
+            (3, 3), (6, 4.5), (10, 15), (20, 15), (12, 13), (14, 14), (31, 2), (31, 1), (32, 1),
+            (40, 1.5), (42, 1.5), (41.333333333333336, 2.0), (0.5, 0.5), (2, 2), (13, 13)]
+    pts += [(i * 0.25, j * 0.25) for i in range(-4, 90) for j in range(-4, 30)]
+    return np.array(pts, dtype=float)
+
+
+@pytest.mark.parametrize("cell,max_cells", [(0.02, 4096), (1.0, 4096), (0.5, 4)])
+def test_lookups_match_brute_force(monkeypatch, cell, max_cells):
+    monkeypatch.setattr(overlay_index, "MAX_CELLS_PER_FEATURE", max_cells)  # 4: big boxes go on the "large" list
+    index = OverlayIndex(FEATURES, cell=cell)
+    pts = _points()
+    expect = [brute_force(FEATURES, x, y) for x, y in pts]
+    assert [index.lookup_index(y, x) for x, y in pts] == expect
+    assert index.lookup_many(pts[:, 1], pts[:, 0]).tolist() == expect
+    # first feature in export order wins, like ArcGIS
+    ids = lambda x, y: (index.lookup(y, x) or {}).get("id")
+    assert [ids(0.5, 0.5), ids(2, 2), ids(2, 1.2), ids(3.5, 3.5), ids(5, 5), ids(13, 13), ids(30.5, 3), ids(32, 2)] == \
+        ["holed", "in_hole", None, "holed", "overlap", "outer", "ell", None]
+
+
+def test_lookup_many_skips_missing_coordinates():
+    index = OverlayIndex(FEATURES)
+    assert index.lookup_many([2.0, np.nan, 0.5], [0.5, 1.0, np.inf]).tolist() == [0, -1, -1]
+    assert OverlayIndex([]).lookup_many([1.0], [1.0]).tolist() == [-1]
+
+
+@pytest.fixture
+def exported(tmp_path, monkeypatch):
+    monkeypatch.setattr(overlay_index, "OVERLAY_DIR", str(tmp_path))
+    monkeypatch.setattr(overlay_index, "_INDEXES", {})
+    monkeypatch.setenv("DEALRADAR_LOCAL_OVERLAYS", "1")
+
+    def export(name, features):
+        with open(overlay_index.overlay_path(name), "w") as f:
+            json.dump({"name": name, "features": features}, f)
+    return export
+
+
+def test_local_query_answers_from_exported_file(exported, monkeypatch):
+    exported("sunshine_flood", FEATURES)
+    assert local_query("sunshine_flood", 2.0, 2.0) == {"features": [{"attributes": {"id": "in_hole"}}]}
+    assert local_query("sunshine_flood", 1.2, 2.0) == {"features": []}
+    assert local_query("vic_zone", 1.0, 1.0) is None
+    monkeypatch.setenv("DEALRADAR_LOCAL_OVERLAYS", "0")
+    assert local_query("sunshine_flood", 2.0, 2.0) is None
+
+
+def test_local_query_many_matches_local_query(exported):
+    exported("sunshine_flood", FEATURES)
+    pts = _points()[:500]
+    assert local_query_many("sunshine_flood", pts[:, 1], pts[:, 0]) == [local_query("sunshine_flood", y, x) for x, y in pts]
+    assert local_query_many("vic_zone", [1.0], [1.0]) is None
+
+
+def test_enrichment_uses_local_overlays(exported, tmp_path, monkeypatch):
+    # a Sunshine Coast flood polygon exported locally answers covered rows without a request
+    exported("sunshine_flood", [{"attributes": {"RISK": "High"}, "rings": [_square(153.0, -26.7, 153.2, -26.5)]}])
+    monkeypatch.setenv("DEALRADAR_GEOCACHE", "off")
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"results": []})
+
+    monkeypatch.setattr(enrichment, "get_async_client", lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    src, out = tmp_path / "in.csv", tmp_path / "out.csv"
+    pd.DataFrame([{"id": i, "state": "QLD", "lat": -26.6 + i * 1e-4, "lng": 153.1} for i in range(20)]
+                 ).to_csv(src, index=False)
+    stats = enrichment.enrich_csv(str(src), str(out), chunk_size=7, ledger_path=str(tmp_path / "l.sqlite"))
+    assert stats["rows"] == 20 and not requests
+    assert set(pd.read_csv(out)["flood_risk"]) == {"high"}
+
+
+def _paged(pages):
+    """A get_json stand-in serving ArcGIS query pages by resultOffset."""
+    calls = []
+
+    def get_json(url, params, timeout):
+        calls.append(params["resultOffset"])
+        return pages(params["resultOffset"], params["resultRecordCount"])
+    return get_json, calls
+
+
+def _feature(oid):
+    return {"attributes": {"OBJECTID": oid}, "geometry": {"rings": [_square(oid, 0, oid + 1, 1)]}}
+
+
+def test_export_layer_pages_through_results(exported, monkeypatch):
+    def pages(offset, count):
+        oids = range(offset, min(offset + count, 5))
+        return {"objectIdFieldName": "OBJECTID", "features": [_feature(i) for i in oids],
+                "exceededTransferLimit": offset + count < 5}
+
+    get_json, calls = _paged(pages)
+    monkeypatch.setattr(overlay_index, "get_json", get_json)
+    assert overlay_index.export_layer("sunshine_flood", "https://a.example/0", page_size=2) == 5
+    assert calls == [0, 2, 4]
+    assert local_query("sunshine_flood", 0.5, 3.5) == {"features": [{"attributes": {"OBJECTID": 3}}]}
+
+
+def test_export_layer_stops_when_the_server_ignores_the_offset(exported, monkeypatch):
+    get_json, calls = _paged(lambda offset, count: {"objectIdFieldName": "OBJECTID", "exceededTransferLimit": True,
+                                                    "features": [_feature(i) for i in range(count)]})
+    monkeypatch.setattr(overlay_index, "get_json", get_json)
+    with pytest.raises(RuntimeError, match="repeats"):
+        overlay_index.export_layer("sunshine_flood", "https://a.example/0", page_size=2)
+    assert calls == [0, 2]
+
+    # and a server that keeps inventing features is cut off after MAX_PAGES
+    get_json, calls = _paged(lambda offset, count: {"exceededTransferLimit": True,
+                                                    "features": [_feature(offset + i) for i in range(count)]})
+    monkeypatch.setattr(overlay_index, "get_json", get_json)
+    monkeypatch.setattr(overlay_index, "MAX_PAGES", 3)
+    with pytest.raises(RuntimeError, match="more than 3 pages"):
+        overlay_index.export_layer("sunshine_flood", "https://a.example/0", page_size=2)
+    assert len(calls) == 3 and not os.path.exists(overlay_index.overlay_path("sunshine_flood"))
@@ -0,0 +1,40 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("DEALRADAR_RELOAD_INTERVAL", "0")
+    return TestClient(main.app)
+
+
+def test_profile_denied_without_configured_token(client, monkeypatch):
+    monkeypatch.setattr(main, "ADMIN_TOKEN", None)
+    monkeypatch.setattr(main, "PROFILE_OPEN", False)
+    assert client.get("/health?profile=1").status_code == 403
+    assert client.get("/health?profile=1", headers={"x-admin-token": ""}).status_code == 403
+    assert client.get("/health").status_code == 200
+
+
+def test_profile_needs_matching_token(client, monkeypatch):
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "s3cret")
+    monkeypatch.setattr(main, "PROFILE_OPEN", True)  # the opt-in doesn't bypass a configured token
+    assert client.get("/health?profile=1").status_code == 403
+    assert client.get("/health?profile=1", headers={"x-admin-token": "wrong"}).status_code == 403
+    r = client.get("/health?profile=1", headers={"x-admin-token": "s3cret"})
+    assert r.status_code == 200 and r.headers["content-type"].startswith("text/plain")
+
+
+def test_profile_explicit_opt_in_without_token(client, monkeypatch):
+    monkeypatch.setattr(main, "ADMIN_TOKEN", None)
+    monkeypatch.setattr(main, "PROFILE_OPEN", True)
+    assert client.get("/health?profile=1").status_code == 200
+
+
+def test_profile_denial_carries_cors_headers(client, monkeypatch):
+    monkeypatch.setattr(main, "ADMIN_TOKEN", None)
+    monkeypatch.setattr(main, "PROFILE_OPEN", False)
+    r = client.get("/health?profile=1", headers={"Origin": "https://front.example"})
+    assert r.status_code == 403 and "access-control-allow-origin" in r.headers
@@ -0,0 +1,11 @@
+from app.services.response_cache import cache_key
+
+
+def test_filters_fold_case_but_sort_and_cursor_do_not():
+    key = lambda **p: cache_key(1, dict(dict(state=None, suburb=None, sort_by="deal_score", cursor=None), **p))
+    assert key(state="NSW", suburb="Bondi ") == key(state=" nsw", suburb="BONDI")
+    assert key(state="") == key(state=None)
+    assert key(min_price=100000) == key(min_price=100000.0)
+    assert key(sort_by="List_Price") != key(sort_by="list_price")
+    assert key(cursor="eyJrIjoxfQ") != key(cursor="EYjRiJOXfq")
+    assert key(fields="id,Suburb") != key(fields="id,suburb")
@@ -0,0 +1,69 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from app.services.connectors import sales_nsw_csv as sales
+from app.services.connectors.sales_nsw_csv import SalesStore
+
+
+def _random_sales(rng, n, suburbs):
+    keys = rng.choice([f"S{i}|2{i:03d}" for i in range(suburbs)], n).astype(object)
+    return keys, rng.integers(2015, 2025, n).astype(np.int32), rng.integers(1, 50, n) * 10_000.0
+
+
+def test_append_matches_full_rebuild():
+    rng = np.random.default_rng(0)
+    old = _random_sales(rng, 5_000, 40)
+    for new in (_random_sales(rng, 300, 60), _random_sales(rng, 1, 3), _random_sales(rng, 0, 1)):
+        merged = SalesStore.from_arrays(*old).append([new])
+        full = SalesStore.from_arrays(*(np.concatenate([a, b]) for a, b in zip(old, new)))
+        assert merged.keys.tolist() == full.keys.tolist()
+        np.testing.assert_array_equal(merged.years, full.years)
+        np.testing.assert_array_equal(merged.offsets, full.offsets)
+        np.testing.assert_array_equal(merged.prices, full.prices)
+    assert len(SalesStore.empty().append([old])) == 5_000
+
+
+def test_explicitly_ingested_file_survives_sync(tmp_path, monkeypatch):
+    monkeypatch.setattr(sales, "SALES_CSV", str(tmp_path / "nsw_sales.csv"))
+    monkeypatch.setattr(sales, "SALES_DIR", str(tmp_path / "nsw_sales"))
+    monkeypatch.setattr(sales, "STORE_PATH", str(tmp_path / "store.npz"))
+    monkeypatch.setitem(sales._STORE, "store", None)
+    pd.DataFrame({"suburb": ["Bondi"] * 2, "postcode": ["2026"] * 2, "price": [100, 300],
+                  "contract_date": ["2023-01-01"] * 2}).to_csv(sales.SALES_CSV, index=False)
+    extra = tmp_path / "extract.csv"
+    pd.DataFrame({"suburb": ["Bondi"], "postcode": ["2026"], "price": [500],
+                  "contract_date": ["2023-06-01"]}).to_csv(extra, index=False)
+
+    sales.main(["ingest", str(extra)])
+    assert sales.sync_store().count("Bondi", "2026") == 1 + 2
+    monkeypatch.setitem(sales._STORE, "store", None)
+    store = sales.sync_store()
+    assert store.count("Bondi", "2026") == 3 and store.median("Bondi", "2026") == 300.0
+
+    # a changed source rebuilds from every tracked file, the ingested one included
+    pd.DataFrame({"suburb": ["Bondi"] * 3, "postcode": ["2026"] * 3, "price": [100, 300, 700],
+                  "contract_date": ["2023-01-01"] * 3}).to_csv(sales.SALES_CSV, index=False)
+    assert sales.sync_store().count("Bondi", "2026") == 3 + 1
+
+
+def test_ingesting_the_same_file_twice_does_not_double_it(tmp_path, monkeypatch):
+    monkeypatch.setattr(sales, "STORE_PATH", str(tmp_path / "store.npz"))
+    monkeypatch.setitem(sales._STORE, "store", None)
+    extract = tmp_path / "extract.csv"
+    pd.DataFrame({"suburb": ["Bondi"] * 2, "postcode": ["2026"] * 2, "price": [100, 300],
+                  "contract_date": ["2023-01-01"] * 2}).to_csv(extract, index=False)
+
+    sales.main(["ingest", str(extract)])
+    sales.main(["ingest", str(extract)])
+    store = SalesStore.load()
+    assert len(store) == 2 and store.count("Bondi", "2026") == 2
+
+    # a rewritten file replaces its old sales instead of adding to them
+    pd.DataFrame({"suburb": ["Bondi"] * 3, "postcode": ["2026"] * 3, "price": [100, 300, 900],
+                  "contract_date": ["2023-01-01"] * 3}).to_csv(extract, index=False)
+    os.utime(extract, (1, 1))
+    sales.main(["ingest", str(extract), str(extract)])
+    store = SalesStore.load()
+    assert store.count("Bondi", "2026") == 3 and store.median("Bondi", "2026") == 300.0
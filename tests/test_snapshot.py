@@ -0,0 +1,54 @@
+import os
+
+import pandas as pd
+import pytest
+
+from app.services import analytics, snapshot
+from app.services.connectors import crime_csv
+from app.services.snapshot import read_snapshot, source_stamp, write_snapshot
+from app.services.store import ListingStore
+
+
+@pytest.fixture
+def snap(tmp_path, monkeypatch):
+    crime = tmp_path / "crime.csv"
+    crime.write_text("suburb,state,crime_band\nBONDI,NSW,low\n")
+    monkeypatch.setattr(crime_csv, "CRIME_CSV", str(crime))
+    src = tmp_path / "listings.csv"
+    pd.DataFrame([{"id": "1", "suburb": "Bondi", "state": "NSW", "list_price": 900_000, "weekly_rent": 800},
+                  {"id": "2", "suburb": "Manly", "state": "NSW", "list_price": 1_200_000, "weekly_rent": 950}]
+                 ).to_csv(src, index=False)
+    path = str(tmp_path / "listings.snap")
+    write_snapshot(ListingStore.from_csv(str(src)), path, source_stamp(str(src)))
+    return path, str(src), crime
+
+
+def test_snapshot_round_trip(snap):
+    path, src, _ = snap
+    assert len(read_snapshot(path, source_stamp(src))) == 2
+
+
+def test_snapshot_rejected_when_default_weights_change(snap, monkeypatch):
+    monkeypatch.setitem(analytics.DEFAULT_WEIGHTS, "net_yield", 0.5)
+    assert read_snapshot(snap[0], source_stamp(snap[1])) is None
+
+
+def test_snapshot_rejected_when_scoring_version_changes(snap, monkeypatch):
+    monkeypatch.setattr(snapshot, "SCORING_VERSION", analytics.SCORING_VERSION + 1)
+    assert read_snapshot(snap[0], source_stamp(snap[1])) is None
+
+
+def _bondi(src):
+    store = ListingStore.from_csv(src)
+    return store.row(store.position("1"))
+
+
+def test_snapshot_rejected_when_crime_data_changes(snap):
+    path, src, crime = snap
+    before = _bondi(src)
+    crime.write_text("suburb,state,crime_band\nBONDI,NSW,high\nMANLY,NSW,low\n")
+    os.utime(crime, (1, 1))  # the band index is keyed on mtime, which may not have ticked yet
+    assert read_snapshot(path, source_stamp(src)) is None
+    after = _bondi(src)
+    assert (before["crime_band"], after["crime_band"]) == ("low", "high")
+    assert after["deal_score"] < before["deal_score"]
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from app.services import store as store_mod
+from app.services.analytics import compute_analytics_frame
+from app.services.store import ListingStore
+from benchmarks.synthetic import listings
+
+
+@pytest.fixture(scope="module")
+def store():
+    return ListingStore.from_frame(compute_analytics_frame(listings(3000, seed=1)))
+
+
+def test_repeated_sort_key_gets_a_cached_ordering(store):
+    idx = store.filter()
+    key = ("list_price", "asc")
+    assert key not in store._orders
+    for _ in range(store_mod.ORDERING_AFTER_USES):
+        np.testing.assert_array_equal(store.top(idx, *key, k=20), store.sort(idx, *key)[:20])
+    assert key in store._orders
+    np.testing.assert_array_equal(store.top(idx, *key, k=20), store.sort(idx, *key)[:20])
+    # paging walks the cached ordering too
+    after = store.seek("list_price", None, store.rows(store.top(idx, *key, k=20))[-1]["id"])
+    np.testing.assert_array_equal(store.top(idx, *key, k=20, after=after), store.sort(idx, *key)[20:40])
+
+
+def test_sparse_requests_dont_build_orderings(store):
+    idx = store.filter()[:10]
+    for _ in range(store_mod.ORDERING_AFTER_USES * 2):
+        store.top(idx, "land_m2", "desc", k=5)
+    assert ("land_m2", "desc") not in store._orders
+
+
+def test_reweighted_view_counts_its_own_uses(store):
+    view = store.reweighted({"net_yield": 0.6, "cagr5": 0.1})
+    idx = view.filter()
+    for _ in range(store_mod.ORDERING_AFTER_USES):
+        top = view.top(idx, "deal_score", "desc", k=10)
+    assert ("deal_score", "desc") in view._orders
+    assert view._orders[("deal_score", "desc")] is not store._orders[("deal_score", "desc")]
+    np.testing.assert_array_equal(view.top(idx, k=10), top)
+    np.testing.assert_array_equal(top, view.sort(idx)[:10])